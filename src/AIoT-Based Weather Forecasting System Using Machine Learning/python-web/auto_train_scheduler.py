@@ -30,6 +30,7 @@ class AutoTrainScheduler:
             "model_type": "prophet",
             "data_points": 10000,
             "targets": ["temperature", "humidity"],  # Default targets
+            "incremental": True,  # LightGBM: warm-start from the saved models
             "last_auto_train": None,
             "last_auto_train_timestamp": None,
             "training_history": []  # Store training history
@@ -119,15 +120,13 @@ class AutoTrainScheduler:
     
     def run_training(self):
         """Execute the training"""
-        from database import SessionLocal
-        from models.sensor_data import SensorData
-        from sqlalchemy import desc
-        from ml_utils import ml_trainer
+        from training_jobs import training_jobs
         
         settings = self.load_settings()
         model_type = settings.get("model_type", "prophet")
         data_points = settings.get("data_points", 10000)
         targets = settings.get("targets", ["temperature", "humidity"])
+        incremental = settings.get("incremental", True)
         
         logger.info(f"🤖 Auto-Training started: model={model_type}, data_points={data_points}, targets={targets}")
         print(f"\n{'='*60}")
@@ -136,43 +135,30 @@ class AutoTrainScheduler:
         print(f"🤖 Model: {model_type}")
         print(f"📊 Data points: {data_points}")
         print(f"🎯 Targets: {', '.join(targets)}")
+        print(f"♻️  Incremental: {'có' if incremental else 'không'}")
         print(f"🕐 Time: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
         print(f"{'='*60}\n")
         
         try:
-            db = SessionLocal()
+            sensor_targets = [t for t in targets if t in ["temperature", "humidity", "pressure", "aqi", "co2", "dust"]]
+            weather_targets = [t for t in targets if t in ["wind_speed", "rainfall", "uv_index"]]
+            if not sensor_targets:
+                sensor_targets = ["temperature", "humidity"]
             
-            # Get training data
-            records = db.query(SensorData).filter(
-                SensorData.temperature > 0
-            ).order_by(desc(SensorData.timestamp)).limit(data_points).all()
+            # Train in the job worker process (shows up in /api/ml/jobs) and wait for it
+            job = training_jobs.submit(model_type, sensor_targets, weather_targets, data_points, kind="scheduled",
+                                         incremental=incremental)
+            job = training_jobs.wait(job['id'])
             
-            if len(records) < 100:
-                logger.warning("Not enough data for auto-training")
-                print("⚠️ Không đủ dữ liệu để huấn luyện")
-                
-                # Save failed training history
-                self._add_training_history(settings, {
-                    "status": "failed",
-                    "message": "Không đủ dữ liệu để huấn luyện"
-                })
-                
-                db.close()
-                return False
-            
-            # Prepare data
-            data = [{
-                'timestamp': r.timestamp.isoformat() if hasattr(r.timestamp, 'isoformat') else str(r.timestamp),
-                'temperature': r.temperature,
-                'humidity': r.humidity,
-                'pressure': r.pressure,
-                'aqi': r.aqi or 0
-            } for r in records]
-            
-            db.close()
-            
-            # Train model
-            result = ml_trainer.train_model(model_type, data, targets)
+            if job['status'] == 'succeeded':
+                result = {
+                    'success': True,
+                    'accuracy': job['result'].get('overall_accuracy', 0) / 100,
+                    'training_time': job['result'].get('training_time', 0),
+                    'skipped': job['result'].get('skipped', False)
+                }
+            else:
+                result = {'success': False, 'message': job.get('error') or job.get('message')}
             
             if result.get('success'):
                 # Update last auto train time
@@ -190,14 +176,17 @@ class AutoTrainScheduler:
                     "targets": targets,
                     "accuracy": accuracy / 100,  # Store as decimal
                     "training_time": result.get('training_time', 0),
-                    "status": "success",
-                    "message": "Training completed successfully"
+                    "status": "skipped" if result.get('skipped') else "success",
+                    "message": "Training data unchanged, models kept" if result.get('skipped')
+                               else "Training completed successfully"
                 })
                 
                 self.save_settings(settings)
                 
                 logger.info(f"✅ Auto-Training completed: accuracy={accuracy:.2f}%")
                 print(f"\n✅ AUTO-TRAINING HOÀN TẤT!")
+                if result.get('skipped'):
+                    print("⏭️  Dữ liệu không thay đổi - giữ nguyên model hiện tại")
                 print(f"📈 R² Score: {accuracy:.2f}%")
                 print(f"⏱️ Thời gian: {result.get('training_time', 0):.1f}s")
                 print(f"{'='*60}\n")
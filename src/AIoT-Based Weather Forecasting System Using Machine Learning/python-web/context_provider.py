@@ -0,0 +1,179 @@
+"""
+Inference Context Provider
+Supplies the most recent history window per target for live forecasting, so
+predictions start from the current readings instead of the window captured
+when the model was trained
+"""
+import logging
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from models.resampling import MAX_INTERPOLATION_GAP, StreamingResampler, aggregation_for
+from models.streaming_features import StreamingFeatureState
+
+logger = logging.getLogger(__name__)
+
+SENSOR_TARGETS = ['temperature', 'humidity', 'aqi', 'pressure', 'co2', 'dust']
+WEATHER_TARGETS = ['wind_speed', 'rainfall', 'uv_index']
+
+
+class ContextProvider:
+    """
+    Keeps one StreamingFeatureState per target.
+
+    A state is seeded once with an index-backed query for the most recent
+    history; afterwards only rows newer than the table's last seen watermark
+    (MAX(timestamp)) are read and pushed into the state, so the window and its
+    rolling features stay current without re-reading the history.
+
+    With a resample interval, readings go through a StreamingResampler first
+    and the state receives one value per closed grid bin, matching the series
+    the model was trained on.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # {target: StreamingFeatureState}
+        self.states = {}
+        # {target: StreamingResampler} (targets with a resample interval)
+        self.resamplers = {}
+        # {target: timestamp of the newest row pushed into its state}
+        self.watermarks = {}
+
+    def _table_for(self, target: str):
+        from models.sensor_data import SensorData
+        from models.weather_forecasting import WeatherForecasting
+
+        if target in SENSOR_TARGETS:
+            return SensorData
+        if target in WEATHER_TARGETS:
+            return WeatherForecasting
+        return None
+
+    def _push(self, target: str, rows):
+        """Feed (timestamp, value) rows, oldest first, into the target's state"""
+        timestamps = [timestamp for timestamp, _ in rows]
+        values = [value for _, value in rows]
+        resampler = self.resamplers.get(target)
+        if resampler is not None:
+            timestamps, values = resampler.extend(timestamps, values)
+        self.states[target].extend(values, timestamps)
+
+    def _seed(self, db, table, target: str, spec, context_length: int, interval, table_watermark):
+        """Build a fresh state from the last context_length values (or grid bins)"""
+        from sqlalchemy import desc
+
+        column = getattr(table, target)
+        query = db.query(table.timestamp, column).filter(column > 0)
+        if interval:
+            # Whole bins covering the context plus room for interpolated gaps
+            last_bin = np.datetime64(table_watermark, 's').astype(np.int64) // interval
+            first_bin = last_bin - context_length - MAX_INTERPOLATION_GAP
+            since = np.datetime64(int(first_bin * interval), 's').astype(datetime)
+            rows = query.filter(table.timestamp >= since).order_by(table.timestamp).all()
+        else:
+            rows = query.order_by(desc(table.timestamp)).limit(context_length).all()[::-1]
+
+        self.states[target] = StreamingFeatureState(spec, context_length, history=context_length - spec.lookback)
+        if interval:
+            self.resamplers[target] = StreamingResampler(interval, aggregation_for(target))
+        else:
+            self.resamplers.pop(target, None)
+        self._push(target, rows)
+        self.watermarks[target] = rows[-1][0] if rows else None
+
+    def _catch_up(self, db, table, target: str, table_watermark, spec, context_length: int, interval):
+        """Push rows newer than the target's watermark; reseed if the gap is too large"""
+        column = getattr(table, target)
+        state = self.states.get(target)
+        resampler = self.resamplers.get(target)
+        last_seen = self.watermarks.get(target)
+
+        if (state is None or last_seen is None or state.spec != spec
+                or state.values.maxlen != max(spec.lookback, context_length)
+                or (resampler.interval if resampler else None) != interval
+                or table_watermark < last_seen):
+            # First use, different model features or grid, or rows were deleted
+            self._seed(db, table, target, spec, context_length, interval, table_watermark)
+            return
+
+        if table_watermark == last_seen:
+            return
+
+        query = db.query(table.timestamp, column).filter(
+            table.timestamp > last_seen,
+            column > 0
+        ).order_by(table.timestamp)
+
+        if interval:
+            if (table_watermark - last_seen).total_seconds() > context_length * interval:
+                # More new bins than the window holds - cheaper to start over
+                self._seed(db, table, target, spec, context_length, interval, table_watermark)
+                return
+            rows = query.all()
+        else:
+            rows = query.limit(context_length + 1).all()
+            if len(rows) > context_length:
+                # More new rows than the window holds - cheaper to start over
+                self._seed(db, table, target, spec, context_length, interval, table_watermark)
+                return
+
+        self._push(target, rows)
+        # Rows with value <= 0 still advance the watermark
+        self.watermarks[target] = table_watermark
+
+    def get_context(self, specs: dict, context_length: int, interval: int = None) -> dict:
+        """
+        Current StreamingFeatureState per target (buffering the last
+        context_length valid values, or grid bins of `interval` seconds,
+        oldest first).
+
+        specs maps each target to the FeatureSpec of its model; a state is
+        rebuilt when the spec changes (e.g. after retraining with new features).
+
+        Values <= 0 are skipped the same way LSTMModel.prepare_data skips them
+        for training. Targets without data are left out; on a database error
+        the result is empty and callers fall back to the model's stored context.
+        """
+        from database import SessionLocal
+        from sqlalchemy import func
+
+        context = {}
+        db = SessionLocal()
+        try:
+            with self.lock:
+                table_watermarks = {}
+                for target, spec in specs.items():
+                    table = self._table_for(target)
+                    if table is None:
+                        continue
+                    if table not in table_watermarks:
+                        table_watermarks[table] = db.query(func.max(table.timestamp)).scalar()
+                    table_watermark = table_watermarks[table]
+                    if table_watermark is None:
+                        continue
+
+                    self._catch_up(db, table, target, table_watermark, spec, context_length, interval)
+                    state = self.states.get(target)
+                    if state is not None and state.count > 0:
+                        context[target] = state
+        except Exception as e:
+            logger.error(f"Error loading inference context: {e}")
+            return {}
+        finally:
+            db.close()
+
+        return context
+
+    def invalidate(self):
+        """Drop all states (they are re-seeded on the next request); called after rows are deleted"""
+        with self.lock:
+            self.states.clear()
+            self.resamplers.clear()
+            self.watermarks.clear()
+
+
+# Global context provider instance
+context_provider = ContextProvider()
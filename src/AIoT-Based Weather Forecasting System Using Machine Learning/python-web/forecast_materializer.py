@@ -0,0 +1,192 @@
+"""
+Forecast Materializer
+Computes the full forecast outside the request path - after every training run
+and at the top of every hour - and keeps it as a snapshot that /api/ml/predict
+serves directly
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FORECAST_SNAPSHOT_FILE = Path(__file__).parent / "models_storage" / "forecast_snapshot.json"
+
+# Hours materialized per run (the maximum /api/ml/predict accepts)
+MATERIALIZE_HORIZON = 168
+
+
+class ForecastMaterializer:
+    def __init__(self):
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+        self.refresh_requested = threading.Event()
+        self.snapshot = None
+        # Last snapshot on disk is served right away after a restart
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        """Load the last materialized forecast from disk"""
+        try:
+            if FORECAST_SNAPSHOT_FILE.exists():
+                with open(FORECAST_SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+                    self.snapshot = json.load(f)
+                logger.info(f"Loaded forecast snapshot issued at {self.snapshot.get('issued_at')}")
+        except Exception as e:
+            logger.error(f"Error loading forecast snapshot: {e}")
+            self.snapshot = None
+
+    def _save_snapshot(self, snapshot: dict):
+        """Persist the snapshot (write then rename so readers never see a partial file)"""
+        try:
+            FORECAST_SNAPSHOT_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = FORECAST_SNAPSHOT_FILE.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, default=str)
+            tmp_file.replace(FORECAST_SNAPSHOT_FILE)
+        except Exception as e:
+            logger.error(f"Error saving forecast snapshot: {e}")
+
+    def materialize(self) -> bool:
+        """Run the current model for MATERIALIZE_HORIZON hours and store the result"""
+        from database import SessionLocal
+        from models.sensor_data import SensorData
+        from sqlalchemy import desc
+        from ml_utils import ml_manager
+
+        try:
+            db = SessionLocal()
+            try:
+                latest = db.query(SensorData).filter(
+                    SensorData.temperature > 0
+                ).order_by(desc(SensorData.timestamp)).first()
+            finally:
+                db.close()
+
+            if not latest:
+                logger.warning("Forecast materializer: no sensor data")
+                return False
+
+            latest_data = {
+                'temperature': latest.temperature,
+                'humidity': latest.humidity,
+                'pressure': latest.pressure,
+                'co2': latest.co2 or 0,
+                'dust': latest.dust or 0,
+                'aqi': latest.aqi or 0
+            }
+
+            # Read before predicting: a switch during the run must not relabel old predictions
+            model_version = ml_manager.get_model_version()
+            result = ml_manager.predict(MATERIALIZE_HORIZON, latest_data, context_watermark=latest.timestamp)
+            if not result.get('success'):
+                # Untrained models - the API keeps computing its basic fallback
+                logger.info(f"Forecast materializer skipped: {result.get('error', 'prediction failed')}")
+                return False
+
+            snapshot = {
+                'issued_at': datetime.now().isoformat(),
+                'model_type': result.get('current_model_type', ml_manager.current_model_type),
+                'model_version': model_version,
+                'context_timestamp': latest.timestamp.isoformat(),
+                'latest_data': latest_data,
+                'predictions': result.get('predictions', [])
+            }
+
+            with self.lock:
+                self.snapshot = snapshot
+            self._save_snapshot(snapshot)
+            logger.info(f"📦 Forecast materialized: {len(snapshot['predictions'])}h, model={snapshot['model_type']}")
+
+            from realtime_publisher import realtime_publisher
+            realtime_publisher.publish('forecast', {
+                'model_type': snapshot['model_type'],
+                'model_version': snapshot['model_version'],
+                'issued_at': snapshot['issued_at'],
+                'timestamp': datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+            })
+            return True
+
+        except Exception as e:
+            logger.error(f"Forecast materializer error: {e}")
+            return False
+
+    def get_forecast(self, hours_ahead: int):
+        """
+        Materialized forecast for the next N hours, or None if there is no
+        snapshot covering them (the caller then predicts live).
+        Hours that have already passed since the issue time are skipped.
+        A snapshot of another model (switched or retrained since) is not
+        served while the refresh is pending.
+        """
+        from ml_utils import ml_manager
+
+        with self.lock:
+            snapshot = self.snapshot
+        if not snapshot:
+            return None
+        if snapshot.get('model_version') != ml_manager.get_model_version():
+            return None
+
+        try:
+            issued_at = datetime.fromisoformat(snapshot['issued_at'])
+        except (KeyError, ValueError):
+            return None
+
+        elapsed_hours = max(0, int((datetime.now() - issued_at).total_seconds() // 3600))
+        predictions = snapshot.get('predictions', [])[elapsed_hours:elapsed_hours + hours_ahead]
+        if len(predictions) < hours_ahead:
+            return None
+
+        return {**snapshot, 'predictions': predictions}
+
+    def request_refresh(self):
+        """Ask the background thread to re-materialize now (e.g. after training)"""
+        self.refresh_requested.set()
+
+    def materializer_loop(self):
+        """Refresh at startup, at the top of every hour and on request"""
+        logger.info("🔄 Forecast Materializer started")
+
+        while self.running:
+            self.refresh_requested.clear()
+            self.materialize()
+
+            now = datetime.now()
+            next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            self.refresh_requested.wait(timeout=(next_hour - now).total_seconds())
+
+    def start(self):
+        """Start the materializer in background"""
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self.materializer_loop, daemon=True)
+        self.thread.start()
+        logger.info("Forecast Materializer started in background")
+
+    def stop(self):
+        """Stop the materializer"""
+        self.running = False
+        self.refresh_requested.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("Forecast Materializer stopped")
+
+
+# Global materializer instance
+forecast_materializer = ForecastMaterializer()
+
+
+def start_materializer():
+    """Start the forecast materializer"""
+    forecast_materializer.start()
+
+
+def stop_materializer():
+    """Stop the forecast materializer"""
+    forecast_materializer.stop()
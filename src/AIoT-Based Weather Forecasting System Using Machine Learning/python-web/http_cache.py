@@ -0,0 +1,212 @@
+"""
+HTTP Conditional Caching
+ETag / Last-Modified / Cache-Control for read-only API endpoints, keyed on
+the data watermark (MAX(timestamp)) and the ML model version instead of the
+response body, so an unchanged resource is answered with 304 before the
+endpoint's query runs.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Expected ingest cadence (seconds): Node-RED posts a sensor reading every
+# minute, the weather API is refreshed every 5 minutes
+SENSOR_INGEST_INTERVAL = 60
+WEATHER_INGEST_INTERVAL = 300
+
+# Watermarks are reused for this long so a burst of requests costs one query
+WATERMARK_TTL = 1.0
+
+# Endpoint -> validators the response depends on
+#   sensor / weather : MAX(timestamp) of the table
+#   model            : ML model version (changes on retrain / model switch)
+#   window           : sliding "last N hours" window, bucketed by ingest cadence
+#   day              : calendar day (for "records today" style counters)
+#   revalidate       : no max-age; the browser revalidates every time (pages
+#                      that delete rows must see the change immediately)
+CACHE_RULES = {
+    "/api/realtime-data": ("sensor", "weather"),
+    "/api/sensor-data/latest": ("sensor",),
+    "/api/sensor-data/history": ("sensor", "revalidate"),
+    "/api/sensor-data/stats": ("sensor", "window"),
+    "/api/weather-data/latest": ("weather",),
+    "/api/weather-data/history": ("weather", "revalidate"),
+    "/api/charts-data": ("sensor", "weather", "window"),
+    "/api/system-stats": ("sensor", "weather", "day", "revalidate"),
+    "/api/ml/predict": ("sensor", "model", "window"),
+    "/api/dashboard": ("sensor", "weather", "model", "window", "day"),
+    "/api/ml/model-info": ("model",),
+    "/api/ml/training-history": ("model",),
+    "/api/ml/compare-models": ("model",),
+}
+
+
+class WatermarkSource:
+    """Cheap MAX(timestamp) lookups with a short TTL"""
+
+    def __init__(self, ttl: float = WATERMARK_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.values = {}
+        self.fetched_at = 0.0
+
+    def get(self) -> dict:
+        with self.lock:
+            if time.monotonic() - self.fetched_at < self.ttl:
+                return self.values
+
+            from database import SessionLocal
+            from models.sensor_data import SensorData
+            from models.weather_forecasting import WeatherForecasting
+            from sqlalchemy import func
+
+            db = SessionLocal()
+            try:
+                self.values = {
+                    'sensor': db.query(func.max(SensorData.timestamp)).scalar(),
+                    'weather': db.query(func.max(WeatherForecasting.timestamp)).scalar(),
+                }
+            finally:
+                db.close()
+            self.fetched_at = time.monotonic()
+            return self.values
+
+    def invalidate(self):
+        with self.lock:
+            self.fetched_at = 0.0
+
+
+class ConditionalCacheMiddleware:
+    """
+    ASGI middleware adding validators to the endpoints listed in CACHE_RULES.
+
+    Deletes and other writes don't necessarily move MAX(timestamp), so every
+    non-GET request under /api/ bumps a write generation that is part of
+    every ETag.
+    """
+
+    def __init__(self, app, rules: dict = None):
+        self.app = app
+        self.rules = rules if rules is not None else CACHE_RULES
+        self.watermarks = WatermarkSource()
+        self.generation = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.generation += 1
+                self.watermarks.invalidate()
+            return
+
+        sources = self.rules.get(scope["path"])
+        if not sources:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            validators = await run_in_threadpool(self._build_validators, scope, sources)
+        except Exception as e:
+            # Never fail a request because the watermark lookup failed
+            logger.warning(f"Conditional cache skipped for {scope['path']}: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and self._etag_matches(if_none_match, validators["etag"]):
+            await self._send_not_modified(send, validators)
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                headers = MutableHeaders(scope=message)
+                for name, value in self._header_items(validators):
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
+
+    def _build_validators(self, scope, sources) -> dict:
+        """Compute ETag, Last-Modified and max-age for one request"""
+        now = datetime.now()
+        parts = [scope["path"], scope.get("query_string", b"").decode("latin-1"), str(self.generation)]
+        marks = []
+        max_age = None
+
+        if "sensor" in sources or "weather" in sources:
+            watermarks = self.watermarks.get()
+            for source, interval in (("sensor", SENSOR_INGEST_INTERVAL), ("weather", WEATHER_INGEST_INTERVAL)):
+                if source not in sources:
+                    continue
+                mark = watermarks.get(source)
+                parts.append(f"{source}={mark.isoformat() if mark else '-'}")
+                if mark:
+                    marks.append(mark)
+                    # Fresh until the next reading is expected
+                    remaining = int(interval - (now - mark).total_seconds())
+                    remaining = max(0, min(interval, remaining))
+                    max_age = remaining if max_age is None else min(max_age, remaining)
+
+        if "model" in sources:
+            from ml_utils import ml_manager
+            parts.append(f"model={ml_manager.get_model_version()}")
+
+        if "window" in sources:
+            bucket = int(now.timestamp()) // SENSOR_INGEST_INTERVAL
+            parts.append(f"window={bucket}")
+            window_left = SENSOR_INGEST_INTERVAL - int(now.timestamp()) % SENSOR_INGEST_INTERVAL
+            max_age = window_left if max_age is None else min(max_age, window_left)
+
+        if "day" in sources:
+            parts.append(f"day={now.date().isoformat()}")
+
+        if "revalidate" in sources:
+            max_age = 0
+
+        digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+        return {
+            "etag": f'W/"{digest}"',
+            "last_modified": max(marks) if marks else None,
+            "max_age": max_age or 0,
+        }
+
+    @staticmethod
+    def _etag_matches(if_none_match: str, etag: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison (RFC 9110 13.1.2)
+        opaque = etag[2:] if etag.startswith("W/") else etag
+        return any((tag[2:] if tag.startswith("W/") else tag) == opaque for tag in tags)
+
+    @staticmethod
+    def _header_items(validators: dict) -> list:
+        items = [
+            ("etag", validators["etag"]),
+            ("cache-control", f"private, max-age={validators['max_age']}"),
+        ]
+        if validators["last_modified"]:
+            # Database timestamps are naive local time
+            last_modified = validators["last_modified"].astimezone(timezone.utc)
+            items.append(("last-modified", format_datetime(last_modified, usegmt=True)))
+        return items
+
+    async def _send_not_modified(self, send, validators: dict):
+        headers = [(name.encode("latin-1"), value.encode("latin-1"))
+                   for name, value in self._header_items(validators)]
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
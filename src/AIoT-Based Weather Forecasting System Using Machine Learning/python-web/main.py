@@ -39,6 +39,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Conditional caching (ETag / Last-Modified keyed on data watermark)
+from http_cache import ConditionalCacheMiddleware
+app.add_middleware(ConditionalCacheMiddleware)
+
 # Mount static files with absolute path
 static_dir = BASE_DIR / "static"
 app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
@@ -68,6 +72,38 @@ async def startup_event():
     except Exception as e:
         print(f"⚠ Auto-Training Scheduler failed to start: {e}")
     
+    # Start Training Job worker (model training outside the request handlers)
+    try:
+        from training_jobs import start_training_jobs
+        start_training_jobs()
+        print("✓ Training Job worker started")
+    except Exception as e:
+        print(f"⚠ Training Job worker failed to start: {e}")
+    
+    # Start Snapshot Exporter (nightly columnar export of the training data)
+    try:
+        from snapshot_exporter import start_snapshot_exporter
+        start_snapshot_exporter()
+        print("✓ Snapshot Exporter started")
+    except Exception as e:
+        print(f"⚠ Snapshot Exporter failed to start: {e}")
+    
+    # Start Forecast Materializer (hourly / post-training forecast snapshot)
+    try:
+        from forecast_materializer import start_materializer
+        start_materializer()
+        print("✓ Forecast Materializer started")
+    except Exception as e:
+        print(f"⚠ Forecast Materializer failed to start: {e}")
+    
+    # Start Realtime Publisher (SSE / WebSocket push channel)
+    try:
+        from realtime_publisher import start_publisher
+        start_publisher()
+        print("✓ Realtime Publisher started")
+    except Exception as e:
+        print(f"⚠ Realtime Publisher failed to start: {e}")
+    
     print("="*50 + "\n")
 
 
@@ -82,6 +118,30 @@ async def shutdown_event():
         print("✓ Auto-Training Scheduler stopped")
     except Exception as e:
         print(f"⚠ Error stopping scheduler: {e}")
+    try:
+        from training_jobs import stop_training_jobs
+        stop_training_jobs()
+        print("✓ Training Job worker stopped")
+    except Exception as e:
+        print(f"⚠ Error stopping training job worker: {e}")
+    try:
+        from snapshot_exporter import stop_snapshot_exporter
+        stop_snapshot_exporter()
+        print("✓ Snapshot Exporter stopped")
+    except Exception as e:
+        print(f"⚠ Error stopping snapshot exporter: {e}")
+    try:
+        from forecast_materializer import stop_materializer
+        stop_materializer()
+        print("✓ Forecast Materializer stopped")
+    except Exception as e:
+        print(f"⚠ Error stopping forecast materializer: {e}")
+    try:
+        from realtime_publisher import stop_publisher
+        stop_publisher()
+        print("✓ Realtime Publisher stopped")
+    except Exception as e:
+        print(f"⚠ Error stopping realtime publisher: {e}")
     print("="*50 + "\n")
 
 
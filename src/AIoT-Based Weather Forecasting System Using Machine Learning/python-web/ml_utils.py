@@ -5,7 +5,10 @@ Central manager for all ML models (Prophet, LightGBM/XGBoost)
 
 import json
 import logging
+import threading
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
 from datetime import datetime, timedelta
 
@@ -21,9 +24,19 @@ MODELS_DIR.mkdir(exist_ok=True)
 HISTORY_FILE = MODELS_DIR / 'training_history.json'
 CURRENT_MODEL_FILE = MODELS_DIR / 'current_model.json'
 
+# Forecast cache: every miss computes this many hours, shorter requests are slices
+FORECAST_CACHE_HORIZON = 168
+FORECAST_CACHE_SIZE = 8
+
+# Model settings that shape an artifact; part of the training data fingerprint so
+# a changed lookback / horizon / backend retrains even on unchanged data
+FINGERPRINT_SETTINGS = ('backend', 'lookback', 'forecast_horizon', 'resample_interval', 'strategy', 'global_model')
+
 # Import model classes
 from models.prophet_model import prophet_model
 from models.lightgbm_model import lightgbm_model
+from models.training_data import data_fingerprint
+from models.memory_budget import peak_rss_mb
 
 
 class MLManager:
@@ -38,6 +51,16 @@ class MLManager:
         self.training_history = []
         self._load_training_history()
         self._load_current_model()
+        
+        # Forecast cache keyed by (model type, model version, context watermark, hour bucket).
+        # The cache lock only guards the dicts; a miss runs the model outside it and
+        # concurrent misses for the same key wait on its in-flight Future
+        self.forecast_cache = OrderedDict()
+        self.forecast_cache_lock = threading.Lock()
+        self.forecast_inflight = {}
+        self.forecast_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        # One model run at a time, and never while reload_models swaps the models
+        self.model_lock = threading.Lock()
     
     def _load_training_history(self):
         """Load training history from file"""
@@ -83,6 +106,8 @@ class MLManager:
         if model_type in self.models:
             self.current_model_type = model_type
             self._save_current_model()
+            self.invalidate_forecast_cache()
+            self._refresh_materialized_forecast()
             logger.info(f"Set current model to: {model_type}")
             return True
         return False
@@ -91,51 +116,57 @@ class MLManager:
         """Get the current active model"""
         return self.models.get(self.current_model_type, prophet_model)
     
+    def get_model_version(self) -> str:
+        """
+        Version string of the serving models.
+        Changes whenever a training run finishes or the active model type is switched.
+        """
+        last_trained = self.training_history[-1].get('timestamp', '') if self.training_history else ''
+        return f"{self.current_model_type}:{len(self.training_history)}:{last_trained}"
+    
     def train_model(self, model_type: str, data: list, targets: list) -> dict:
         """
         Train model with specific targets (for auto-train compatibility)
         
         Args:
             model_type: Type of model to train (prophet, lightgbm)
-            data: List of data dictionaries with sensor readings
+            data: TrainingData (models.training_data) or list of data dictionaries with sensor readings
             targets: List of target features to train
         
         Returns:
             dict with training results
         """
         try:
-            from models.sensor_data import SensorData
-            from datetime import datetime
+            from models.training_data import (
+                ASOF_TOLERANCE, SENSOR_COLUMNS, TrainingData, asof_join, load_training_data
+            )
             
-            # Convert data dictionaries to SensorData objects
-            records = []
-            for d in data:
-                record = SensorData(
-                    timestamp=datetime.fromisoformat(d['timestamp']) if isinstance(d['timestamp'], str) else d['timestamp'],
-                    temperature=d.get('temperature', 0),
-                    humidity=d.get('humidity', 0),
-                    pressure=d.get('pressure', 0),
-                    aqi=d.get('aqi', 0)
-                )
-                records.append(record)
+            records = data
+            if not isinstance(records, TrainingData):
+                records = TrainingData.from_dicts('sensor', data, SENSOR_COLUMNS)
             
             # Separate sensor and weather targets
             sensor_targets = [t for t in targets if t in ['temperature', 'humidity', 'pressure', 'aqi', 'co2', 'dust']]
             weather_targets = [t for t in targets if t in ['wind_speed', 'rainfall', 'uv_index']]
             
-            # For weather targets, we need to get weather data
+            # For weather targets, align weather data of the same time window to the sensor timestamps
             weather_records = None
-            if weather_targets:
+            if weather_targets and len(records) > 0:
                 try:
                     from database import SessionLocal
-                    from models.weather_forecasting import WeatherForecasting
-                    from sqlalchemy import desc
                     
-                    db = SessionLocal()
-                    weather_records = db.query(WeatherForecasting).order_by(
-                        desc(WeatherForecasting.timestamp)
-                    ).limit(len(records)).all()
-                    db.close()
+                    if all(t in records.columns for t in weather_targets):
+                        weather_records = records
+                    else:
+                        db = SessionLocal()
+                        try:
+                            weather = load_training_data(
+                                db, 'weather', weather_targets,
+                                start=records.start - timedelta(seconds=ASOF_TOLERANCE), end=records.end
+                            )
+                        finally:
+                            db.close()
+                        weather_records = asof_join(records, weather, weather_targets)
                 except Exception as e:
                     logger.warning(f"Could not fetch weather data: {e}")
                     weather_records = None
@@ -200,16 +231,25 @@ class MLManager:
     def train_selected_targets(self, records, model_type: str = None, 
                                sensor_targets: list = None, 
                                weather_records=None, 
-                               weather_targets: list = None) -> dict:
+                               weather_targets: list = None,
+                               progress=None,
+                               incremental: bool = False,
+                               force: bool = False) -> dict:
         """
         Train a specific model type with selected targets
         
         Args:
-            records: List of SensorData records from database
+            records: TrainingData or list of SensorData records from database
             model_type: Type of model to train (prophet, lightgbm)
             sensor_targets: List of sensor targets to train (e.g., ['temperature', 'humidity'])
-            weather_records: List of WeatherForecasting records from database (optional)
+            weather_records: TrainingData or list of WeatherForecasting records (optional)
             weather_targets: List of weather targets to train (e.g., ['wind_speed'])
+            progress: Optional callback(event dict) with the model's training events;
+                'fraction' is rescaled to the whole run and 'phase' is 'sensor' or 'weather'
+            incremental: Continue the stored models with new data instead of a full
+                rebuild (only models with supports_incremental; others ignore it)
+            force: Retrain targets whose saved model was trained on the same data
+                (otherwise they are skipped, see data_fingerprint)
         
         Returns:
             dict with training results
@@ -234,14 +274,78 @@ class MLManager:
             
             # Get the model and train it with selected targets
             model = self.models[model_type]
+            train_weather = bool(weather_records and len(weather_records) > 0 and weather_targets)
+            
+            # Search results saved since this process loaded the model count as settings
+            if hasattr(model, 'load_tuned_params'):
+                model.load_tuned_params()
+            
+            # Targets whose saved model was trained on exactly this data are skipped
+            fingerprints = {target: self.data_fingerprint(records, target, model_type) for target in sensor_targets}
+            if train_weather:
+                fingerprints.update({
+                    target: self.data_fingerprint(weather_records, target, model_type) for target in weather_targets
+                })
+            skipped = [] if force else [
+                target for target, fingerprint in fingerprints.items()
+                if model.fingerprints.get(target) == fingerprint
+            ]
+            if getattr(model, 'global_model', False) and len(skipped) < len(fingerprints):
+                # The targets share one model: a change in any of them retrains all
+                skipped = []
+            run_sensor_targets = [t for t in sensor_targets if t not in skipped]
+            run_weather_targets = [t for t in weather_targets if t not in skipped] if train_weather else []
+            
+            if skipped:
+                print(f"⏭️  Dữ liệu không thay đổi, bỏ qua: {', '.join(skipped)}")
+            if not run_sensor_targets and not run_weather_targets:
+                return self._unchanged_result(model_type, skipped, len(records), start_time)
+            
+            # Overall progress is split between the phases by their number of targets
+            total_targets = len(run_sensor_targets) + len(run_weather_targets)
+            sensor_share = len(run_sensor_targets) / total_targets
+            
+            def phase_progress(phase: str, base: float, share: float):
+                if progress is None:
+                    return None
+                return lambda event: progress({**event, 'phase': phase, 'fraction': base + share * event.get('fraction', 0)})
+            
+            options = {'fingerprints': fingerprints}
+            if incremental and getattr(model, 'supports_incremental', False):
+                options['incremental'] = True
             
             # Train with sensor_data records for selected sensor targets
-            result = model.train_selected(records, sensor_targets)
+            result = None
+            weather_result = None
+            if getattr(model, 'global_model', False):
+                # One global model: sensor and weather targets train in a single run
+                target_records = {target: records for target in run_sensor_targets}
+                target_records.update({target: weather_records for target in run_weather_targets})
+                result = model.train_global(target_records, progress=progress, **options)
+                run_sensor_targets, run_weather_targets = [], []
+            if run_sensor_targets:
+                result = model.train_selected(records, run_sensor_targets,
+                                              progress=phase_progress('sensor', 0.0, sensor_share), **options)
             
             # If weather_records and weather_targets provided, train weather targets too
-            weather_result = None
-            if weather_records and len(weather_records) > 0 and weather_targets:
-                weather_result = model.train_weather_selected(weather_records, weather_targets)
+            if run_weather_targets:
+                weather_result = model.train_weather_selected(
+                    weather_records, run_weather_targets,
+                    progress=phase_progress('weather', sensor_share, 1.0 - sensor_share),
+                    **options
+                )
+            if result is None:
+                # Only weather targets needed training
+                result, weather_result = weather_result, None
+            
+            # A joint (sensor + aligned weather) dataset counts its rows once
+            joint = weather_records is records
+            weather_count = 0
+            if weather_records and weather_targets:
+                weather_count = weather_records.rows_with(weather_targets) if joint else len(weather_records)
+            
+            # Model artifacts were replaced - cached forecasts are stale even if training failed halfway
+            self.invalidate_forecast_cache()
             
             # Combine results
             if result.get('success'):
@@ -273,6 +377,7 @@ class MLManager:
                 print(f"📊 Models đã train: {', '.join(models_trained)}")
                 print(f"🎯 Độ chính xác tổng: {overall_accuracy:.2f}%")
                 print(f"⏱️  Thời gian: {total_training_time:.2f}s")
+                print(f"🧠 Bộ nhớ đỉnh: {peak_rss_mb():.1f} MB")
                 print("="*60 + "\n")
                 
                 # Update current model type
@@ -288,7 +393,8 @@ class MLManager:
                     'overall_accuracy': round(float(overall_accuracy), 2),
                     'training_time': (datetime.now() - start_time).total_seconds(),
                     'data_points': len(records),
-                    'weather_data_points': len(weather_records) if weather_records else 0
+                    'weather_data_points': weather_count,
+                    'peak_rss_mb': peak_rss_mb()
                 }
                 
                 self.training_history.append(training_record)
@@ -296,6 +402,7 @@ class MLManager:
                 if len(self.training_history) > 100:
                     self.training_history = self.training_history[-100:]
                 self._save_training_history()
+                self._refresh_materialized_forecast()
                 
                 logger.info(f"Training completed for {model_type}: {overall_accuracy:.2f}% accuracy")
                 
@@ -306,7 +413,9 @@ class MLManager:
                     'metrics': all_metrics,
                     'overall_accuracy': round(float(overall_accuracy), 2),
                     'training_time': round((datetime.now() - start_time).total_seconds(), 2),
-                    'data_points': len(records) + (len(weather_records) if weather_records else 0)
+                    'data_points': len(records) + (0 if joint else weather_count),
+                    'skipped_targets': skipped,
+                    'peak_rss_mb': peak_rss_mb()
                 }
             
             return result
@@ -320,15 +429,65 @@ class MLManager:
                 'error': str(e)
             }
     
+    def data_fingerprint(self, records, target: str, model_type: str = None) -> dict:
+        """
+        Fingerprint of a target's training window for one model type: row count,
+        first / last timestamp and rollup checksum of the data plus the model
+        settings in FINGERPRINT_SETTINGS (and the target's searched config)
+        """
+        model = self.models[model_type or self.current_model_type]
+        settings = {key: getattr(model, key) for key in FINGERPRINT_SETTINGS if hasattr(model, key)}
+        if hasattr(model, 'params_for') and model.params_for(target):
+            # A new search result retrains the target
+            settings['tuned'] = model.params_for(target)
+        return {
+            **data_fingerprint(records, target, model.resample_interval),
+            'settings': settings
+        }
+    
+    def _unchanged_result(self, model_type: str, targets: list, data_points: int, start_time: datetime) -> dict:
+        """Training result when every target's data is unchanged (nothing retrained or saved)"""
+        model = self.models[model_type]
+        metrics = {target: model.metrics.get(target, {}) for target in targets}
+        accuracies = [m.get('accuracy', 0) for m in metrics.values()]
+        
+        if self.current_model_type != model_type:
+            self.current_model_type = model_type
+            self._save_current_model()
+        
+        print("\n" + "="*60)
+        print(f"⏭️  BỎ QUA HUẤN LUYỆN {model_type.upper()}: dữ liệu không thay đổi kể từ lần huấn luyện trước")
+        print("="*60 + "\n")
+        logger.info(f"Training skipped for {model_type}: data unchanged for {', '.join(targets)}")
+        
+        return {
+            'success': True,
+            'skipped': True,
+            'model_type': model_type,
+            'models_trained': [],
+            'skipped_targets': targets,
+            'metrics': metrics,
+            'overall_accuracy': round(float(np.mean(accuracies)), 2) if accuracies else 0,
+            'training_time': round((datetime.now() - start_time).total_seconds(), 2),
+            'data_points': data_points,
+            'message': 'Dữ liệu không thay đổi - giữ nguyên model hiện tại'
+        }
+    
     def predict(self, hours_ahead: int = 24, latest_data: dict = None, 
-                model_type: str = None) -> dict:
+                model_type: str = None, context_watermark=None) -> dict:
         """
         Make predictions using the specified or current model
         
+        Forecasts are cached per (model type, model version, context watermark, hour).
+        A miss computes FORECAST_CACHE_HORIZON hours once; shorter horizons are
+        served as slices of that run. Concurrent misses of one key share the run.
+        
         Args:
             hours_ahead: Number of hours to predict
             latest_data: Latest sensor data for context
             model_type: Type of model to use for prediction
+            context_watermark: Timestamp of the newest context reading
+                (defaults to the contents of latest_data)
         
         Returns:
             dict with predictions
@@ -342,15 +501,61 @@ class MLManager:
                 'error': f'Unknown model type: {model_type}'
             }
         
-        try:
-            model = self.models[model_type]
-            result = model.predict_all(hours_ahead, latest_data)
-            
-            if result.get('success'):
-                result['current_model_type'] = model_type
+        if context_watermark is None and latest_data:
+            context_watermark = tuple(sorted(latest_data.items()))
+        hour_bucket = datetime.now().strftime("%Y%m%d%H")
+        key = (model_type, self.get_model_version(), context_watermark, hour_bucket)
+        
+        while True:
+            with self.forecast_cache_lock:
+                cached = self.forecast_cache.get(key)
+                if cached is not None and len(cached['predictions']) >= hours_ahead:
+                    self.forecast_cache.move_to_end(key)
+                    self.forecast_cache_stats['hits'] += 1
+                    return {**cached, 'predictions': cached['predictions'][:hours_ahead], 'cached': True}
+                
+                pending = self.forecast_inflight.get(key)
+                if pending is None:
+                    pending = self.forecast_inflight[key] = Future()
+                    self.forecast_cache_stats['misses'] += 1
+                    break
             
+            # Same key is being computed: wait for it, then read it from the cache
+            # (a failed run is returned as is; a too short one is recomputed)
+            result = pending.result()
+            if not result.get('success'):
+                return result
+        
+        result = {'success': False, 'error': 'Prediction did not finish'}
+        try:
+            result = self._run_forecast(model_type, max(hours_ahead, FORECAST_CACHE_HORIZON), latest_data)
+        finally:
+            with self.forecast_cache_lock:
+                if result.get('success'):
+                    result['current_model_type'] = model_type
+                    self.forecast_cache[key] = result
+                    while len(self.forecast_cache) > FORECAST_CACHE_SIZE:
+                        self.forecast_cache.popitem(last=False)
+                del self.forecast_inflight[key]
+            pending.set_result(result)
+        
+        if not result.get('success'):
             return result
-            
+        return {**result, 'predictions': result['predictions'][:hours_ahead], 'cached': False}
+    
+    def _run_forecast(self, model_type: str, horizon: int, latest_data: dict = None) -> dict:
+        """Run a model for `horizon` hours (a forecast cache miss)"""
+        try:
+            with self.model_lock:
+                model = self.models[model_type]
+                if model_type == 'lightgbm':
+                    # Forecast from the live history window, not the one saved at training time
+                    from context_provider import context_provider
+                    context = context_provider.get_context(
+                        model.feature_specs(), model.context_length, model.resample_interval
+                    )
+                    return model.predict_all(horizon, latest_data, context=context)
+                return model.predict_all(horizon, latest_data)
         except Exception as e:
             logger.error(f"Error predicting with {model_type}: {e}")
             return {
@@ -358,6 +563,52 @@ class MLManager:
                 'error': str(e)
             }
     
+    def reload_models(self, model_type: str = None):
+        """
+        Serve models (and training history) written by another process,
+        e.g. a finished training job
+        
+        Args:
+            model_type: Model type to reload (default: all)
+        """
+        model_types = [model_type] if model_type in self.models else list(self.models)
+        # Under the model lock so no forecast is computed from a half-loaded set of models
+        with self.model_lock:
+            for mtype in model_types:
+                self.models[mtype]._load_models()
+            self._load_training_history()
+            self._load_current_model()
+        self.invalidate_forecast_cache()
+        self._refresh_materialized_forecast()
+        logger.info(f"Reloaded models: {', '.join(model_types)}")
+    
+    def invalidate_forecast_cache(self):
+        """Drop all cached forecasts (after retraining or switching models)"""
+        with self.forecast_cache_lock:
+            if self.forecast_cache:
+                self.forecast_cache.clear()
+                self.forecast_cache_stats['invalidations'] += 1
+    
+    def _refresh_materialized_forecast(self):
+        """Re-issue the materialized forecast with the current models"""
+        try:
+            from forecast_materializer import forecast_materializer
+            forecast_materializer.request_refresh()
+        except Exception as e:
+            logger.warning(f"Could not refresh materialized forecast: {e}")
+    
+    def get_forecast_cache_stats(self) -> dict:
+        """Forecast cache hit/miss counters"""
+        with self.forecast_cache_lock:
+            stats = dict(self.forecast_cache_stats)
+            entries = len(self.forecast_cache)
+        lookups = stats['hits'] + stats['misses']
+        return {
+            **stats,
+            'entries': entries,
+            'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else 0.0
+        }
+    
     def get_model_info(self, model_type: str = None) -> dict:
         """Get information about a specific model or all models"""
         try:
@@ -0,0 +1,300 @@
+"""
+Backtesting
+Rolling-origin replay of multi-step forecasts over history. From each origin,
+every model type forecasts horizons 1..H grid steps (hours by default) using
+only the data known at that origin; comparing with what was measured later
+gives MAE / RMSE per horizon, target and model type. Origins are grouped into
+folds whose models are trained on the data up to the fold's first origin, so
+no forecast sees its own future. Folds run in parallel on the training
+executor and each origin's inference is timed, which makes a backtest the
+benchmark for both accuracy and forecast latency.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from models.resampling import RESAMPLE_INTERVAL, aggregation_for, resample
+from models.training_data import target_series
+from models.training_executor import TrainingExecutor, training_executor
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BACKTEST_DIR = BASE_DIR / "models_storage" / "backtests"
+LATEST_REPORT = BACKTEST_DIR / "latest.json"
+
+MODEL_TYPES = ('lightgbm', 'prophet')
+
+# Forecast horizon in grid steps, origins replayed, grid steps between origins, folds
+DEFAULT_HORIZON = 168
+DEFAULT_ORIGINS = 24
+DEFAULT_STRIDE = 24
+DEFAULT_FOLDS = 3
+
+# Grid steps a fold trains on at least (earlier origins are dropped)
+MIN_TRAIN_STEPS = 200
+
+# Horizons listed in the report summary
+SUMMARY_HORIZONS = (1, 6, 24, 72, 168)
+
+
+def grid_series(records, target: str, interval=RESAMPLE_INTERVAL):
+    """(timestamps, values) of a target on the training grid (as the models see it)"""
+    timestamps, values = target_series(records, target)
+    if interval:
+        return resample(timestamps, values, interval, aggregation_for(target))
+    order = np.argsort(timestamps, kind='stable')
+    return timestamps[order], np.asarray(values, dtype=float)[order]
+
+
+def select_origins(positions, horizon: int, origins: int, stride: int) -> np.ndarray:
+    """
+    Series indices of the origins, oldest first: every `stride` grid steps back
+    from the last one whose whole horizon lies inside the data
+
+    Args:
+        positions: Grid position of every series value (gaps leave holes)
+    """
+    last = positions[-1] - horizon
+    wanted = last - stride * np.arange(origins)
+    indices = np.searchsorted(positions, wanted, side='right') - 1
+    return np.unique(indices[indices >= MIN_TRAIN_STEPS])
+
+
+def _forecast_lightgbm(values, timestamps, train_end: int, origins, horizon: int, settings: dict) -> dict:
+    from models.lightgbm_model import GradientBoostingForecaster
+
+    scaler = MinMaxScaler(feature_range=(0, 1)).fit(values[:train_end].reshape(-1, 1))
+    scaled = scaler.transform(values.reshape(-1, 1)).ravel()
+
+    started = time.perf_counter()
+    forecaster = GradientBoostingForecaster(settings['lookback'], settings['forecast_horizon'], settings['use_lightgbm'],
+                                            settings.get('strategy', 'direct'))
+    forecaster.apply_params(settings['params'])
+    forecaster.fit_series(scaled[:train_end], timestamps[:train_end])
+    fit_seconds = time.perf_counter() - started
+
+    context = settings['lookback'] + settings['forecast_horizon']
+    predictions = np.empty((len(origins), horizon))
+    seconds = []
+    for row, origin in enumerate(origins):
+        started = time.perf_counter()
+        first = max(0, origin - context + 1)
+        scaled_predictions = forecaster.predict_multi_step(
+            scaled[first:origin + 1], horizon, timestamps=timestamps[first:origin + 1]
+        )
+        predictions[row] = scaler.inverse_transform(np.asarray(scaled_predictions).reshape(-1, 1)).ravel()
+        seconds.append(time.perf_counter() - started)
+    return {'predictions': predictions, 'origin_seconds': seconds, 'fit_seconds': fit_seconds}
+
+
+def _forecast_prophet(values, timestamps, train_end: int, origins, horizon: int, settings: dict) -> dict:
+    from models.prophet_model import SimpleSeasonalModel, remove_outliers
+
+    started = time.perf_counter()
+    df = remove_outliers(pd.DataFrame({'ds': pd.to_datetime(timestamps[:train_end]), 'y': values[:train_end]}))
+    model = SimpleSeasonalModel().fit(df)
+    fit_seconds = time.perf_counter() - started
+
+    offsets = (np.arange(1, horizon + 1) * settings['interval']).astype('timedelta64[s]')
+    predictions = np.empty((len(origins), horizon))
+    seconds = []
+    for row, origin in enumerate(origins):
+        started = time.perf_counter()
+        future = pd.DataFrame({'ds': pd.to_datetime(timestamps[origin] + offsets)})
+        predictions[row] = model.predict(future)['yhat'].to_numpy(dtype=float)
+        seconds.append(time.perf_counter() - started)
+    return {'predictions': predictions, 'origin_seconds': seconds, 'fit_seconds': fit_seconds}
+
+
+FORECASTERS = {'lightgbm': _forecast_lightgbm, 'prophet': _forecast_prophet}
+
+
+def _fold_job(job, arrays):
+    """Training executor job: train one fold's model and forecast from its origins"""
+    model_type, target, train_end, origins, horizon, settings = job
+    return FORECASTERS[model_type](
+        np.asarray(arrays[f'{target}:values'], dtype=float), arrays[f'{target}:timestamps'],
+        train_end, np.asarray(origins), horizon, settings
+    )
+
+
+def _round(value, digits: int = 4):
+    """JSON-safe rounding (NaN -> None)"""
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def error_report(predictions, truth, origin_seconds, fit_seconds: float) -> dict:
+    """MAE / RMSE per horizon (missing measurements ignored) plus timings of one model and target"""
+    errors = predictions - truth
+    measured = np.isfinite(errors)
+    counts = measured.sum(axis=0)
+    squared = np.where(measured, errors ** 2, 0.0).sum(axis=0)
+    absolute = np.where(measured, np.abs(errors), 0.0).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mae = absolute / counts
+        rmse = np.sqrt(squared / counts)
+    total = measured.sum()
+    origin_seconds = np.asarray(origin_seconds)
+    horizon = predictions.shape[1]
+    return {
+        'mae': [_round(v) for v in mae],
+        'rmse': [_round(v) for v in rmse],
+        'mae_overall': _round(absolute.sum() / total) if total else None,
+        'rmse_overall': _round(np.sqrt(squared.sum() / total)) if total else None,
+        'summary': {
+            str(h): {'mae': _round(mae[h - 1]), 'rmse': _round(rmse[h - 1])}
+            for h in SUMMARY_HORIZONS if h <= horizon
+        },
+        'origins': int(len(predictions)),
+        'fit_seconds': round(float(fit_seconds), 3),
+        'origin_seconds': {
+            'mean': _round(origin_seconds.mean(), 5),
+            'p95': _round(np.percentile(origin_seconds, 95), 5),
+            'max': _round(origin_seconds.max(), 5)
+        }
+    }
+
+
+def run_backtest(records, targets: list, model_types=MODEL_TYPES, horizon: int = DEFAULT_HORIZON,
+                 origins: int = DEFAULT_ORIGINS, stride: int = DEFAULT_STRIDE, folds: int = DEFAULT_FOLDS,
+                 executor: TrainingExecutor = None, progress=None) -> dict:
+    """
+    Backtest model types on the targets of a TrainingData window
+
+    LightGBM uses each target's current settings (strategy, lookback and
+    searched params, see LSTMModel.params_for); Prophet the seasonal model it trains.
+
+    Args:
+        horizon: Steps forecast from every origin (hours with the hourly grid)
+        origins: Origins per target (fewer when the history is short)
+        stride: Grid steps between consecutive origins
+        folds: Groups of consecutive origins sharing one trained model
+        progress: Optional callback(event dict) with 'event' ('fold_done'),
+            'target', 'model_type', 'origins' and 'fraction'
+
+    Returns:
+        Report dict: {'targets': {target: {model_type: error_report()}}, 'skipped': {target: reason}, ...}
+    """
+    from models.lightgbm_model import HAS_LIGHTGBM, lightgbm_model
+
+    executor = executor or training_executor
+    started = time.monotonic()
+    interval = lightgbm_model.resample_interval or RESAMPLE_INTERVAL
+
+    arrays = {}
+    truths = {}
+    jobs = []
+    skipped = {}
+    for target in targets:
+        timestamps, values = grid_series(records, target, lightgbm_model.resample_interval)
+        if len(values) <= MIN_TRAIN_STEPS + horizon:
+            skipped[target] = f"Insufficient data: {len(values)} values"
+            continue
+        seconds = timestamps.astype('datetime64[s]').astype(np.int64)
+        positions = (seconds - seconds[0]) // interval
+        chosen = select_origins(positions, horizon, origins, stride)
+        if len(chosen) == 0:
+            skipped[target] = "No origin with enough history before it"
+            continue
+
+        # What was measured h steps after each origin (NaN inside gaps)
+        grid = np.full(positions[-1] + 1, np.nan)
+        grid[positions] = values
+        truths[target] = (chosen, grid[positions[chosen][:, None] + np.arange(1, horizon + 1)])
+
+        arrays[f'{target}:values'] = np.asarray(values, dtype=float)
+        arrays[f'{target}:timestamps'] = np.asarray(timestamps, dtype='datetime64[s]')
+        lookback = lightgbm_model.lookback_for(target)
+        settings = {
+            'lightgbm': {
+                'lookback': lookback,
+                'forecast_horizon': lightgbm_model.forecast_horizon,
+                'use_lightgbm': HAS_LIGHTGBM,
+                'strategy': lightgbm_model.strategy,
+                'params': lightgbm_model.params_for(target)
+            },
+            'prophet': {'interval': interval}
+        }
+        for group in np.array_split(chosen, min(folds, len(chosen))):
+            for model_type in model_types:
+                jobs.append((model_type, target, int(group[0]) + 1, group.tolist(), horizon, settings[model_type]))
+
+    done = []
+
+    def on_result(index, result):
+        done.append(index)
+        if progress:
+            model_type, target, _, group, _, _ = jobs[index]
+            progress({
+                'event': 'fold_done',
+                'target': target,
+                'model_type': model_type,
+                'origins': len(group),
+                'success': not isinstance(result, Exception),
+                'fraction': len(done) / len(jobs)
+            })
+
+    rows = sum(len(arrays[f'{target}:values']) for _, target, _, _, _, _ in jobs)
+    results = executor.run(_fold_job, jobs, arrays, rows, on_result=on_result)
+
+    # Merge the folds of every (target, model type) in origin order
+    merged = {}
+    for (model_type, target, _, group, _, _), result in zip(jobs, results):
+        entry = merged.setdefault((target, model_type), {'predictions': [], 'origin_seconds': [], 'fit_seconds': 0.0})
+        if isinstance(result, Exception):
+            logger.error(f"Backtest {model_type}/{target} fold failed: {result}")
+            entry['predictions'].append(np.full((len(group), horizon), np.nan))
+            continue
+        entry['predictions'].append(result['predictions'])
+        entry['origin_seconds'].extend(result['origin_seconds'])
+        entry['fit_seconds'] += result['fit_seconds']
+
+    report_targets = {}
+    for (target, model_type), entry in merged.items():
+        if not entry['origin_seconds']:
+            skipped[f"{target}/{model_type}"] = "Every fold failed"
+            continue
+        _, truth = truths[target]
+        report_targets.setdefault(target, {})[model_type] = error_report(
+            np.vstack(entry['predictions']), truth, entry['origin_seconds'], entry['fit_seconds']
+        )
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Backtest of {len(report_targets)} targets x {len(model_types)} model types in {elapsed:.1f}s")
+    return {
+        'created_at': datetime.now().isoformat(),
+        'horizon': horizon,
+        'interval_seconds': interval,
+        'stride': stride,
+        'folds': folds,
+        'model_types': list(model_types),
+        'targets': report_targets,
+        'skipped': skipped,
+        'elapsed_seconds': round(elapsed, 2)
+    }
+
+
+def save_report(report: dict):
+    """Keep a report as the latest backtest"""
+    BACKTEST_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = LATEST_REPORT.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    tmp.replace(LATEST_REPORT)
+
+
+def load_report():
+    """Latest backtest report, or None"""
+    try:
+        with open(LATEST_REPORT, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
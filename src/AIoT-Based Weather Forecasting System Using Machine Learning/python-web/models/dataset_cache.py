@@ -0,0 +1,215 @@
+"""
+Dataset Cache
+Content-addressed on-disk cache for training runs. An entry is a directory
+named by the hash of everything that produced it (data fingerprint, feature
+spec, scaler, ...) holding .npy arrays - opened memory-mapped, so a cache hit
+reads pages on demand instead of rebuilding the matrix - or LightGBM binary
+Dataset files. The least recently used entries are evicted once the cache
+grows past its size bound.
+
+Hit / miss / store / eviction counters are kept in the cache directory
+(.stats.json), since the cache is used by training job workers and their pool
+processes, not by the API process that reports them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # Windows: counter updates are only serialized within one process
+    HAS_FCNTL = False
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATASET_CACHE_DIR = BASE_DIR / "models_storage" / "dataset_cache"
+
+# Size bound in MB (ML_DATASET_CACHE_MB in .env; 0 disables the cache)
+DATASET_CACHE_MB = int(os.getenv("ML_DATASET_CACHE_MB", "512") or 0)
+
+STAT_NAMES = ('hits', 'misses', 'stores', 'evictions')
+
+
+def cache_key(*parts) -> str:
+    """Content hash of JSON-serializable parts (numpy values / datetimes via str)"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:24]
+
+
+class DatasetCache:
+    """
+    Size-bounded LRU cache of array / file entries
+
+    Entries are written to a temporary directory and renamed into place, so
+    concurrent training processes never see a partial entry; a hit updates the
+    entry's mtime, which is the LRU order.
+    """
+
+    def __init__(self, directory: Path = DATASET_CACHE_DIR, max_bytes: int = DATASET_CACHE_MB * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats_file = self.directory / ".stats.json"
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _read_stats(self) -> dict:
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {}
+        return {name: int(stats.get(name, 0)) for name in STAT_NAMES}
+
+    def _count(self, name: str):
+        """Add one to a counter of the stats file (locked across processes)"""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with self.lock, open(self.directory / ".stats.lock", 'a') as lock_file:
+                if HAS_FCNTL:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                stats = self._read_stats()
+                stats[name] += 1
+                tmp = self.directory / ".stats.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f)
+                tmp.replace(self.stats_file)
+        except OSError as e:
+            logger.debug(f"Dataset cache: could not update stats: {e}")
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key
+
+    def _hit(self, key: str):
+        """Entry directory of a key (touched for LRU), or None"""
+        if not self.enabled:
+            return None
+        entry = self._entry(key)
+        if not entry.is_dir():
+            self._count('misses')
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            return None
+        self._count('hits')
+        return entry
+
+    def _publish(self, key: str, write) -> bool:
+        """Create an entry: write(tmp directory) then rename it into place"""
+        if not self.enabled:
+            return False
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f".{key}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            tmp.mkdir()
+            write(tmp)
+            try:
+                tmp.rename(self._entry(key))
+            except OSError:
+                # Another process stored the same key first - same content
+                shutil.rmtree(tmp, ignore_errors=True)
+            self._count('stores')
+        except Exception as e:
+            logger.warning(f"Dataset cache: could not store {key}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+        self.evict(keep=key)
+        return True
+
+    def load_arrays(self, key: str):
+        """{name: read-only memory-mapped array} of an entry, or None on a miss"""
+        entry = self._hit(key)
+        if entry is None:
+            return None
+        try:
+            return {path.stem: np.load(path, mmap_mode='r') for path in entry.glob('*.npy')}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dataset cache: unreadable entry {key}: {e}")
+            return None
+
+    def store_arrays(self, key: str, arrays: dict) -> bool:
+        """Store {name: array} under a key"""
+        def write(directory: Path):
+            for name, array in arrays.items():
+                np.save(directory / f"{name}.npy", np.ascontiguousarray(array))
+        return self._publish(key, write)
+
+    def file_entry(self, key: str):
+        """Directory of a file entry (e.g. LightGBM binaries), or None on a miss"""
+        return self._hit(key)
+
+    def store_files(self, key: str, write) -> bool:
+        """Store files written by write(directory) under a key"""
+        return self._publish(key, write)
+
+    def _entries(self) -> list:
+        """(mtime, bytes, path) of every complete entry"""
+        entries = []
+        if not self.directory.is_dir():
+            return entries
+        for entry in self.directory.iterdir():
+            if entry.name.startswith('.') or not entry.is_dir():
+                continue
+            try:
+                size = sum(path.stat().st_size for path in entry.iterdir())
+                entries.append((entry.stat().st_mtime, size, entry))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self, keep: str = None):
+        """Remove least recently used entries until the cache fits its size bound"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            # Open memory maps of other processes stay valid after the unlink
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            self._count('evictions')
+
+    def clear(self) -> int:
+        """Remove every entry; returns the number removed"""
+        entries = self._entries()
+        for _, _, entry in entries:
+            shutil.rmtree(entry, ignore_errors=True)
+        # Leftovers of interrupted stores
+        if self.directory.is_dir():
+            for tmp in self.directory.glob('.*.tmp'):
+                if time.time() - tmp.stat().st_mtime > 3600:
+                    shutil.rmtree(tmp, ignore_errors=True)
+        return len(entries)
+
+    def info(self) -> dict:
+        """Entries, size and hit counters (of every process using the cache)"""
+        entries = self._entries()
+        stats = self._read_stats()
+        return {
+            'enabled': self.enabled,
+            'entries': len(entries),
+            'size_mb': round(sum(size for _, size, _ in entries) / 1024 / 1024, 2),
+            'max_mb': round(self.max_bytes / 1024 / 1024, 2),
+            **stats
+        }
+
+
+# Global dataset cache instance
+dataset_cache = DatasetCache()
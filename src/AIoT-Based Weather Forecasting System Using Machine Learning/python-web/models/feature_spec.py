@@ -0,0 +1,174 @@
+"""
+Feature Specification
+Declarative definition of the gradient boosting input features. One spec is
+compiled to vectorized NumPy kernels (sliding_window_view / cumsum) for the
+training matrix and batched inference, and drives the streaming feature engine,
+so all three produce identical vectors.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Column kinds - how a column responds to an affine transform x -> a*x + b of the series
+VALUE = 0     # lags, means, min, max: a*x + b
+SPREAD = 1    # std, diffs: a*x (a > 0 for MinMaxScaler)
+FIXED = 2     # calendar: unchanged
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+
+class FeatureSpec:
+    """
+    Feature definition for one forecaster
+
+    Args:
+        lookback: Window length; lags 1..lookback (most recent first) and min/max over it
+        rolling_windows: Mean and population std over the last N values
+        diffs: Differences x[t] - x[t-k] (k < lookback)
+        calendar: Hour-of-day and day-of-week (sin/cos) of the window end
+    """
+
+    def __init__(self, lookback=24, rolling_windows=(3, 6, 12), diffs=(1, 12), calendar=True):
+        self.lookback = int(lookback)
+        self.rolling_windows = tuple(int(w) for w in rolling_windows)
+        self.diffs = tuple(int(k) for k in diffs if 0 < int(k) < lookback)
+        self.calendar = bool(calendar)
+
+    @classmethod
+    def legacy(cls, lookback=24):
+        """Features of models trained before the spec existed (no diffs, no calendar)"""
+        return cls(lookback, rolling_windows=(3, 6, 12), diffs=(), calendar=False)
+
+    def to_dict(self) -> dict:
+        return {
+            'lookback': self.lookback,
+            'rolling_windows': list(self.rolling_windows),
+            'diffs': list(self.diffs),
+            'calendar': self.calendar
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, FeatureSpec) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"FeatureSpec({self.to_dict()})"
+
+    def columns(self) -> list:
+        """(name, kind) per column, in feature-vector order"""
+        columns = [(f'lag_{lag}', VALUE) for lag in range(1, self.lookback + 1)]
+        for window in self.rolling_windows:
+            columns.append((f'rolling_mean_{window}', VALUE))
+            columns.append((f'rolling_std_{window}', SPREAD))
+        columns.append((f'rolling_min_{self.lookback}', VALUE))
+        columns.append((f'rolling_max_{self.lookback}', VALUE))
+        columns.extend((f'diff_{k}', SPREAD) for k in self.diffs)
+        if self.calendar:
+            columns.extend((name, FIXED) for name in ('hour_sin', 'hour_cos', 'dow_sin', 'dow_cos'))
+        return columns
+
+    def feature_names(self) -> list:
+        return [name for name, _ in self.columns()]
+
+    def column_kinds(self) -> np.ndarray:
+        return np.array([kind for _, kind in self.columns()])
+
+    def build(self, series, timestamps=None, ends=None) -> np.ndarray:
+        """
+        Feature rows for windows of a series in one vectorized pass
+
+        Args:
+            series: 1-D values, oldest first
+            timestamps: datetime64 per value (required when calendar is on)
+            ends: Indices of the last value of each window (default: every full window)
+
+        Returns:
+            Array (len(ends), len(columns()))
+        """
+        series = np.asarray(series, dtype=float).ravel()
+        lookback = self.lookback
+        if ends is None:
+            ends = np.arange(lookback - 1, len(series))
+        ends = np.asarray(ends, dtype=np.int64)
+
+        windows = sliding_window_view(series, lookback)[ends - lookback + 1]
+        columns = [windows[:, ::-1]]
+
+        # Prefix sums give every rolling mean in O(1) per row
+        cumsum = np.concatenate([[0.0], np.cumsum(series)])
+        for window in self.rolling_windows:
+            size = min(window, lookback)
+            columns.append(((cumsum[ends + 1] - cumsum[ends + 1 - size]) / size)[:, None])
+            if window <= lookback:
+                columns.append(windows[:, -window:].std(axis=1, keepdims=True))
+            else:
+                columns.append(np.zeros((len(ends), 1)))
+
+        columns.append(windows.min(axis=1, keepdims=True))
+        columns.append(windows.max(axis=1, keepdims=True))
+
+        for k in self.diffs:
+            columns.append((series[ends] - series[ends - k])[:, None])
+
+        if self.calendar:
+            if timestamps is None:
+                raise ValueError("Calendar features need timestamps")
+            columns.append(calendar_features(np.asarray(timestamps)[ends]))
+
+        return np.hstack(columns)
+
+    def build_chunked(self, series, timestamps=None, ends=None, chunk_rows=10000, dtype=np.float32) -> np.ndarray:
+        """
+        Same rows as build(), written chunk by chunk into one preallocated
+        matrix of `dtype`: the float64 temporaries never exceed chunk_rows
+        rows (memory-bounded training)
+        """
+        series = np.asarray(series, dtype=float).ravel()
+        if ends is None:
+            ends = np.arange(self.lookback - 1, len(series))
+        ends = np.asarray(ends, dtype=np.int64)
+
+        features = np.empty((len(ends), len(self.columns())), dtype=dtype)
+        for start in range(0, len(ends), chunk_rows):
+            features[start:start + chunk_rows] = self.build(series, timestamps, ends[start:start + chunk_rows])
+        return features
+
+    def build_row(self, window, timestamp=None) -> np.ndarray:
+        """Feature vector of a single window (at least lookback values, oldest first)"""
+        window = np.asarray(window, dtype=float).ravel()
+        timestamps = None
+        if self.calendar:
+            timestamps = np.full(len(window), to_datetime64(timestamp))
+        return self.build(window, timestamps, ends=[len(window) - 1])[0]
+
+
+def to_datetime64(value=None):
+    """datetime / string / datetime64 -> datetime64[s] (None = now)"""
+    if value is None:
+        from datetime import datetime
+        value = datetime.now()
+    return np.datetime64(value, 's')
+
+
+def calendar_features(timestamps) -> np.ndarray:
+    """Hour-of-day and day-of-week as sin/cos pairs, shape (n, 4)"""
+    seconds = np.asarray(timestamps).astype('datetime64[s]').astype(np.int64)
+    hour = (seconds % SECONDS_PER_DAY) / SECONDS_PER_HOUR
+    # 1970-01-01 was a Thursday; Monday = 0
+    dow = ((seconds // SECONDS_PER_DAY) + 3) % 7
+    hour_angle = 2 * np.pi * hour / 24
+    dow_angle = 2 * np.pi * dow / 7
+    return np.column_stack([np.sin(hour_angle), np.cos(hour_angle), np.sin(dow_angle), np.cos(dow_angle)])
+
+
+def regular_timestamps(last, count: int, interval_seconds: float):
+    """count timestamps on a regular grid ending at `last`"""
+    last = to_datetime64(last)
+    offsets = (np.arange(count - 1, -1, -1) * float(interval_seconds)).astype(np.int64)
+    return last - offsets.astype('timedelta64[s]')
+
+
+def spec_for(forecaster) -> FeatureSpec:
+    """Spec stored with a forecaster (legacy spec for models pickled before specs existed)"""
+    spec = getattr(forecaster, 'feature_spec', None)
+    return spec if spec is not None else FeatureSpec.legacy(forecaster.lookback)
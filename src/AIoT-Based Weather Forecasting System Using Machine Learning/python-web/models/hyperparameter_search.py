@@ -0,0 +1,275 @@
+"""
+Hyperparameter Search
+Random search or successive halving over the gradient boosting settings
+(num_leaves, learning_rate, lookback, boosting rounds). A configuration is
+scored by rolling-origin cross-validation: every fold trains on the series up
+to an origin and is evaluated on the windows right after it, for a short and a
+long forecast step. Trials run on the training executor's process pool within
+a wall-clock budget; the best configuration per target is saved and applied by
+every later LightGBM training run of that target (LSTMModel.params_for).
+"""
+
+import itertools
+import json
+import logging
+import math
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import TimeSeriesSplit
+
+from models.feature_spec import spec_for
+from models.training_executor import TrainingExecutor, training_executor
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BEST_PARAMS_FILE = BASE_DIR / "models_storage" / "lightgbm" / "best_params.json"
+
+# Candidate values per hyperparameter (n_estimators = boosting rounds)
+SEARCH_SPACE = {
+    'num_leaves': [15, 31, 63],
+    'learning_rate': [0.02, 0.05, 0.1],
+    'lookback': [12, 24, 48],
+    'n_estimators': [100, 200, 400]
+}
+
+# Settings of an untuned model; always evaluated so the best config never scores worse
+DEFAULT_CONFIG = {'num_leaves': 31, 'learning_rate': 0.05, 'lookback': 24, 'n_estimators': 100}
+
+METHODS = ('random', 'halving')
+
+# Rolling-origin folds and the forecast steps scored in each
+CV_FOLDS = 3
+CV_STEPS = (1, 24)
+
+# Successive halving: rounds of the first rung, and the factor configs are cut
+# by (and rounds grown by) from rung to rung
+HALVING_MIN_ROUNDS = 25
+HALVING_ETA = 3
+
+DEFAULT_TRIALS = 12
+DEFAULT_BUDGET_SECONDS = 600
+
+
+def load_best_params() -> dict:
+    """{target: {'params', 'score', 'method', ...}} of the saved searches"""
+    try:
+        with open(BEST_PARAMS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_best_params(best: dict):
+    BEST_PARAMS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = BEST_PARAMS_FILE.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(best, f, indent=2)
+    tmp.replace(BEST_PARAMS_FILE)
+
+
+def save_best_params(target: str, entry: dict):
+    """Store the search result of one target"""
+    best = load_best_params()
+    best[target] = entry
+    _write_best_params(best)
+
+
+def clear_best_params(target: str = None) -> int:
+    """Forget the tuned config of one target (None = all); returns the number removed"""
+    best = load_best_params()
+    removed = [t for t in best if target is None or t == target]
+    for t in removed:
+        del best[t]
+    _write_best_params(best)
+    return len(removed)
+
+
+def sample_configs(trials: int, seed: int = None) -> list:
+    """DEFAULT_CONFIG plus up to trials - 1 distinct random configs of SEARCH_SPACE"""
+    names = list(SEARCH_SPACE)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(SEARCH_SPACE[name] for name in names))]
+    grid = [config for config in grid if config != DEFAULT_CONFIG]
+    rng = random.Random(seed)
+    return [dict(DEFAULT_CONFIG)] + rng.sample(grid, min(len(grid), max(0, trials - 1)))
+
+
+def rolling_origin_folds(length: int, folds: int = CV_FOLDS) -> list:
+    """
+    (train_end, test_end) series indices of expanding-window folds: train on
+    [0, train_end), evaluate on windows whose targets fall in [train_end, test_end)
+    """
+    min_train = max(SEARCH_SPACE['lookback']) + max(CV_STEPS) + 20
+    splits = TimeSeriesSplit(n_splits=folds).split(np.arange(length))
+    return [(int(train[-1]) + 1, int(test[-1]) + 1) for train, test in splits if len(train) >= min_train]
+
+
+def evaluate_config(series, timestamps, config: dict, rounds: int, folds: list, num_threads: int = None,
+                    strategy: str = 'direct') -> dict:
+    """
+    Mean MAE (normalized units) of a config over the folds and CV_STEPS
+
+    Args:
+        strategy: Multi-step strategy of the forecaster ('horizon': one model
+            per fold scored at every CV step)
+
+    Returns:
+        {'score', 'seconds'}
+    """
+    from models.lightgbm_model import GradientBoostingForecaster
+
+    started = time.perf_counter()
+    lookback = int(config['lookback'])
+    forecaster = GradientBoostingForecaster(lookback=lookback, forecast_horizon=max(CV_STEPS), strategy=strategy)
+    forecaster.apply_params({**config, 'n_estimators': rounds})
+
+    series = np.asarray(series, dtype=float)
+    # Windows only look back, so one matrix over the whole series serves every fold
+    features = spec_for(forecaster).build(series, forecaster._timestamps_for(len(series), timestamps))
+
+    errors = []
+    for train_end, test_end in folds:
+        if forecaster.uses_horizon_feature:
+            horizon_model = forecaster.fit_step(features[:train_end - lookback + 1], series[:train_end],
+                                                forecaster.HORIZON_STEP, num_threads)
+        for step in CV_STEPS:
+            if forecaster.uses_horizon_feature:
+                model = horizon_model
+            else:
+                model = forecaster.fit_step(features[:train_end - lookback + 1], series[:train_end], step, num_threads)
+            # Held-out windows end at train_end - 1 or later, targets before test_end
+            ends = np.arange(train_end - 1, test_end - step)
+            if model is None or len(ends) == 0:
+                continue
+            rows = features[ends - lookback + 1]
+            if forecaster.uses_horizon_feature:
+                rows = forecaster.horizon_rows(rows, step)
+            predictions = np.clip(np.asarray(model.predict(rows)), 0, 1)
+            errors.append(mean_absolute_error(series[ends + step], predictions))
+
+    if not errors:
+        raise ValueError("Not enough data for any cross-validation fold")
+    return {'score': float(np.mean(errors)), 'seconds': round(time.perf_counter() - started, 2)}
+
+
+def _trial_job(job, arrays):
+    """Training executor job: cross-validate one config on the shared series"""
+    config, rounds, folds, num_threads, strategy = job
+    return evaluate_config(arrays['series'], arrays.get('timestamps'), config, rounds, folds, num_threads, strategy)
+
+
+def search_target(target: str, series, timestamps=None, method: str = 'halving', trials: int = DEFAULT_TRIALS,
+                  budget_seconds: float = DEFAULT_BUDGET_SECONDS, executor: TrainingExecutor = None,
+                  progress=None, seed: int = None, strategy: str = 'direct') -> dict:
+    """
+    Search the best config of one target
+
+    Args:
+        series: Normalized training series, oldest first (LSTMModel.prepare_series)
+        timestamps: datetime64 per value (calendar features)
+        method: 'random' (every sampled config with its own rounds) or 'halving'
+            (all configs at HALVING_MIN_ROUNDS, the best 1/HALVING_ETA continue
+            with HALVING_ETA times the rounds, up to the largest n_estimators)
+        trials: Configs sampled (including DEFAULT_CONFIG)
+        budget_seconds: Wall-clock budget; trials not started by then are skipped
+        progress: Optional callback(event dict) with 'event' ('trial_done'),
+            'target', 'config', 'rounds', 'score' (None if failed) and 'fraction'
+        strategy: Multi-step strategy the configs are scored with (LSTMModel.strategy)
+
+    Returns:
+        {'target', 'method', 'strategy', 'best': {'params', 'score'} or None, 'trials': [...],
+         'elapsed_seconds', 'budget_exhausted'}
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown search method: {method}")
+    executor = executor or training_executor
+    started = time.monotonic()
+    deadline = started + budget_seconds
+
+    folds = rolling_origin_folds(len(series))
+    if not folds:
+        raise ValueError(f"Not enough data to cross-validate {target}: {len(series)} values")
+
+    arrays = {'series': np.ascontiguousarray(series, dtype=float)}
+    if timestamps is not None:
+        arrays['timestamps'] = np.asarray(timestamps, dtype='datetime64[s]')
+
+    configs = sample_configs(trials, seed)
+    max_rounds = max(SEARCH_SPACE['n_estimators'])
+    if method == 'random':
+        rungs = [[(config, config['n_estimators']) for config in configs]]
+    else:
+        rungs = [[(config, HALVING_MIN_ROUNDS) for config in configs]]
+    # Trials planned in total (progress fraction)
+    planned = len(configs)
+    if method == 'halving':
+        n, rounds = len(configs), HALVING_MIN_ROUNDS
+        while n > 1 and rounds < max_rounds:
+            n, rounds = math.ceil(n / HALVING_ETA), min(max_rounds, rounds * HALVING_ETA)
+            planned += n
+
+    history = []
+    best = None
+    exhausted = False
+    while rungs:
+        rung = rungs.pop()
+        num_threads = executor.threads_per_job(len(rung), len(series) * len(folds) * len(rung))
+
+        def on_result(index, result):
+            config, rounds = rung[index]
+            trial = {'config': config, 'rounds': rounds}
+            if isinstance(result, Exception):
+                trial['error'] = str(result)
+            else:
+                trial.update(result)
+            history.append(trial)
+            if progress:
+                progress({
+                    'event': 'trial_done',
+                    'target': target,
+                    'config': {**config, 'n_estimators': rounds},
+                    'rounds': rounds,
+                    'score': trial.get('score'),
+                    'fraction': min(1.0, len(history) / planned)
+                })
+
+        results = executor.run(
+            _trial_job,
+            [(config, rounds, folds, num_threads, strategy) for config, rounds in rung],
+            arrays,
+            len(series) * len(folds) * len(rung),
+            on_result=on_result,
+            deadline=deadline
+        )
+        scored = sorted(
+            ((result['score'], config, rounds) for (config, rounds), result in zip(rung, results)
+             if not isinstance(result, Exception)),
+            key=lambda item: item[0]
+        )
+        exhausted = any(isinstance(result, TimeoutError) for result in results)
+        if scored:
+            # Halving: a later rung (more rounds) supersedes the earlier ones
+            score, config, rounds = scored[0]
+            best = {'params': {**config, 'n_estimators': rounds}, 'score': round(score, 6)}
+
+        rounds = rung[0][1]
+        if method == 'halving' and not exhausted and len(scored) > 1 and rounds < max_rounds:
+            survivors = scored[:math.ceil(len(scored) / HALVING_ETA)]
+            next_rounds = min(max_rounds, rounds * HALVING_ETA)
+            rungs.append([(config, next_rounds) for _, config, _ in survivors])
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Hyperparameter search {target} ({method}): {len(history)} trials in {elapsed:.1f}s, best={best}")
+    return {
+        'target': target,
+        'method': method,
+        'strategy': strategy,
+        'best': best,
+        'trials': history,
+        'elapsed_seconds': round(elapsed, 2),
+        'budget_exhausted': exhausted
+    }
@@ -1,19 +1,32 @@
 """
 LightGBM/XGBoost Model for Weather Forecasting
 Gradient Boosting based time series prediction using Direct Multi-Step Forecasting
+(one booster per forecast step) or a single booster with the horizon as a feature
 """
 
+import copy
 import logging
+import os
 import pickle
 import numpy as np
-import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from pathlib import Path
 from datetime import datetime, timedelta
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import TimeSeriesSplit
 from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
 
+from models.feature_spec import SECONDS_PER_DAY, FeatureSpec, regular_timestamps, spec_for
+from models.streaming_features import StreamingFeatureState
+from models.resampling import RESAMPLE_INTERVAL, aggregation_for, resample
+from models.training_data import data_fingerprint, target_series
+from models.training_executor import TrainingExecutor, training_executor
+from models.dataset_cache import cache_key, dataset_cache
+from models.hyperparameter_search import load_best_params
+from models.memory_budget import (
+    FEATURE_CHUNK_ROWS, MEMORY_BUDGET_MB, memory_bounded, peak_rss_mb, release, rows_within_budget
+)
+
 try:
     import lightgbm as lgb
     HAS_LIGHTGBM = True
@@ -128,23 +141,68 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MODELS_DIR = BASE_DIR / "models_storage" / "lightgbm"
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Share of a train_targets() run reported for preparing the series / fitting the step models
+# (the rest is evaluation)
+PREPARE_PROGRESS = 0.1
+FIT_PROGRESS = 0.8
+
+# Incremental training: boosting rounds added per warm start, and when a target
+# is rebuilt from scratch instead (model age / number of warm starts since then)
+WARM_START_ROUNDS = 20
+FULL_REBUILD_DAYS = 7
+MAX_WARM_STARTS = 14
+
+# Multi-step strategy of newly trained forecasters: 'direct' (one booster per step
+# in GradientBoostingForecaster.STEPS) or 'horizon' (one booster per target trained
+# on every horizon 1..forecast_horizon, with the horizon as a feature)
+STRATEGIES = ('direct', 'horizon')
+FORECAST_STRATEGY = os.getenv("ML_FORECAST_STRATEGY", "direct")
+
+# Global model: the targets of a training run share their boosters (target id as
+# a categorical feature) instead of each target training its own
+GLOBAL_MODEL = os.getenv("ML_GLOBAL_MODEL", "false").lower() in ('1', 'true', 'yes')
+
 
 class GradientBoostingForecaster:
     """
     Direct Multi-Step Forecasting using LightGBM/XGBoost
     
     Direct strategy: Train separate model for each forecast horizon
+    Horizon strategy: Train one model on every horizon 1..forecast_horizon,
+    the horizon being an extra feature column
     """
     
-    def __init__(self, lookback=24, forecast_horizon=24, use_lightgbm=True):
+    def __init__(self, lookback=24, forecast_horizon=24, use_lightgbm=True, strategy='direct'):
         self.lookback = lookback
         self.forecast_horizon = forecast_horizon
         self.use_lightgbm = use_lightgbm and HAS_LIGHTGBM
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown forecast strategy: {strategy}")
+        self.strategy = strategy
         
-        # Models for each step (direct multi-step)
+        # Models for each step (direct multi-step); the horizon strategy keeps
+        # its single model under HORIZON_STEP
         self.models = {}  # {step: model}
+        # Category of this forecaster's target in a global model, whose step
+        # models are shared by several targets (None = models of its own)
+        self.target_id = None
         self.trained = False
         self.last_values = None
+        self.last_timestamps = None
+        
+        # Input features; stored with the pickled model so inference rebuilds the same columns
+        self.feature_spec = FeatureSpec(lookback)
+        # Seconds between samples (median spacing of the training series)
+        self.sample_interval = 3600
+        
+        # Training watermark (timestamp of the last training target) and
+        # warm start bookkeeping for incremental retraining
+        self.trained_until = None
+        self.full_trained_at = None
+        self.warm_starts = 0
+        
+        # Hyperparameters set from a search (see apply_params); empty = defaults below
+        self.tuned_params = {}
         
         # Model parameters
         self.lgb_params = {
@@ -173,70 +231,51 @@ class GradientBoostingForecaster:
             'verbosity': 0
         }
     
-    def _create_features(self, data):
-        """Create lag features and time-based features"""
-        df = pd.DataFrame({'value': data})
-        
-        # Lag features
-        for lag in range(1, self.lookback + 1):
-            df[f'lag_{lag}'] = df['value'].shift(lag)
-        
-        # Rolling statistics
-        for window in [3, 6, 12, 24]:
-            if window <= self.lookback:
-                df[f'rolling_mean_{window}'] = df['value'].shift(1).rolling(window=window).mean()
-                df[f'rolling_std_{window}'] = df['value'].shift(1).rolling(window=window).std()
-                df[f'rolling_min_{window}'] = df['value'].shift(1).rolling(window=window).min()
-                df[f'rolling_max_{window}'] = df['value'].shift(1).rolling(window=window).max()
-        
-        # Difference features (trend)
-        df['diff_1'] = df['value'].diff(1)
-        df['diff_24'] = df['value'].diff(24) if len(df) > 24 else 0
-        
-        return df
+    def apply_params(self, params: dict):
+        """
+        Override the boosting parameters with a searched config (num_leaves,
+        learning_rate, n_estimators; lookback is fixed at construction)
+        """
+        self.tuned_params = dict(params)
+        for key in ('num_leaves', 'learning_rate', 'n_estimators'):
+            if key in params:
+                self.lgb_params[key] = params[key]
+        if 'learning_rate' in params:
+            self.xgb_params['learning_rate'] = params['learning_rate']
+        if 'n_estimators' in params:
+            self.xgb_params['n_estimators'] = params['n_estimators']
+        if 'num_leaves' in params:
+            self.xgb_params['max_leaves'] = params['num_leaves']
     
-    def _prepare_direct_data(self, scaled_values, step):
+    def _timestamps_for(self, length: int, timestamps=None):
+        """
+        Timestamps for a series of `length` values (None when the spec has no
+        calendar features); missing timestamps are synthesized on the sampling
+        grid ending now
+        """
+        if not spec_for(self).calendar:
+            return None
+        if timestamps is not None:
+            return np.asarray(timestamps, dtype='datetime64[s]')
+        return regular_timestamps(None, length, getattr(self, 'sample_interval', 3600))
+    
+    def _prepare_direct_data(self, features, series, step):
         """
         Prepare data for direct multi-step forecasting
         
         Args:
-            scaled_values: Normalized time series data
+            features: Feature rows of every full window of the series (FeatureSpec.build)
+            series: Normalized time series data
             step: Forecast horizon (1 = 1 hour ahead, 24 = 24 hours ahead)
         
         Returns:
             X, y arrays for training
         """
-        X, y = [], []
-        for i in range(self.lookback + step, len(scaled_values) + 1):
-            features = []
-            # Raw lag values
-            for lag in range(1, self.lookback + 1):
-                idx = i - step - lag
-                if idx >= 0:
-                    features.append(scaled_values[idx])
-                else:
-                    features.append(0)
-            # Rolling features (mean, std, min, max)
-            window_data = scaled_values[max(0, i - step - self.lookback):i - step]
-            if len(window_data) > 0:
-                features.extend([
-                    np.mean(window_data[-3:]) if len(window_data) >= 3 else np.mean(window_data),
-                    np.std(window_data[-3:]) if len(window_data) >= 3 else 0,
-                    np.mean(window_data[-6:]) if len(window_data) >= 6 else np.mean(window_data),
-                    np.std(window_data[-6:]) if len(window_data) >= 6 else 0,
-                    np.mean(window_data[-12:]) if len(window_data) >= 12 else np.mean(window_data),
-                    np.std(window_data[-12:]) if len(window_data) >= 12 else 0,
-                    np.min(window_data),
-                    np.max(window_data),
-                ])
-            else:
-                features.extend([0] * 8)
-            X.append(features)
-            # Target: value at step hours ahead
-            target_idx = i - 1
-            if target_idx < len(scaled_values):
-                y.append(scaled_values[target_idx])
-        return np.array(X), np.array(y)
+        # Row i is the window ending at lookback-1+i; its target is `step` values later
+        n_rows = len(series) - self.lookback - step + 1
+        if n_rows <= 0:
+            return features[:0], series[:0]
+        return features[:n_rows], series[self.lookback - 1 + step:]
     
     def fit(self, X_sequences, y_values, epochs=None, learning_rate=None):
         """
@@ -246,12 +285,6 @@ class GradientBoostingForecaster:
             X_sequences: Input sequences (from prepare_data)
             y_values: Target values
         """
-        self.trained = True
-        
-        # Store last sequence for prediction
-        if len(X_sequences) > 0:
-            self.last_values = X_sequences[-1].flatten()
-        
         # Reconstruct full time series from sequences
         all_values = []
         for seq in X_sequences:
@@ -263,153 +296,518 @@ class GradientBoostingForecaster:
         
         # Add target values
         full_series = np.concatenate([all_values[:self.lookback], y_values])
+        self.fit_series(full_series)
+    
+    # Forecast steps (hours ahead) that get their own model
+    STEPS = (1, 3, 6, 12, 24)
+    # Key of the single model of the horizon strategy (in models and train jobs)
+    HORIZON_STEP = 0
+    
+    @property
+    def uses_horizon_feature(self) -> bool:
+        # Forecasters pickled before strategies existed are direct
+        return getattr(self, 'strategy', 'direct') == 'horizon'
+    
+    def steps_to_train(self) -> list:
+        """Trained steps for this forecast horizon"""
+        if self.uses_horizon_feature:
+            return [self.HORIZON_STEP]
+        return [step for step in self.STEPS if step <= self.forecast_horizon]
+    
+    def feature_names(self) -> list:
+        spec = spec_for(self)
+        names = spec.feature_names()
+        if getattr(self, 'target_id', None) is not None:
+            names.append('target_id')
+        if self.uses_horizon_feature:
+            names.append('horizon')
+            if spec.calendar:
+                names.extend(['target_hour_sin', 'target_hour_cos'])
+        return names
+    
+    def _fill_horizon_columns(self, rows, n_features: int, horizons):
+        """
+        Write the horizon columns after the first n_features of each row: the
+        horizon (steps ahead) and, with calendar features, hour-of-day sin/cos
+        of the forecast time - the window end's hour angle rotated by
+        horizon * sample_interval, so one model sees when each horizon lands
+        """
+        horizons = np.broadcast_to(np.asarray(horizons, dtype=float), (len(rows),))
+        rows[:, n_features] = horizons
+        spec = spec_for(self)
+        if spec.calendar:
+            names = spec.feature_names()
+            hour_sin, hour_cos = rows[:, names.index('hour_sin')], rows[:, names.index('hour_cos')]
+            shift = 2 * np.pi * horizons * getattr(self, 'sample_interval', 3600) / SECONDS_PER_DAY
+            rows[:, n_features + 1] = hour_sin * np.cos(shift) + hour_cos * np.sin(shift)
+            rows[:, n_features + 2] = hour_cos * np.cos(shift) - hour_sin * np.sin(shift)
+    
+    def with_target_id(self, features):
+        """Feature rows plus the target id column of a global model (unchanged otherwise)"""
+        target_id = getattr(self, 'target_id', None)
+        if target_id is None:
+            return features
+        rows = np.empty((len(features), features.shape[1] + 1), dtype=features.dtype)
+        rows[:, :-1] = features
+        rows[:, -1] = target_id
+        return rows
+    
+    def horizon_rows(self, features, horizons):
+        """Feature rows of the horizon strategy's model (one horizon per row or one for all)"""
+        rows = np.empty((len(features), len(self.feature_names())), dtype=features.dtype)
+        rows[:, :features.shape[1]] = features
+        self._fill_horizon_columns(rows, features.shape[1], horizons)
+        return rows
+    
+    def _prepare_horizon_data(self, features, series, first_target=None):
+        """
+        Prepare data for the horizon strategy: every window once per horizon
+        1..forecast_horizon whose target lies inside the series, followed by
+        the horizon columns (see horizon_rows). Rows are ordered by window end,
+        so the validation split still holds the most recent windows.
         
-        # Train model for selected forecast steps (1, 3, 6, 12, 24 hours)
-        steps_to_train = [1, 3, 6, 12, 24]
+        Args:
+            first_target: Keep only rows whose target is at or after this series
+                index (warm start)
         
-        for step in steps_to_train:
-            if step > self.forecast_horizon:
-                continue
-                
-            X_train, y_train = self._prepare_direct_data(full_series, step)
-            
-            if len(X_train) < 10:
-                logger.warning(f"Insufficient data for step {step}")
-                continue
-            
-            # Split for validation
-            split_idx = int(len(X_train) * 0.8)
+        Returns:
+            X, y arrays for training
+        """
+        n_windows = len(series) - self.lookback
+        if n_windows <= 0:
+            return self.horizon_rows(features[:0], 1), series[:0]
+        window, horizon = np.divmod(np.arange(n_windows * self.forecast_horizon), self.forecast_horizon)
+        horizon += 1
+        target = window + self.lookback - 1 + horizon
+        keep = target < len(series)
+        if first_target is not None:
+            keep &= target >= first_target
+        window, horizon, target = window[keep], horizon[keep], target[keep]
+        
+        # Filled in place: the stacked matrix is forecast_horizon times the window matrix
+        n_features = features.shape[1]
+        X = np.empty((len(window), len(self.feature_names())), dtype=features.dtype)
+        np.take(features, window, axis=0, out=X[:, :n_features], mode='clip')
+        self._fill_horizon_columns(X, n_features, horizon)
+        return X, series[target]
+    
+    def can_predict(self, step: int) -> bool:
+        """Whether a trained model forecasts exactly `step` values ahead"""
+        if self.uses_horizon_feature:
+            return self.HORIZON_STEP in self.models and 1 <= step <= self.forecast_horizon
+        return step in self.models
+    
+    def predict_step(self, features, step):
+        """
+        Forecasts `step` values after the windows of the feature rows (one step
+        per row is allowed for the horizon strategy)
+        """
+        return self.predict_rows(self.with_target_id(features), step)
+    
+    def predict_rows(self, rows, step):
+        """predict_step for rows that already carry the target id column"""
+        if self.uses_horizon_feature:
+            return np.asarray(self.models[self.HORIZON_STEP].predict(self.horizon_rows(rows, step)))
+        return np.asarray(self.models[step].predict(rows))
+    
+    def prepare_fit(self, series, timestamps=None, features=None, chunk_rows=None):
+        """
+        Build the feature matrix of a series once and store the prediction
+        context; step models are then fitted from it with fit_step
+        
+        Args:
+            series: Normalized values, oldest first (float32 stays float32)
+            timestamps: datetime64 per value (synthesized hourly if missing)
+            features: Feature matrix of this series built earlier (dataset cache)
+            chunk_rows: Build the matrix in chunks of this many rows, in the
+                dtype of the series (memory-bounded training)
+        
+        Returns:
+            (features, series) arrays
+        """
+        self.trained = True
+        series = np.asarray(series).ravel()
+        if series.dtype not in (np.float32, np.float64):
+            series = series.astype(float)
+        
+        if timestamps is not None and len(timestamps) > 1:
+            deltas = np.diff(np.asarray(timestamps, dtype='datetime64[s]')).astype(np.int64)
+            self.sample_interval = float(np.median(deltas)) or 3600
+        timestamps = self._timestamps_for(len(series), timestamps)
+        
+        # Store the tail of the series as prediction context (see predict_multi_step)
+        context = self.lookback + self.forecast_horizon
+        self.last_values = series[-context:]
+        self.last_timestamps = timestamps[-context:] if timestamps is not None else None
+        
+        if features is None and chunk_rows:
+            features = spec_for(self).build_chunked(series, timestamps, chunk_rows=chunk_rows, dtype=series.dtype)
+        elif features is None:
+            features = spec_for(self).build(series, timestamps)
+        return features, series
+    
+    def training_rows(self, features, series, step, first_target=None):
+        """
+        Training rows (X, y) of one step model from a series' feature matrix
+        (with the target id column of a global model)
+        
+        Args:
+            first_target: Keep only the windows whose target is at or after
+                this series index (warm start)
+        """
+        features = self.with_target_id(features)
+        if step == self.HORIZON_STEP:
+            return self._prepare_horizon_data(features, series, first_target)
+        X_train, y_train = self._prepare_direct_data(features, series, step)
+        if first_target is not None:
+            start = max(0, first_target - (self.lookback - 1) - step)
+            X_train, y_train = X_train[start:], y_train[start:]
+        return X_train, y_train
+    
+    def fit_step(self, features, series, step, num_threads=None, first_target=None, dataset_key=None):
+        """
+        Train the model for one forecast step (does not modify self, so it
+        can run in a worker process)
+        
+        Args:
+            first_target: Warm start - continue the existing step model with only
+                the windows whose target is at or after this series index
+            dataset_key: Cache key of the feature matrix; the step's LightGBM
+                binary Datasets are cached under it (full builds only)
+        
+        Returns:
+            Fitted model (the existing one if a warm start has no new windows),
+            or None if there is too little data for this step
+        """
+        init_model = self.models.get(step) if first_target is not None else None
+        parts = [self.training_rows(features, series, step, first_target)]
+        return self.fit_rows(parts, step, num_threads, init_model, dataset_key)
+    
+    def fit_rows(self, parts, step, num_threads=None, init_model=None, dataset_key=None):
+        """
+        Train one step model on (X, y) parts - one per series, several for a
+        global model; the most recent 20% of every part validates
+        
+        Returns:
+            Fitted model, init_model if there are no rows, or None if there is
+            too little data for this step
+        """
+        if sum(len(X) for X, _ in parts) < 10:
+            if init_model is not None:
+                return init_model
+            logger.warning(f"Insufficient data for step {step}")
+            return None
+        
+        # Split for validation
+        splits = [int(len(X) * 0.8) for X, _ in parts]
+        if len(parts) == 1:
+            (X_train, y_train), split_idx = parts[0], splits[0]
             X_tr, X_val = X_train[:split_idx], X_train[split_idx:]
             y_tr, y_val = y_train[:split_idx], y_train[split_idx:]
+        else:
+            X_tr = np.concatenate([X[:split] for (X, _), split in zip(parts, splits)])
+            X_val = np.concatenate([X[split:] for (X, _), split in zip(parts, splits)])
+            y_tr = np.concatenate([y[:split] for (_, y), split in zip(parts, splits)])
+            y_val = np.concatenate([y[split:] for (_, y), split in zip(parts, splits)])
+        # Target ids are categories, not magnitudes
+        categorical = ['target_id'] if getattr(self, 'target_id', None) is not None else 'auto'
+        
+        if self.use_lightgbm and HAS_LIGHTGBM:
+            # LightGBM training
+            params = dict(self.lgb_params)
+            if num_threads:
+                params['num_threads'] = num_threads
+            if init_model is not None:
+                params['n_estimators'] = WARM_START_ROUNDS
             
-            if self.use_lightgbm and HAS_LIGHTGBM:
-                # LightGBM training
-                train_data = lgb.Dataset(X_tr, label=y_tr)
-                val_data = lgb.Dataset(X_val, label=y_val, reference=train_data)
-                
-                model = lgb.train(
-                    self.lgb_params,
-                    train_data,
-                    valid_sets=[val_data],
-                    num_boost_round=100
-                )
-            elif HAS_XGBOOST:
-                # XGBoost training
-                model = xgb.XGBRegressor(**self.xgb_params)
-                model.fit(
-                    X_tr, y_tr,
-                    eval_set=[(X_val, y_val)],
-                    verbose=False
-                )
+            # Binned Datasets of a full build are cached; a warm start's carry the
+            # old model's predictions as init scores, so they are never reused
+            binary_key = None
+            if dataset_key and init_model is None and dataset_cache.enabled:
+                binary_key = cache_key('lgb-dataset', dataset_key, step, lgb.__version__,
+                                       self.forecast_horizon if step == self.HORIZON_STEP else None)
+            cached = dataset_cache.file_entry(binary_key) if binary_key else None
+            if cached is not None:
+                train_data = lgb.Dataset(str(cached / 'train.bin'))
+                val_data = lgb.Dataset(str(cached / 'valid.bin'), reference=train_data)
             else:
-                # Fallback to sklearn GradientBoostingRegressor
-                model = GradientBoostingRegressor(
-                    n_estimators=100,
-                    learning_rate=0.05,
-                    max_depth=6,
-                    subsample=0.8,
-                    random_state=42
-                )
-                model.fit(X_tr, y_tr)
+                # free_raw_data: only the binned copy stays alive once the Dataset is constructed
+                train_data = lgb.Dataset(X_tr, label=y_tr, feature_name=self.feature_names(),
+                                         categorical_feature=categorical, free_raw_data=True)
+                val_data = lgb.Dataset(X_val, label=y_val, reference=train_data, free_raw_data=True)
             
-            self.models[step] = model
-            logger.debug(f"Trained model for step {step}")
+            model = lgb.train(
+                params,
+                train_data,
+                valid_sets=[val_data],
+                num_boost_round=params['n_estimators'],
+                init_model=init_model
+            )
+            
+            if binary_key and cached is None:
+                def write(directory):
+                    train_data.save_binary(str(directory / 'train.bin'))
+                    val_data.save_binary(str(directory / 'valid.bin'))
+                dataset_cache.store_files(binary_key, write)
+        elif HAS_XGBOOST:
+            # XGBoost training
+            params = dict(self.xgb_params)
+            if num_threads:
+                params['n_jobs'] = num_threads
+            if init_model is not None:
+                params['n_estimators'] = WARM_START_ROUNDS
+            model = xgb.XGBRegressor(**params)
+            model.fit(
+                X_tr, y_tr,
+                eval_set=[(X_val, y_val)],
+                verbose=False,
+                xgb_model=init_model.get_booster() if init_model is not None else None
+            )
+        else:
+            # Fallback to sklearn GradientBoostingRegressor
+            model = GradientBoostingRegressor(
+                n_estimators=100,
+                learning_rate=0.05,
+                max_depth=6,
+                subsample=0.8,
+                random_state=42
+            )
+            model.fit(X_tr, y_tr)
+        
+        logger.debug(f"Trained model for step {step}")
+        return model
+    
+    def set_step_models(self, step_models: dict):
+        """Install fitted step models (in step order, skipping failed ones)"""
+        self.models = {step: step_models[step] for step in sorted(step_models) if step_models[step] is not None}
+        if self.uses_horizon_feature:
+            logger.info(f"Trained {len(self.models)} model for horizons 1..{self.forecast_horizon}")
+        else:
+            logger.info(f"Trained {len(self.models)} direct models for steps: {list(self.models.keys())}")
+    
+    def fit_series(self, series, timestamps=None):
+        """
+        Train direct multi-step models on a whole series (in this process)
+        
+        The feature matrix is built once for every window of the series; each
+        step model then trains on a prefix of it against a shifted target (the
+        horizon strategy's model on its rows stacked per horizon).
         
-        logger.info(f"Trained {len(self.models)} direct models for steps: {list(self.models.keys())}")
+        Args:
+            series: Normalized values, oldest first
+            timestamps: datetime64 per value (synthesized hourly if missing)
+        """
+        features, series = self.prepare_fit(series, timestamps)
+        self.set_step_models({step: self.fit_step(features, series, step) for step in self.steps_to_train()})
     
     def predict(self, X_sequences):
         """
         Make predictions for all sequences (for evaluation)
         Returns 1-step ahead predictions
         """
-        predictions = []
+        X_sequences = np.asarray(X_sequences, dtype=float).reshape(-1, self.lookback)
         
-        for seq in X_sequences:
-            # Use step 1 model for single predictions
-            if 1 in self.models:
-                features = self._create_features_from_sequence(seq)
-                if self.use_lightgbm:
-                    pred = self.models[1].predict([features])[0]
-                else:
-                    pred = self.models[1].predict([features])[0]
-                predictions.append(pred)
-            else:
-                predictions.append(seq[-1])  # Fallback to last value
+        # Use step 1 model for single predictions
+        if self.can_predict(1):
+            spec = spec_for(self)
+            features = np.vstack([spec.build_row(window) for window in X_sequences])
+            return self.predict_step(features, 1)
+        return X_sequences[:, -1].copy()  # Fallback to last value
+    
+    def predict_series(self, series, timestamps=None, ends=None, chunk_rows=None):
+        """
+        1-step ahead predictions for windows of a series (for evaluation)
+        
+        Args:
+            series: Normalized values, oldest first
+            timestamps: datetime64 per value
+            ends: Index of the last value of each window (default: every full window)
+            chunk_rows: Build and predict the feature rows this many at a time
+        """
+        series = np.asarray(series, dtype=float).ravel()
+        if ends is None:
+            ends = np.arange(self.lookback - 1, len(series))
+        ends = np.asarray(ends)
         
-        return np.array(predictions)
+        if self.can_predict(1):
+            spec = spec_for(self)
+            timestamps = self._timestamps_for(len(series), timestamps)
+            chunk_rows = chunk_rows or max(1, len(ends))
+            predictions = [self.predict_step(spec.build(series, timestamps, ends[start:start + chunk_rows]), 1)
+                           for start in range(0, len(ends), chunk_rows)]
+            return np.concatenate(predictions) if predictions else np.array([])
+        return series[ends].copy()  # Fallback to last value
     
-    def _create_features_from_sequence(self, sequence):
+    def _create_features_from_sequence(self, sequence, timestamp=None):
         """Create feature vector from a sequence (must match _prepare_direct_data)"""
-        seq = np.array(sequence).flatten()
-        features = list(seq[-self.lookback:])
-        # Rolling features (mean, std, min, max)
-        if len(seq) > 0:
-            features.extend([
-                np.mean(seq[-3:]) if len(seq) >= 3 else np.mean(seq),
-                np.std(seq[-3:]) if len(seq) >= 3 else 0,
-                np.mean(seq[-6:]) if len(seq) >= 6 else np.mean(seq),
-                np.std(seq[-6:]) if len(seq) >= 6 else 0,
-                np.mean(seq[-12:]) if len(seq) >= 12 else np.mean(seq),
-                np.std(seq[-12:]) if len(seq) >= 12 else 0,
-                np.min(seq),
-                np.max(seq),
-            ])
-        else:
-            features.extend([0] * 8)
-        return features
+        seq = np.array(sequence, dtype=float).flatten()
+        if len(seq) < self.lookback:
+            seq = np.pad(seq, (self.lookback - len(seq), 0), mode='edge')
+        return spec_for(self).build_row(seq[-self.lookback:], timestamp)
     
-    def predict_multi_step(self, last_sequence, hours_ahead=24):
+    def predict_multi_step(self, last_sequence, hours_ahead=24, recent_features=None, timestamps=None):
         """
-        Direct multi-step prediction
+        Direct multi-step prediction, batched
+        
+        Hours are predicted in blocks of the largest trained step. Inside a block,
+        hour h uses the smallest trained step s >= h applied to the window ending
+        h - s hours before the block start, so every hour comes from a model trained
+        for exactly that distance and each step model runs once per block on all
+        of its rows. With the horizon strategy a block is forecast_horizon hours,
+        all predicted from the block start in one call. The next block continues
+        from the predicted values.
         
         Args:
-            last_sequence: Last lookback values
+            last_sequence: Most recent values (at least lookback; lookback + 11 for
+                the step 24 model to see its own origins, shorter input is edge-padded)
             hours_ahead: Number of hours to predict
+            recent_features: Optional feature rows of the windows ending at the last
+                values of last_sequence (oldest first), e.g. from a streaming feature
+                state; the first block uses them instead of rebuilding those rows
+            timestamps: datetime64 of the values in last_sequence (calendar features);
+                defaults to the sampling grid ending now
         
         Returns:
             List of predictions for each hour
         """
+        history = np.asarray(last_sequence, dtype=float).flatten()
+        if not self.models:
+            # Fallback
+            return [float(history[-1])] * hours_ahead
+        
+        block_size, plan = self._multi_step_plan()
+        series, times = self._forecast_history(history, timestamps, plan)
+        
         predictions = []
-        seq = np.array(last_sequence).flatten()
+        while len(predictions) < hours_ahead:
+            block = np.empty(block_size)
+            for horizons, offsets, step in plan:
+                features = self._origin_features(series, times, offsets, None if predictions else recent_features)
+                block[horizons - 1] = self.predict_step(features, step)
+            predictions.extend(block.tolist())
+            series, times = self._extend_history(series, times, block)
         
-        # Get available trained steps
+        return predictions[:hours_ahead]
+    
+    def _multi_step_plan(self):
+        """
+        Block size and [(horizons, origin offsets before the block start, step
+        passed to predict_step)] of predict_multi_step
+        """
+        if self.uses_horizon_feature:
+            horizons = np.arange(1, self.forecast_horizon + 1)
+            return self.forecast_horizon, [(horizons, np.zeros_like(horizons), horizons)]
         trained_steps = sorted(self.models.keys())
+        groups = {}
+        for h in range(1, trained_steps[-1] + 1):
+            step = next(s for s in trained_steps if s >= h)
+            groups.setdefault(step, []).append(h)
+        return trained_steps[-1], [(np.array(horizons), step - np.array(horizons), step)
+                                   for step, horizons in groups.items()]
+    
+    def _forecast_history(self, history, timestamps, plan):
+        """History edge-padded for the oldest origin of the plan, and its timestamps"""
+        # Oldest origin is (h - s) hours before the block start
+        max_offset = max(offsets.max() for _, offsets, _ in plan)
+        pad = max(0, self.lookback + max_offset - len(history))
+        series = np.pad(history, (pad, 0), mode='edge')
         
-        for h in range(1, hours_ahead + 1):
-            # Find closest trained step
-            closest_step = min(trained_steps, key=lambda x: abs(x - h))
-            
-            if closest_step in self.models:
-                features = self._create_features_from_sequence(seq)
-                
-                if self.use_lightgbm:
-                    pred = self.models[closest_step].predict([features])[0]
-                else:
-                    pred = self.models[closest_step].predict([features])[0]
-                
-                predictions.append(pred)
-                
-                # Update sequence with prediction for next iteration
-                seq = np.roll(seq, -1)
-                seq[-1] = pred
+        times = None
+        if spec_for(self).calendar:
+            interval = getattr(self, 'sample_interval', 3600)
+            if timestamps is not None:
+                times = np.asarray(timestamps, dtype='datetime64[s]')[-len(history):]
+                # Padded values get grid timestamps before the first real one
+                times = np.concatenate([regular_timestamps(times[0], pad + 1, interval)[:-1], times])
             else:
-                # Fallback
-                predictions.append(seq[-1])
-        
-        return predictions
+                times = regular_timestamps(None, len(series), interval)
+        return series, times
+    
+    def _origin_features(self, series, times, offsets, recent_features=None):
+        """Feature rows of the windows ending `offsets` values before the end of series"""
+        if recent_features is not None and offsets.max() < len(recent_features):
+            return recent_features[len(recent_features) - 1 - offsets]
+        return spec_for(self).build(series, times, ends=len(series) - 1 - offsets)
+    
+    def _extend_history(self, series, times, block):
+        """Append a predicted block (and its grid timestamps) to the history"""
+        if times is not None:
+            interval = getattr(self, 'sample_interval', 3600)
+            offsets = (np.arange(1, len(block) + 1) * interval).astype(np.int64).astype('timedelta64[s]')
+            times = np.concatenate([times, times[-1] + offsets])
+        return np.concatenate([series, block]), times
     
     def forward(self, x_seq):
         """Compatibility method - single step prediction"""
-        features = self._create_features_from_sequence(x_seq)
-        
-        if 1 in self.models:
-            if self.use_lightgbm:
-                return self.models[1].predict([features])[0]
-            else:
-                return self.models[1].predict([features])[0]
+        if self.can_predict(1):
+            return self.predict_step(self._create_features_from_sequence(x_seq)[None, :], 1)[0]
         return x_seq[-1] if len(x_seq) > 0 else 0
 
 
+def predict_multi_step_shared(forecasters: dict, histories: dict, hours_ahead=24, recent_features=None,
+                              timestamps=None) -> dict:
+    """
+    predict_multi_step of several targets of one global model at once: each
+    step model predicts the rows of every target in one call (one call per
+    block with the horizon strategy)
+    
+    Args:
+        forecasters: {target: forecaster}, all sharing the same step models
+        histories / recent_features / timestamps: {target: the argument of
+            predict_multi_step}
+    
+    Returns:
+        {target: list of predictions for each hour}
+    """
+    recent_features = recent_features or {}
+    timestamps = timestamps or {}
+    first = next(iter(forecasters.values()))
+    block_size, plan = first._multi_step_plan()
+    states = {
+        target: forecaster._forecast_history(np.asarray(histories[target], dtype=float).flatten(),
+                                             timestamps.get(target), plan)
+        for target, forecaster in forecasters.items()
+    }
+    
+    predictions = {target: [] for target in forecasters}
+    produced = 0
+    while produced < hours_ahead:
+        blocks = {target: np.empty(block_size) for target in forecasters}
+        for horizons, offsets, step in plan:
+            rows = np.vstack([
+                forecaster.with_target_id(forecaster._origin_features(
+                    *states[target], offsets, None if produced else recent_features.get(target)
+                ))
+                for target, forecaster in forecasters.items()
+            ])
+            steps = np.tile(step, len(forecasters)) if np.ndim(step) else step
+            values = first.predict_rows(rows, steps)
+            for target, part in zip(forecasters, np.split(values, len(forecasters))):
+                blocks[target][horizons - 1] = part
+        for target, forecaster in forecasters.items():
+            predictions[target].extend(blocks[target].tolist())
+            states[target] = forecaster._extend_history(*states[target], blocks[target])
+        produced += block_size
+    
+    return {target: values[:hours_ahead] for target, values in predictions.items()}
+
+
+def _fit_step_job(job, arrays):
+    """Training executor job: fit one (target, step) model from the shared arrays"""
+    forecaster, target, step, num_threads, first_target, dataset_key = job
+    return forecaster.fit_step(
+        arrays[f'{target}:features'], arrays[f'{target}:series'], step, num_threads, first_target, dataset_key
+    )
+
+
+def _fit_global_step_job(job, arrays):
+    """Training executor job: fit one step model of a global model on the rows of all its targets"""
+    forecasters, step, num_threads = job
+    parts = [forecaster.training_rows(arrays[f'{target}:features'], arrays[f'{target}:series'], step)
+             for target, forecaster in forecasters.items()]
+    return next(iter(forecasters.values())).fit_rows(parts, step, num_threads)
+
+
 class LSTMModel:
     """
     LightGBM/XGBoost Model for time series weather forecasting
@@ -420,6 +818,8 @@ class LSTMModel:
         self.models = {}
         self.scalers = {}
         self.metrics = {}
+        # Fingerprint of the training data of each saved model (see MLManager.data_fingerprint)
+        self.fingerprints = {}
         # Determine backend
         if HAS_LIGHTGBM:
             self.model_type = "lightgbm"
@@ -438,14 +838,56 @@ class LSTMModel:
         self.supported_targets = self.sensor_targets + self.weather_targets
         self.lookback = 24  # Use 24 hours of history
         self.forecast_horizon = 24  # Predict up to 24 hours ahead
+        # Readings are aggregated onto an hourly grid, so one step is one hour
+        self.resample_interval = RESAMPLE_INTERVAL
+        # Multi-step strategy of new forecasters (ML_FORECAST_STRATEGY)
+        self.strategy = FORECAST_STRATEGY if FORECAST_STRATEGY in STRATEGIES else 'direct'
+        # One set of step models shared by the targets of a run (ML_GLOBAL_MODEL)
+        self.global_model = GLOBAL_MODEL
+        # Searched hyperparameters per target (see models/hyperparameter_search.py)
+        self.tuned_params = {}
+        self.load_tuned_params()
+        # Boosters can be continued with new data (train_targets(incremental=True));
+        # a global model is always rebuilt over all of its targets
+        self.supports_incremental = self.backend != "sklearn" and not self.global_model
+        # Memory-bounded training (ML_MEMORY_BUDGET_MB): float32 series and features
+        # built in chunks, one target at a time, series capped to the rows that fit
+        self.memory_bounded = memory_bounded()
+        self.dtype = np.float32 if self.memory_bounded else np.float64
         self._load_models()
         
         logger.info(f"[LIGHTGBM] Initialized with backend={self.backend} (LightGBM={HAS_LIGHTGBM}, XGBoost={HAS_XGBOOST})")
     
+    @property
+    def context_length(self) -> int:
+        """History needed at inference (later steps look back from earlier origins)"""
+        lookbacks = [getattr(model, 'lookback', self.lookback) for model in self.models.values()]
+        return max([self.lookback] + lookbacks) + self.forecast_horizon
+    
+    def load_tuned_params(self):
+        """Reload the best configs saved by hyperparameter searches"""
+        self.tuned_params = {target: entry.get('params', {}) for target, entry in load_best_params().items()}
+    
+    def params_for(self, target_column: str) -> dict:
+        """Searched config of a target ({} = defaults, always for a global model)"""
+        if self.global_model:
+            return {}
+        return dict(self.tuned_params.get(target_column) or {})
+    
+    def lookback_for(self, target_column: str) -> int:
+        return int(self.params_for(target_column).get('lookback', self.lookback))
+    
     def _get_model_path(self, target: str) -> Path:
         """Get model file path for a target variable"""
         return MODELS_DIR / f"gbm_{target}.pkl"
     
+    def _get_global_model_path(self) -> Path:
+        """Single file of every target of the global model"""
+        return MODELS_DIR / "gbm_global.pkl"
+    
+    def _global_targets(self) -> list:
+        return [target for target, model in self.models.items() if getattr(model, 'target_id', None) is not None]
+    
     def _load_models(self):
         """Load trained models from disk"""
         try:
@@ -457,171 +899,600 @@ class LSTMModel:
                         self.models[target] = data.get('model')
                         self.scalers[target] = data.get('scaler')
                         self.metrics[target] = data.get('metrics', {})
+                        self.fingerprints[target] = data.get('fingerprint')
                         logger.info(f"[{self.model_type.upper()}] Loaded model: {target}")
+            
+            path = self._get_global_model_path()
+            if path.exists():
+                # Forecasters of one pickle share their step models again after loading
+                with open(path, 'rb') as f:
+                    data = pickle.load(f)
+                for target, entry in data.get('targets', {}).items():
+                    self.models[target] = entry.get('model')
+                    self.scalers[target] = entry.get('scaler')
+                    self.metrics[target] = entry.get('metrics', {})
+                    self.fingerprints[target] = entry.get('fingerprint')
+                logger.info(f"[{self.model_type.upper()}] Loaded global model: {', '.join(data.get('targets', {}))}")
         except Exception as e:
             logger.error(f"[{self.model_type.upper()}] Error loading models: {e}")
     
     def _save_model(self, target: str):
         """Save a trained model to disk"""
         try:
+            if getattr(self.models.get(target), 'target_id', None) is not None:
+                self._save_global()
+                return
             if target in self.models:
                 data = {
                     'model': self.models[target],
                     'scaler': self.scalers.get(target),
-                    'metrics': self.metrics.get(target, {})
+                    'metrics': self.metrics.get(target, {}),
+                    'fingerprint': self.fingerprints.get(target)
                 }
-                with open(self._get_model_path(target), 'wb') as f:
+                # Write then rename: a killed training job never leaves a partial pickle
+                path = self._get_model_path(target)
+                tmp_path = path.with_suffix('.tmp')
+                with open(tmp_path, 'wb') as f:
                     pickle.dump(data, f)
-                    logger.info(f"[{self.model_type.upper()}] Saved model: {target}")
+                tmp_path.replace(path)
+                logger.info(f"[{self.model_type.upper()}] Saved model: {target}")
+                if self._get_global_model_path().exists():
+                    # The target no longer belongs to the global model
+                    self._save_global()
         except Exception as e:
             logger.error(f"[{self.model_type.upper()}] Error saving model {target}: {e}")
     
-    def prepare_data(self, records, target_column: str):
-        """Prepare data for model training"""
+    def _save_global(self):
+        """
+        Save every target of the global model to one file; pickling them together
+        stores each shared step model once
+        """
+        path = self._get_global_model_path()
+        targets = self._global_targets()
+        if not targets:
+            path.unlink(missing_ok=True)
+            return
+        data = {
+            'targets': {
+                target: {
+                    'model': self.models[target],
+                    'scaler': self.scalers.get(target),
+                    'metrics': self.metrics.get(target, {}),
+                    'fingerprint': self.fingerprints.get(target)
+                }
+                for target in targets
+            }
+        }
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f)
+        tmp_path.replace(path)
+        for target in targets:
+            self._get_model_path(target).unlink(missing_ok=True)
+        logger.info(f"[{self.model_type.upper()}] Saved global model: {', '.join(targets)}")
+    
+    def feature_specs(self) -> dict:
+        """FeatureSpec of every trained target's forecaster"""
+        return {target: spec_for(model) for target, model in self.models.items()}
+    
+    def prepare_series(self, records, target_column: str, scaler: MinMaxScaler = None, fingerprint: dict = None):
+        """
+        Sorted, resampled and normalized series of one target
+        
+        Args:
+            records: TrainingData or a list of ORM records
+            target_column: Column to forecast
+            scaler: Fitted scaler to reuse (warm start); a new one is fitted if None
+            fingerprint: Data fingerprint of the target; the resampled series is
+                cached under it
+        
+        Returns:
+            (timestamps as datetime64[s], scaled values, scaler), or (None, None, None)
+            when there is not enough data
+        """
         try:
-            data = []
-            for record in records:
-                value = getattr(record, target_column, None)
-                if value is not None and value > 0:
-                    data.append({
-                        'timestamp': record.timestamp,
-                        'value': float(value)
-                    })
-            
-            if len(data) < self.lookback + 10:
-                logger.warning(f"[{self.model_type.upper()}] Insufficient data for {target_column}: {len(data)} records")
-                return None, None, None
+            series_key = None
+            cached = None
+            if fingerprint is not None and dataset_cache.enabled:
+                series_key = cache_key('series', fingerprint, target_column, self.resample_interval,
+                                       aggregation_for(target_column))
+                cached = dataset_cache.load_arrays(series_key)
             
-            df = pd.DataFrame(data)
-            df = df.sort_values('timestamp').reset_index(drop=True)
+            if cached is not None:
+                # Small: copied out of the memory map (the tail is pickled with the model)
+                timestamps, values = np.array(cached['timestamps']), np.array(cached['values'])
+            elif self.resample_interval:
+                timestamps, values = target_series(records, target_column)
+                readings = len(values)
+                timestamps, values = resample(
+                    timestamps, values, self.resample_interval, aggregation_for(target_column)
+                )
+                logger.info(f"[{self.model_type.upper()}] Resampled {readings} readings of {target_column} to {len(values)} bins")
+            else:
+                timestamps, values = target_series(records, target_column)
+                order = np.argsort(timestamps, kind='stable')
+                timestamps, values = timestamps[order], values[order]
             
-            # Normalize data
-            scaler = MinMaxScaler(feature_range=(0, 1))
-            scaled_values = scaler.fit_transform(df['value'].values.reshape(-1, 1))
+            if series_key and cached is None:
+                dataset_cache.store_arrays(series_key, {'timestamps': timestamps, 'values': values})
             
-            # Create sequences
-            X, y = [], []
-            for i in range(self.lookback, len(scaled_values)):
-                X.append(scaled_values[i-self.lookback:i, 0])
-                y.append(scaled_values[i, 0])
+            if len(values) < self.lookback + 10:
+                logger.warning(f"[{self.model_type.upper()}] Insufficient data for {target_column}: {len(values)} records")
+                return None, None, None
             
-            X = np.array(X)
-            y = np.array(y)
+            # Normalize data
+            if scaler is None:
+                scaler = MinMaxScaler(feature_range=(0, 1))
+                scaled_values = scaler.fit_transform(values.reshape(-1, 1)).flatten()
+            else:
+                scaled_values = scaler.transform(values.reshape(-1, 1)).flatten()
+            scaled_values = scaled_values.astype(self.dtype, copy=False)
             
-            logger.info(f"[{self.model_type.upper()}] Prepared {len(X)} sequences for {target_column}")
-            return X, y, scaler
+            logger.info(f"[{self.model_type.upper()}] Prepared {len(scaled_values)} values for {target_column}")
+            return timestamps, scaled_values, scaler
             
         except Exception as e:
             logger.error(f"[{self.model_type.upper()}] Error preparing data for {target_column}: {e}")
             return None, None, None
     
-    def train(self, records, target_column: str) -> dict:
-        """Train model for a specific target variable"""
-        try:
-            X, y, scaler = self.prepare_data(records, target_column)
-            
-            if X is None or len(X) < 10:
-                return {'success': False, 'error': 'Insufficient data'}
-            
-            # Split data
-            split_idx = int(len(X) * 0.8)
-            X_train, X_test = X[:split_idx], X[split_idx:]
-            y_train, y_test = y[:split_idx], y[split_idx:]
-            
-            # Create and train model
+    def prepare_data(self, records, target_column: str):
+        """Prepare data for model training (lookback windows and next-value targets)"""
+        _, scaled_values, scaler = self.prepare_series(records, target_column)
+        if scaled_values is None:
+            return None, None, None
+        X = sliding_window_view(scaled_values, self.lookback)[:-1].copy()
+        y = scaled_values[self.lookback:].copy()
+        return X, y, scaler
+    
+    def warm_start_base(self, target_column: str):
+        """
+        Stored forecaster a warm start can continue, or None when the target
+        needs a full rebuild (no model or watermark, other backend, strategy,
+        features or searched config, last full build older than FULL_REBUILD_DAYS,
+        MAX_WARM_STARTS reached)
+        """
+        model = self.models.get(target_column)
+        if not self.supports_incremental or model is None or self.scalers.get(target_column) is None:
+            return None
+        if getattr(model, 'trained_until', None) is None or not model.models:
+            return None
+        if spec_for(model) != FeatureSpec(self.lookback_for(target_column)) or model.use_lightgbm != HAS_LIGHTGBM:
+            return None
+        if getattr(model, 'tuned_params', {}) != self.params_for(target_column):
+            return None
+        if getattr(model, 'strategy', 'direct') != self.strategy or getattr(model, 'target_id', None) is not None:
+            return None
+        if getattr(model, 'warm_starts', 0) >= MAX_WARM_STARTS:
+            return None
+        full_trained_at = getattr(model, 'full_trained_at', None)
+        if full_trained_at is None or datetime.now() - full_trained_at > timedelta(days=FULL_REBUILD_DAYS):
+            return None
+        return model
+    
+    def max_series_rows(self):
+        """
+        Longest series whose training matrices fit in the memory budget, or
+        None when training is not memory-bounded
+
+        Per row: the feature matrix, its shared-memory copy for the executor
+        and one LightGBM Dataset per concurrent worker (forecast_horizon rows
+        of it with the horizon strategy).
+        """
+        row_bytes = len(FeatureSpec(self.lookback).columns()) * np.dtype(self.dtype).itemsize
+        stacked = self.forecast_horizon if self.strategy == 'horizon' else 1
+        return rows_within_budget(row_bytes * (2 + training_executor.workers * stacked),
+                                  minimum=self.context_length + self.lookback + 10)
+    
+    def _prepare_target(self, records, target_column: str, incremental: bool = False, fingerprint: dict = None):
+        """
+        Series, split and feature matrix of one target (everything before the
+        step models are fitted); None if there is not enough data
+        
+        With incremental, a target whose stored model can be warm-started keeps
+        its scaler and step models; only windows with targets newer than the
+        model's training watermark are fitted.
+        
+        The resampled series and the feature matrix come from the dataset cache
+        when the same data (by fingerprint) was prepared before.
+        """
+        if fingerprint is None and dataset_cache.enabled:
+            fingerprint = data_fingerprint(records, target_column, self.resample_interval)
+        base = self.warm_start_base(target_column) if incremental else None
+        timestamps, series, scaler = self.prepare_series(
+            records, target_column, self.scalers[target_column] if base is not None else None, fingerprint
+        )
+        
+        lookback = self.lookback_for(target_column)
+        if series is None or len(series) - lookback < 10:
+            return None
+        
+        # Keep the most recent rows that fit in the memory budget
+        dropped_rows = 0
+        max_rows = self.max_series_rows() if self.memory_bounded else None
+        if max_rows and len(series) > max_rows:
+            dropped_rows = len(series) - max_rows
+            timestamps, series = timestamps[-max_rows:].copy(), series[-max_rows:].copy()
+            logger.info(f"[{self.model_type.upper()}] Memory budget {MEMORY_BUDGET_MB} MB: "
+                        f"training {target_column} on the last {max_rows} of {max_rows + dropped_rows} values")
+        
+        # Split data (80% of the lookback windows train, the rest evaluate)
+        n_sequences = len(series) - lookback
+        split_idx = int(n_sequences * 0.8)
+        train_end = lookback + split_idx
+        
+        if base is not None:
+            # Copy: the serving model must not change until the new one is installed
+            model = copy.deepcopy(base)
+            first_target = int(np.searchsorted(timestamps, np.datetime64(base.trained_until, 's'), side='right'))
+            new_rows = max(0, train_end - first_target)
+            if new_rows:
+                model.warm_starts = getattr(base, 'warm_starts', 0) + 1
+        else:
+            # Create model
             model = GradientBoostingForecaster(
-                lookback=self.lookback,
+                lookback=lookback,
                 forecast_horizon=self.forecast_horizon,
-                use_lightgbm=HAS_LIGHTGBM
+                use_lightgbm=HAS_LIGHTGBM,
+                strategy=self.strategy
             )
-            model.fit(X_train, y_train)
-            
-            # Make predictions on test data
-            y_pred_scaled = model.predict(X_test)
-            # Clamp predictions to [0, 1] to avoid out-of-range values
-            y_pred_scaled = np.clip(y_pred_scaled, 0, 1)
-            # Inverse transform predictions
-            y_pred = scaler.inverse_transform(y_pred_scaled.reshape(-1, 1)).flatten()
-            y_true = scaler.inverse_transform(y_test.reshape(-1, 1)).flatten()
-            
-            # Calculate metrics
-            mae = mean_absolute_error(y_true, y_pred)
-            rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-            
-            # Handle potential division issues
-            ss_res = np.sum((y_true - y_pred) ** 2)
-            ss_tot = np.sum((y_true - np.mean(y_true)) ** 2)
-            r2 = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-            r2 = max(-1, min(1, r2))  # Clamp to valid range
-            
-            accuracy = max(0, min(100, r2 * 100))
-            
-            # Store model and metrics
-            self.models[target_column] = model
-            self.scalers[target_column] = scaler
-            self.metrics[target_column] = {
-                'mae': round(float(mae), 4),
-                'rmse': round(float(rmse), 4),
-                'r2': round(float(r2), 4),
-                'accuracy': round(float(accuracy), 2),
-                'data_points': len(X),
-                'lookback': self.lookback,
-                'model_backend': self.backend
-            }
-            
-            # Save model to disk
+            model.apply_params(self.params_for(target_column))
+            model.full_trained_at = datetime.now()
+            first_target = None
+            new_rows = train_end
+        
+        features_key = None
+        cached = None
+        if fingerprint is not None and dataset_cache.enabled:
+            features_key = cache_key(
+                'features', fingerprint, target_column, self.resample_interval, train_end, len(series),
+                str(series.dtype), spec_for(model).to_dict(), scaler.data_min_.tolist(), scaler.data_max_.tolist()
+            )
+            cached = dataset_cache.load_arrays(features_key)
+        
+        features, train_series = model.prepare_fit(
+            series[:train_end], timestamps[:train_end], cached['features'] if cached else None,
+            FEATURE_CHUNK_ROWS if self.memory_bounded else None
+        )
+        if features_key and cached is None:
+            dataset_cache.store_arrays(features_key, {'features': features})
+        if new_rows:
+            model.trained_until = timestamps[train_end - 1]
+        # Feature rows the step models are fitted on (only the new windows for a warm start)
+        fit_rows = len(features) if first_target is None else min(len(features), new_rows + lookback)
+        
+        return {
+            'model': model,
+            'scaler': scaler,
+            'timestamps': timestamps,
+            'series': series,
+            'train_end': train_end,
+            'n_sequences': n_sequences,
+            'features': features,
+            'train_series': train_series,
+            'first_target': first_target,
+            'dataset_key': features_key,
+            'fit_rows': fit_rows,
+            'training_mode': 'warm_start' if base is not None else 'full',
+            'new_rows': new_rows,
+            'dropped_rows': dropped_rows
+        }
+    
+    def _finish_target(self, target_column: str, prepared: dict, fingerprint: dict = None, save: bool = True) -> dict:
+        """Evaluate a fitted model on the held-out windows, store and save it (unless save is False)"""
+        model = prepared['model']
+        scaler = prepared['scaler']
+        series = prepared['series']
+        train_end = prepared['train_end']
+        
+        # Make predictions on test data (1 step ahead from every held-out window)
+        ends = np.arange(train_end - 1, len(series) - 1)
+        y_test = series[ends + 1]
+        y_pred_scaled = model.predict_series(series, prepared['timestamps'], ends,
+                                             FEATURE_CHUNK_ROWS if self.memory_bounded else None)
+        # Clamp predictions to [0, 1] to avoid out-of-range values
+        y_pred_scaled = np.clip(y_pred_scaled, 0, 1)
+        # Inverse transform predictions
+        y_pred = scaler.inverse_transform(y_pred_scaled.reshape(-1, 1)).flatten()
+        y_true = scaler.inverse_transform(y_test.reshape(-1, 1)).flatten()
+        
+        # Calculate metrics
+        mae = mean_absolute_error(y_true, y_pred)
+        rmse = np.sqrt(mean_squared_error(y_true, y_pred))
+        
+        # Handle potential division issues
+        ss_res = np.sum((y_true - y_pred) ** 2)
+        ss_tot = np.sum((y_true - np.mean(y_true)) ** 2)
+        r2 = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+        r2 = max(-1, min(1, r2))  # Clamp to valid range
+        
+        accuracy = max(0, min(100, r2 * 100))
+        
+        # Store model and metrics
+        self.models[target_column] = model
+        self.scalers[target_column] = scaler
+        self.metrics[target_column] = {
+            'mae': round(float(mae), 4),
+            'rmse': round(float(rmse), 4),
+            'r2': round(float(r2), 4),
+            'accuracy': round(float(accuracy), 2),
+            'data_points': prepared['n_sequences'],
+            'lookback': model.lookback,
+            'tuned': bool(getattr(model, 'tuned_params', None)),
+            'strategy': getattr(model, 'strategy', 'direct'),
+            'boosters': len(model.models),
+            'global_model': getattr(model, 'target_id', None) is not None,
+            'model_backend': self.backend,
+            'training_mode': prepared.get('training_mode', 'full'),
+            'new_data_points': prepared.get('new_rows', prepared['n_sequences']),
+            'peak_rss_mb': peak_rss_mb()
+        }
+        if self.memory_bounded:
+            self.metrics[target_column]['memory_budget_mb'] = MEMORY_BUDGET_MB
+            self.metrics[target_column]['rows_over_budget'] = prepared.get('dropped_rows', 0)
+        self.fingerprints[target_column] = fingerprint
+        
+        # Save model to disk
+        if save:
             self._save_model(target_column)
-            
-            logger.info(f"[LIGHTGBM] Trained {target_column}: MAE={mae:.4f}, RMSE={rmse:.4f}, R2={r2:.4f} (backend={self.backend})")
-            
-            return {
-                'success': True,
-                'metrics': self.metrics[target_column]
-            }
-            
-        except Exception as e:
-            logger.error(f"[{self.model_type.upper()}] Training error for {target_column}: {e}")
-            import traceback
-            traceback.print_exc()
-            return {'success': False, 'error': str(e)}
+        
+        logger.info(f"[LIGHTGBM] Trained {target_column}: MAE={mae:.4f}, RMSE={rmse:.4f}, R2={r2:.4f} (backend={self.backend})")
+        
+        return {
+            'success': True,
+            'metrics': self.metrics[target_column]
+        }
     
-    def train_all(self, records) -> dict:
-        """Train models for sensor data targets only (6 targets)"""
-        start_time = datetime.now()
-        models_trained = []
-        all_metrics = {}
+    def train_targets(self, records, targets: list, executor: TrainingExecutor = None, progress=None,
+                      incremental: bool = False, fingerprints: dict = None) -> dict:
+        """
+        Train several targets; every (target, step) model is an independent
+        job on the training executor's process pool
         
-        model_name = "LightGBM" if HAS_LIGHTGBM else ("XGBoost" if HAS_XGBOOST else "GradientBoosting")
+        Args:
+            progress: Optional callback(event dict) with 'event' ('target_prepared',
+                'step_trained', 'target_trained'), 'target', 'fraction' (0-1 of this run)
+                and 'rows' (training rows a fitted step model consumed)
+            incremental: Continue the stored boosters with data newer than their
+                watermark where possible (see warm_start_base), else rebuild
+            fingerprints: Optional {target: training data fingerprint} saved with the models
         
-        print("\n" + "="*60)
-        print(f"🧠 BẮT ĐẦU HUẤN LUYỆN MODEL {model_name} (Direct Multi-Step)")
-        print("="*60)
-        print(f"📊 Số lượng dữ liệu sensor: {len(records)} records")
-        print(f"🔄 Lookback: {self.lookback} giờ")
-        print(f"📈 Forecast horizon: {self.forecast_horizon} giờ")
-        print(f"🕐 Thời gian bắt đầu: {start_time.strftime('%H:%M:%S')}")
-        print(f"⚙️  Backend: {self.backend}")
-        print("-"*60)
+        Returns:
+            {target: result dict}, in the order of targets
+        """
+        self.load_tuned_params()
+        if self.global_model:
+            return self._train_global(records, targets, executor, progress, fingerprints)
+        if self.memory_bounded and len(targets) > 1:
+            # One target's matrices alive at a time (no cross-target parallelism)
+            results = {}
+            for i, target in enumerate(targets):
+                scaled = None
+                if progress:
+                    scaled = lambda event, i=i: progress({**event, 'fraction': (i + event['fraction']) / len(targets)})
+                results.update(self.train_targets(records, [target], executor, scaled, incremental, fingerprints))
+            return results
         
-        # Only train sensor targets (6 targets from SensorData)
-        for i, target in enumerate(self.sensor_targets, 1):
-            print(f"\n[{i}/{len(self.sensor_targets)}] 🎯 Training: {target.upper()}")
-            result = self.train(records, target)
+        executor = executor or training_executor
+        results = {}
+        prepared = self._prepare_targets(records, targets, results, progress, incremental, fingerprints)
+        
+        jobs = [(target, step) for target, data in prepared.items() for step in data['model'].steps_to_train()]
+        arrays = {}
+        for target, data in prepared.items():
+            arrays[f'{target}:features'] = data['features']
+            arrays[f'{target}:series'] = data['train_series']
+        
+        rows = sum(prepared[target]['fit_rows'] for target, _ in jobs)
+        num_threads = executor.threads_per_job(len(jobs), rows)
+        
+        finished_jobs = []
+        
+        def on_result(index, model):
+            finished_jobs.append(index)
+            if progress:
+                target, step = jobs[index]
+                progress({
+                    'event': 'step_trained',
+                    'target': target,
+                    'step': step,
+                    'rows': prepared[target]['fit_rows'],
+                    'fraction': PREPARE_PROGRESS + FIT_PROGRESS * len(finished_jobs) / len(jobs)
+                })
+        
+        fitted = executor.run(
+            _fit_step_job,
+            [(prepared[target]['model'], target, step, num_threads,
+              prepared[target]['first_target'], prepared[target]['dataset_key'])
+             for target, step in jobs],
+            arrays,
+            rows,
+            on_result=on_result
+        )
+        
+        # Merge in (target, step) order regardless of which worker finished first
+        step_models = {target: {} for target in prepared}
+        for (target, step), model in zip(jobs, fitted):
+            if isinstance(model, Exception):
+                logger.error(f"[{self.model_type.upper()}] Step {step} of {target} failed: {model}")
+                # A failed warm start keeps the step model it started from
+                model = prepared[target]['model'].models.get(step)
+            step_models[target][step] = model
+        
+        for i, (target, data) in enumerate(prepared.items(), 1):
+            try:
+                data['model'].set_step_models(step_models[target])
+                results[target] = self._finish_target(target, data, (fingerprints or {}).get(target))
+            except Exception as e:
+                logger.error(f"[{self.model_type.upper()}] Training error for {target}: {e}")
+                import traceback
+                traceback.print_exc()
+                results[target] = {'success': False, 'error': str(e)}
+            if self.memory_bounded:
+                # Drop the matrices now rather than when the run returns
+                for key in ('features', 'train_series', 'series'):
+                    data.pop(key, None)
+                arrays.clear()
+                release()
+            if progress:
+                progress({
+                    'event': 'target_trained',
+                    'target': target,
+                    'success': results[target].get('success', False),
+                    'metrics': results[target].get('metrics'),
+                    'fraction': PREPARE_PROGRESS + FIT_PROGRESS + (1 - PREPARE_PROGRESS - FIT_PROGRESS) * i / len(prepared)
+                })
+        
+        return {target: results[target] for target in targets}
+    
+    def _prepare_targets(self, records, targets: list, results: dict, progress=None, incremental: bool = False,
+                         fingerprints: dict = None) -> dict:
+        """
+        _prepare_target of every target, reporting 'target_prepared' events;
+        failures go to results
+        
+        Returns:
+            {target: prepared dict} of the targets with enough data
+        """
+        prepared = {}
+        for i, target in enumerate(targets, 1):
+            try:
+                # A global run may take each target from its own records
+                target_records = records[target] if isinstance(records, dict) else records
+                data = self._prepare_target(target_records, target, incremental, (fingerprints or {}).get(target))
+                if data is None:
+                    results[target] = {'success': False, 'error': 'Insufficient data'}
+                else:
+                    prepared[target] = data
+            except Exception as e:
+                logger.error(f"[{self.model_type.upper()}] Training error for {target}: {e}")
+                results[target] = {'success': False, 'error': str(e)}
+            if progress:
+                progress({
+                    'event': 'target_prepared',
+                    'target': target,
+                    'samples': prepared[target]['fit_rows'] if target in prepared else 0,
+                    'fraction': PREPARE_PROGRESS * i / len(targets)
+                })
+        return prepared
+    
+    def _train_global(self, records, targets: list, executor: TrainingExecutor = None, progress=None,
+                      fingerprints: dict = None) -> dict:
+        """
+        train_targets of a global model: each step model is one booster fitted
+        on the rows of every target (per-target scaled series, shared calendar
+        features, target id as a categorical feature), so a run costs one
+        boosting job per step - a single one with the horizon strategy - and
+        one file. Targets not in the run keep their models.
+        
+        Args:
+            records: TrainingData / records, or {target: records}
+        """
+        executor = executor or training_executor
+        results = {}
+        prepared = self._prepare_targets(records, targets, results, progress, fingerprints=fingerprints)
+        
+        forecasters = {target: data['model'] for target, data in prepared.items()}
+        for target, forecaster in forecasters.items():
+            # Stable across runs: the position in supported_targets
+            forecaster.target_id = self.supported_targets.index(target)
+            # The shared booster gets the boosting rounds the per-target ones had
+            # together (set directly: apply_params would record it as tuned)
+            forecaster.lgb_params['n_estimators'] *= len(forecasters)
+            forecaster.xgb_params['n_estimators'] *= len(forecasters)
+        steps = next(iter(forecasters.values())).steps_to_train() if forecasters else []
+        
+        arrays = {}
+        for target, data in prepared.items():
+            arrays[f'{target}:features'] = data['features']
+            arrays[f'{target}:series'] = data['train_series']
+        rows = sum(data['fit_rows'] for data in prepared.values())
+        num_threads = executor.threads_per_job(len(steps), rows * len(steps))
+        
+        finished_jobs = []
+        
+        def on_result(index, model):
+            finished_jobs.append(index)
+            if progress:
+                progress({
+                    'event': 'step_trained',
+                    'target': ', '.join(forecasters),
+                    'step': steps[index],
+                    'rows': rows,
+                    'fraction': PREPARE_PROGRESS + FIT_PROGRESS * len(finished_jobs) / len(steps)
+                })
+        
+        fitted = executor.run(
+            _fit_global_step_job,
+            [(forecasters, step, num_threads) for step in steps],
+            arrays,
+            rows * len(steps),
+            on_result=on_result
+        )
+        step_models = {}
+        for step, model in zip(steps, fitted):
+            if isinstance(model, Exception):
+                logger.error(f"[{self.model_type.upper()}] Global step {step} failed: {model}")
+                model = None
+            step_models[step] = model
+        
+        for i, (target, data) in enumerate(prepared.items(), 1):
+            try:
+                data['model'].set_step_models(step_models)
+                if not data['model'].models:
+                    raise RuntimeError('No step model could be trained')
+                results[target] = self._finish_target(target, data, (fingerprints or {}).get(target), save=False)
+            except Exception as e:
+                logger.error(f"[{self.model_type.upper()}] Training error for {target}: {e}")
+                results[target] = {'success': False, 'error': str(e)}
+            if progress:
+                progress({
+                    'event': 'target_trained',
+                    'target': target,
+                    'success': results[target].get('success', False),
+                    'metrics': results[target].get('metrics'),
+                    'fraction': PREPARE_PROGRESS + FIT_PROGRESS + (1 - PREPARE_PROGRESS - FIT_PROGRESS) * i / len(prepared)
+                })
+        
+        if any(result.get('success') for result in results.values()):
+            try:
+                self._save_global()
+            except Exception as e:
+                logger.error(f"[{self.model_type.upper()}] Error saving global model: {e}")
+        
+        return {target: results[target] for target in targets}
+    
+    def train(self, records, target_column: str) -> dict:
+        """Train model for a specific target variable"""
+        return self.train_targets(records, [target_column])[target_column]
+    
+    def _report_results(self, results: dict, targets: list, first: int = 1, total: int = None):
+        """
+        Print the outcome of each trained target; returns (trained targets,
+        {target: metrics})
+        """
+        total = total or len(targets)
+        models_trained = []
+        all_metrics = {}
+        for i, target in enumerate(targets, first):
+            print(f"\n[{i}/{total}] 🎯 Results: {target.upper()}")
+            result = results[target]
             if result.get('success'):
                 models_trained.append(target)
                 all_metrics[target] = result['metrics']
                 metrics = result['metrics']
-                print(f"    ✅ Thành công!")
+                print("    ✅ Thành công!")
                 print(f"    📈 R² Score: {metrics.get('r2', 0)*100:.2f}%")
                 print(f"    📉 MAE: {metrics.get('mae', 0):.4f}")
-                print(f"    �� RMSE: {metrics.get('rmse', 0):.4f}")
+                print(f"    📉 RMSE: {metrics.get('rmse', 0):.4f}")
             else:
                 print(f"    ❌ Thất bại: {result.get('error', 'Unknown error')}")
-        
+        return models_trained, all_metrics
+    
+    def _training_summary(self, models_trained: list, all_metrics: dict, start_time: datetime, data_points: int) -> dict:
+        """Result dict of a sensor / global training run"""
         training_time = (datetime.now() - start_time).total_seconds()
         
         if models_trained:
-            # Calculate overall accuracy
             accuracies = [m.get('accuracy', 0) for m in all_metrics.values()]
             overall_accuracy = np.mean(accuracies) if accuracies else 0
             
@@ -632,7 +1503,7 @@ class LSTMModel:
                 'metrics': all_metrics,
                 'overall_accuracy': round(float(overall_accuracy), 2),
                 'training_time': round(training_time, 2),
-                'data_points': len(records)
+                'data_points': data_points
             }
         else:
             print("\n❌ THẤT BẠI: Không train được model nào!")
@@ -642,20 +1513,46 @@ class LSTMModel:
                 'error': 'Failed to train any models'
             }
     
-    def train_selected(self, records, selected_targets: list) -> dict:
+    def train_all(self, records) -> dict:
+        """Train models for sensor data targets only (6 targets)"""
+        start_time = datetime.now()
+        
+        model_name = "LightGBM" if HAS_LIGHTGBM else ("XGBoost" if HAS_XGBOOST else "GradientBoosting")
+        
+        print("\n" + "="*60)
+        print(f"🧠 BẮT ĐẦU HUẤN LUYỆN MODEL {model_name} (Direct Multi-Step)")
+        print("="*60)
+        print(f"📊 Số lượng dữ liệu sensor: {len(records)} records")
+        print(f"🔄 Lookback: {self.lookback} giờ")
+        print(f"📈 Forecast horizon: {self.forecast_horizon} giờ")
+        print(f"🕐 Thời gian bắt đầu: {start_time.strftime('%H:%M:%S')}")
+        print(f"⚙️  Backend: {self.backend}")
+        print(f"🧵 Workers: {training_executor.workers}")
+        print(f"🧩 Chiến lược: {self.strategy}{' (global model)' if self.global_model else ''}")
+        print("-"*60)
+        
+        # Only train sensor targets (6 targets from SensorData)
+        results = self.train_targets(records, self.sensor_targets)
+        models_trained, all_metrics = self._report_results(results, self.sensor_targets)
+        
+        return self._training_summary(models_trained, all_metrics, start_time, len(records))
+    
+    def train_selected(self, records, selected_targets: list, progress=None, incremental: bool = False,
+                       fingerprints: dict = None) -> dict:
         """
         Train models for selected sensor data targets only
         
         Args:
             records: List of SensorData records from database
             selected_targets: List of targets to train (e.g., ['temperature', 'humidity'])
+            progress: Optional progress callback (see train_targets)
+            incremental: Warm-start the stored models where possible (see train_targets)
+            fingerprints: Optional {target: training data fingerprint} saved with the models
         
         Returns:
             dict with training results
         """
         start_time = datetime.now()
-        models_trained = []
-        all_metrics = {}
         
         # Filter only valid sensor targets
         targets_to_train = [t for t in selected_targets if t in self.sensor_targets]
@@ -677,44 +1574,59 @@ class LSTMModel:
         print(f"📈 Forecast horizon: {self.forecast_horizon} giờ")
         print(f"🕐 Thời gian bắt đầu: {start_time.strftime('%H:%M:%S')}")
         print(f"⚙️  Backend: {self.backend}")
+        print(f"🧵 Workers: {training_executor.workers}")
+        print(f"🧩 Chiến lược: {self.strategy}{' (global model)' if self.global_model else ''}")
+        print(f"♻️  Chế độ: {'incremental (warm start)' if incremental else 'full rebuild'}")
         print("-"*60)
         
-        for i, target in enumerate(targets_to_train, 1):
-            print(f"\n[{i}/{len(targets_to_train)}] 🎯 Training: {target.upper()}")
-            result = self.train(records, target)
-            if result.get('success'):
-                models_trained.append(target)
-                all_metrics[target] = result['metrics']
-                metrics = result['metrics']
-                print(f"    ✅ Thành công!")
-                print(f"    📈 R² Score: {metrics.get('r2', 0)*100:.2f}%")
-                print(f"    📉 MAE: {metrics.get('mae', 0):.4f}")
-                print(f"    📉 RMSE: {metrics.get('rmse', 0):.4f}")
-            else:
-                print(f"    ❌ Thất bại: {result.get('error', 'Unknown error')}")
+        results = self.train_targets(records, targets_to_train, progress=progress, incremental=incremental,
+                                     fingerprints=fingerprints)
+        models_trained, all_metrics = self._report_results(results, targets_to_train)
         
-        training_time = (datetime.now() - start_time).total_seconds()
+        return self._training_summary(models_trained, all_metrics, start_time, len(records))
+    
+    def train_global(self, target_records: dict, progress=None, fingerprints: dict = None) -> dict:
+        """
+        Train sensor and weather targets together as one global model
         
-        if models_trained:
-            accuracies = [m.get('accuracy', 0) for m in all_metrics.values()]
-            overall_accuracy = np.mean(accuracies) if accuracies else 0
-            
-            return {
-                'success': True,
-                'model_type': self.model_type,
-                'models_trained': models_trained,
-                'metrics': all_metrics,
-                'overall_accuracy': round(float(overall_accuracy), 2),
-                'training_time': round(training_time, 2),
-                'data_points': len(records)
-            }
-        else:
-            print("\n❌ THẤT BẠI: Không train được model nào!")
+        Args:
+            target_records: {target: TrainingData or records} (sensor targets
+                from sensor data, weather targets from weather data)
+            progress: Optional progress callback (see train_targets)
+            fingerprints: Optional {target: training data fingerprint} saved with the models
+        
+        Returns:
+            dict with training results
+        """
+        start_time = datetime.now()
+        
+        targets_to_train = [t for t in target_records if t in self.supported_targets]
+        if not targets_to_train:
             return {
                 'success': False,
-                'model_type': self.model_type,
-                'error': 'Failed to train any models'
+                'error': 'No valid targets selected'
             }
+        data_points = max(len(records) for records in target_records.values())
+        
+        model_name = "LightGBM" if HAS_LIGHTGBM else ("XGBoost" if HAS_XGBOOST else "GradientBoosting")
+        
+        print("\n" + "="*60)
+        print(f"🧠 BẮT ĐẦU HUẤN LUYỆN MODEL {model_name} (GLOBAL MODEL)")
+        print("="*60)
+        print(f"📊 Số lượng dữ liệu: {data_points} records")
+        print(f"🎯 Targets dùng chung model: {', '.join(targets_to_train)}")
+        print(f"🔄 Lookback: {self.lookback} giờ")
+        print(f"📈 Forecast horizon: {self.forecast_horizon} giờ")
+        print(f"🕐 Thời gian bắt đầu: {start_time.strftime('%H:%M:%S')}")
+        print(f"⚙️  Backend: {self.backend}")
+        print(f"🧩 Chiến lược: {self.strategy} (global model)")
+        print("-"*60)
+        
+        self.load_tuned_params()
+        results = self._train_global(target_records, targets_to_train, progress=progress, fingerprints=fingerprints)
+        models_trained, all_metrics = self._report_results(results, targets_to_train)
+        
+        return self._training_summary(models_trained, all_metrics, start_time, data_points)
     
     def train_weather_targets(self, weather_records) -> dict:
         """
@@ -727,8 +1639,6 @@ class LSTMModel:
             dict with training results
         """
         start_time = datetime.now()
-        models_trained = []
-        all_metrics = {}
         
         print(f"\n📊 Dữ liệu weather API: {len(weather_records)} records")
         
@@ -736,19 +1646,8 @@ class LSTMModel:
         start_idx = len(self.sensor_targets) + 1
         total = len(self.sensor_targets) + len(self.weather_targets)
         
-        for i, target in enumerate(self.weather_targets, start_idx):
-            print(f"\n[{i}/{total}] 🎯 Training: {target.upper()}")
-            result = self.train(weather_records, target)
-            if result.get('success'):
-                models_trained.append(target)
-                all_metrics[target] = result['metrics']
-                metrics = result['metrics']
-                print(f"    ✅ Thành công!")
-                print(f"    📈 R² Score: {metrics.get('r2', 0)*100:.2f}%")
-                print(f"    📉 MAE: {metrics.get('mae', 0):.4f}")
-                print(f"    📉 RMSE: {metrics.get('rmse', 0):.4f}")
-            else:
-                print(f"    ❌ Thất bại: {result.get('error', 'Unknown error')}")
+        results = self.train_targets(weather_records, self.weather_targets)
+        models_trained, all_metrics = self._report_results(results, self.weather_targets, start_idx, total)
         
         training_time = (datetime.now() - start_time).total_seconds()
         
@@ -770,20 +1669,22 @@ class LSTMModel:
                 'error': 'Failed to train weather models'
             }
     
-    def train_weather_selected(self, weather_records, selected_targets: list) -> dict:
+    def train_weather_selected(self, weather_records, selected_targets: list, progress=None,
+                               incremental: bool = False, fingerprints: dict = None) -> dict:
         """
         Train models for selected weather API targets
         
         Args:
             weather_records: List of WeatherForecasting records from database
             selected_targets: List of weather targets to train (e.g., ['wind_speed', 'rainfall'])
+            progress: Optional progress callback (see train_targets)
+            incremental: Warm-start the stored models where possible (see train_targets)
+            fingerprints: Optional {target: training data fingerprint} saved with the models
         
         Returns:
             dict with training results
         """
         start_time = datetime.now()
-        models_trained = []
-        all_metrics = {}
         
         # Filter only valid weather targets
         targets_to_train = [t for t in selected_targets if t in self.weather_targets]
@@ -797,19 +1698,9 @@ class LSTMModel:
         print(f"\n📊 Dữ liệu weather API: {len(weather_records)} records")
         print(f"🎯 Weather targets đã chọn: {', '.join(targets_to_train)}")
         
-        for i, target in enumerate(targets_to_train, 1):
-            print(f"\n[{i}/{len(targets_to_train)}] 🎯 Training: {target.upper()}")
-            result = self.train(weather_records, target)
-            if result.get('success'):
-                models_trained.append(target)
-                all_metrics[target] = result['metrics']
-                metrics = result['metrics']
-                print(f"    ✅ Thành công!")
-                print(f"    📈 R² Score: {metrics.get('r2', 0)*100:.2f}%")
-                print(f"    📉 MAE: {metrics.get('mae', 0):.4f}")
-                print(f"    📉 RMSE: {metrics.get('rmse', 0):.4f}")
-            else:
-                print(f"    ❌ Thất bại: {result.get('error', 'Unknown error')}")
+        results = self.train_targets(weather_records, targets_to_train, progress=progress, incremental=incremental,
+                                     fingerprints=fingerprints)
+        models_trained, all_metrics = self._report_results(results, targets_to_train)
         
         training_time = (datetime.now() - start_time).total_seconds()
         
@@ -831,7 +1722,48 @@ class LSTMModel:
                 'error': 'Failed to train selected weather models'
             }
     
-    def predict(self, target_column: str, hours_ahead: int = 24, last_values: np.ndarray = None) -> dict:
+    def _forecast_inputs(self, target_column: str, last_values=None, timestamps=None):
+        """Scaled history (and its timestamps) a target's forecast starts from"""
+        model = self.models[target_column]
+        # Use last known values or model's stored values
+        if last_values is None:
+            if hasattr(model, 'last_values') and model.last_values is not None:
+                last_values = model.last_values
+                timestamps = getattr(model, 'last_timestamps', None)
+            else:
+                # Generate dummy values based on scaler
+                last_values = np.ones(self.lookback) * 0.5
+        
+        # The forecaster looks back further than lookback for later steps
+        # (and edge-pads shorter input itself)
+        last_values = np.asarray(last_values, dtype=float)[-self.context_length:]
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype='datetime64[s]')[-len(last_values):]
+        return last_values, timestamps
+    
+    def _prediction_result(self, target_column: str, predictions_scaled) -> dict:
+        """Hourly predictions of a target in its own units"""
+        scaler = self.scalers[target_column]
+        predictions_scaled = np.asarray(predictions_scaled, dtype=float)
+        pred_values = scaler.inverse_transform(predictions_scaled.reshape(-1, 1)).flatten()
+        
+        base_time = datetime.now()
+        predictions = [
+            {
+                'timestamp': (base_time + timedelta(hours=i+1)).strftime("%d/%m/%Y %H:%M:%S"),
+                'value': round(float(pred_value), 2)
+            }
+            for i, pred_value in enumerate(pred_values)
+        ]
+        
+        return {
+            'success': True,
+            'target': target_column,
+            'predictions': predictions
+        }
+    
+    def predict(self, target_column: str, hours_ahead: int = 24, last_values: np.ndarray = None,
+                recent_features: np.ndarray = None, timestamps: np.ndarray = None) -> dict:
         """Make predictions for a specific target variable using direct multi-step"""
         try:
             if target_column not in self.models:
@@ -843,44 +1775,70 @@ class LSTMModel:
             if scaler is None:
                 return {'success': False, 'error': f'Scaler not found for {target_column}'}
             
-            # Use last known values or model's stored values
-            if last_values is None:
-                if hasattr(model, 'last_values') and model.last_values is not None:
-                    last_values = model.last_values
-                else:
-                    # Generate dummy values based on scaler
-                    last_values = np.ones(self.lookback) * 0.5
-            
-            # Ensure correct shape
-            if len(last_values) < self.lookback:
-                last_values = np.pad(last_values, (self.lookback - len(last_values), 0), mode='edge')
-            else:
-                last_values = last_values[-self.lookback:]
+            last_values, timestamps = self._forecast_inputs(target_column, last_values, timestamps)
             
             # Use direct multi-step prediction
-            predictions_scaled = model.predict_multi_step(last_values, hours_ahead)
-            
-            predictions = []
-            for i, pred_scaled in enumerate(predictions_scaled):
-                pred_value = scaler.inverse_transform([[pred_scaled]])[0][0]
-                pred_time = datetime.now() + timedelta(hours=i+1)
-                predictions.append({
-                    'timestamp': pred_time.strftime("%d/%m/%Y %H:%M:%S"),
-                    'value': round(float(pred_value), 2)
-                })
-            
-            return {
-                'success': True,
-                'target': target_column,
-                'predictions': predictions
-            }
+            predictions_scaled = model.predict_multi_step(last_values, hours_ahead, recent_features, timestamps)
+            return self._prediction_result(target_column, predictions_scaled)
             
         except Exception as e:
             logger.error(f"[{self.model_type.upper()}] Prediction error for {target_column}: {e}")
             return {'success': False, 'error': str(e)}
     
-    def predict_all(self, hours_ahead: int = 24, latest_data: dict = None) -> dict:
-        """Make predictions for all trained models"""
+    def predict_many(self, inputs: dict, hours_ahead: int = 24) -> dict:
+        """
+        predict() of several targets; targets sharing the step models of a
+        global model are forecast together (predict_multi_step_shared)
+        
+        Args:
+            inputs: {target: (last_values, recent_features, timestamps)}, each
+                as in predict() (None = the window stored at training time)
+        
+        Returns:
+            {target: predict() result}
+        """
+        results = {}
+        groups = {}
+        for target in inputs:
+            model = self.models.get(target)
+            if getattr(model, 'target_id', None) is not None and model.models and self.scalers.get(target) is not None:
+                # Same booster objects = same global model
+                shared = tuple(id(step_model) for step_model in model.models.values())
+                groups.setdefault(shared, []).append(target)
+        
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            try:
+                histories, timestamps = {}, {}
+                for target in group:
+                    last_values, _, target_timestamps = inputs[target]
+                    histories[target], timestamps[target] = self._forecast_inputs(target, last_values, target_timestamps)
+                forecasts = predict_multi_step_shared(
+                    {target: self.models[target] for target in group}, histories, hours_ahead,
+                    {target: inputs[target][1] for target in group}, timestamps
+                )
+                for target in group:
+                    results[target] = self._prediction_result(target, forecasts[target])
+            except Exception as e:
+                # Forecast the group's targets one by one instead
+                logger.error(f"[{self.model_type.upper()}] Batched prediction error for {', '.join(group)}: {e}")
+        
+        for target, (last_values, recent_features, timestamps) in inputs.items():
+            if target not in results:
+                results[target] = self.predict(target, hours_ahead, last_values, recent_features, timestamps)
+        return results
+    
+    def predict_all(self, hours_ahead: int = 24, latest_data: dict = None, context: dict = None) -> dict:
+        """
+        Make predictions for all trained models
+        
+        Args:
+            hours_ahead: Number of hours to predict
+            latest_data: Latest sensor data, fills targets without a model
+            context: {target: StreamingFeatureState or recent raw values (oldest first)}
+                to forecast from; targets missing here use the window stored at training time
+        """
         try:
             if not self.models:
                 return {
@@ -890,11 +1848,26 @@ class LSTMModel:
                 }
             
             # Get predictions for each target
-            all_predictions = {}
+            inputs = {}
             for target in self.models.keys():
-                result = self.predict(target, hours_ahead)
-                if result.get('success'):
-                    all_predictions[target] = result['predictions']
+                last_values = None
+                recent_features = None
+                timestamps = None
+                values = context.get(target) if context else None
+                scaler = self.scalers.get(target)
+                if isinstance(values, StreamingFeatureState) and scaler is not None:
+                    # Features of the latest windows are already maintained incrementally
+                    if values.spec == spec_for(self.models[target]):
+                        recent_features = values.recent_features(scaler.scale_[0], scaler.min_[0])
+                    timestamps = values.window_timestamps()
+                    values = values.window()
+                if values is not None and len(values) > 0 and scaler is not None:
+                    last_values = scaler.transform(np.asarray(values, dtype=float).reshape(-1, 1)).flatten()
+                inputs[target] = (last_values, recent_features, timestamps)
+            all_predictions = {
+                target: result['predictions']
+                for target, result in self.predict_many(inputs, hours_ahead).items() if result.get('success')
+            }
             
             # Combine predictions into hourly forecasts
             predictions = []
@@ -1045,7 +2018,9 @@ class LSTMModel:
             'supported_targets': self.supported_targets,
             'lookback': self.lookback,
             'forecast_horizon': self.forecast_horizon,
-            'strategy': 'direct_multi_step'
+            'strategy': 'direct_multi_step' if self.strategy == 'direct' else 'horizon_feature',
+            'global_model': self.global_model,
+            'global_targets': self._global_targets()
         }
 
 
@@ -0,0 +1,62 @@
+"""
+Memory Budget
+Helpers for the memory-bounded training mode on low-RAM devices: the RAM
+budget (ML_MEMORY_BUDGET_MB in .env, 0 = unbounded), resident and peak memory
+of the training process, and how many rows of a given size still fit.
+"""
+
+import gc
+import os
+
+import psutil
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+
+# RAM the training process may use in MB (0 = no budget, memory-bounded mode off)
+MEMORY_BUDGET_MB = int(os.getenv("ML_MEMORY_BUDGET_MB", "0") or 0)
+
+# Windows per chunk when the feature matrix is built in memory-bounded mode
+FEATURE_CHUNK_ROWS = 10000
+
+
+def memory_bounded() -> bool:
+    """Whether the memory-bounded training mode is on"""
+    return MEMORY_BUDGET_MB > 0
+
+
+def rss_mb() -> float:
+    """Resident memory of this process in MB"""
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory in MB of this process or any finished child
+    (e.g. training pool workers); current RSS where getrusage is missing
+    """
+    if not HAS_RESOURCE:
+        return round(rss_mb(), 1)
+    # ru_maxrss is in KB on Linux
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / 1024, 1)
+
+
+def rows_within_budget(bytes_per_row: float, minimum: int = 0):
+    """
+    Rows of bytes_per_row that fit in what is left of the budget (at least
+    minimum), or None when there is no budget
+    """
+    if not memory_bounded():
+        return None
+    available = MEMORY_BUDGET_MB * 1024 * 1024 - psutil.Process().memory_info().rss
+    return max(minimum, int(available // max(1.0, bytes_per_row)))
+
+
+def release():
+    """Return freed intermediates to the allocator before the next big allocation"""
+    gc.collect()
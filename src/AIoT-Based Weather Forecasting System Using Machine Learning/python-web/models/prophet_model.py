@@ -16,15 +16,30 @@ from sklearn.preprocessing import StandardScaler
 
 # Import hàm tính giờ ngày/đêm theo mùa Việt Nam
 from models.lightgbm_model import is_daytime_vietnam, get_time_period_vietnam
+from models.resampling import RESAMPLE_INTERVAL, aggregation_for, resample
+from models.training_data import target_series
+from models.memory_budget import MEMORY_BUDGET_MB, memory_bounded, peak_rss_mb, release, rows_within_budget
 
 logger = logging.getLogger(__name__)
 
+# Approximate bytes per training row: ds, y, the three calendar columns and the
+# scaled trend matrix, plus the evaluation frame (memory-bounded training)
+ROW_BYTES = 160
+
 # Model storage paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 MODELS_DIR = BASE_DIR / "models_storage" / "prophet"
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def remove_outliers(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows whose y is outside 1.5 IQR of the quartiles"""
+    Q1 = df['y'].quantile(0.25)
+    Q3 = df['y'].quantile(0.75)
+    IQR = Q3 - Q1
+    return df[(df['y'] >= Q1 - 1.5 * IQR) & (df['y'] <= Q3 + 1.5 * IQR)]
+
+
 class SimpleSeasonalModel:
     """Simple seasonal decomposition model as fallback"""
     
@@ -75,33 +90,24 @@ class SimpleSeasonalModel:
         future_df['dayofweek'] = future_df['ds'].dt.dayofweek
         future_df['dayofyear'] = future_df['ds'].dt.dayofyear
         
-        predictions = []
+        # Get seasonal components (all rows at once)
+        hourly = future_df['hour'].map(self.hourly_pattern).fillna(self.base_value).to_numpy(dtype=float)
+        weekly = future_df['dayofweek'].map(self.weekly_pattern).fillna(self.base_value).to_numpy(dtype=float)
         
-        for _, row in future_df.iterrows():
-            hour = row['hour']
-            dow = row['dayofweek']
-            doy = row['dayofyear']
-            
-            # Get seasonal components
-            hourly = self.hourly_pattern.get(hour, self.base_value)
-            weekly = self.weekly_pattern.get(dow, self.base_value)
-            
-            # Combine patterns
-            seasonal = (hourly + weekly) / 2
-            
-            # Add trend prediction
-            X = np.array([[hour, dow, doy]])
-            X_scaled = self.scaler.transform(X)
-            trend = self.trend_model.predict(X_scaled)[0]
-            
-            # Weighted combination
-            pred = 0.6 * trend + 0.4 * seasonal
-            predictions.append(pred)
+        # Combine patterns
+        seasonal = (hourly + weekly) / 2
+        
+        # Add trend prediction
+        X = future_df[['hour', 'dayofweek', 'dayofyear']].to_numpy(dtype=float)
+        trend = self.trend_model.predict(self.scaler.transform(X))
         
-        result = future_df.copy()
+        # Weighted combination
+        predictions = 0.6 * trend + 0.4 * seasonal
+        
+        result = future_df
         result['yhat'] = predictions
-        result['yhat_lower'] = [p * 0.9 for p in predictions]
-        result['yhat_upper'] = [p * 1.1 for p in predictions]
+        result['yhat_lower'] = predictions * 0.9
+        result['yhat_upper'] = predictions * 1.1
         
         return result
 
@@ -112,6 +118,8 @@ class ProphetModel:
     def __init__(self):
         self.models = {}
         self.metrics = {}
+        # Fingerprint of the training data of each saved model (see MLManager.data_fingerprint)
+        self.fingerprints = {}
         self.model_type = "prophet"
         # Sensor data targets (6)
         self.sensor_targets = ['temperature', 'humidity', 'aqi', 'pressure', 'co2', 'dust']
@@ -120,6 +128,8 @@ class ProphetModel:
         # All supported targets (9)
         self.supported_targets = self.sensor_targets + self.weather_targets
         self.use_prophet = False  # Use fallback by default
+        # Readings are aggregated onto an hourly grid (predictions use freq='h')
+        self.resample_interval = RESAMPLE_INTERVAL
         self._load_models()
     
     def _get_model_path(self, target: str) -> Path:
@@ -136,6 +146,7 @@ class ProphetModel:
                         data = pickle.load(f)
                         self.models[target] = data.get('model')
                         self.metrics[target] = data.get('metrics', {})
+                        self.fingerprints[target] = data.get('fingerprint')
                         logger.info(f"[Prophet] Loaded model: {target}")
         except Exception as e:
             logger.error(f"[Prophet] Error loading models: {e}")
@@ -146,11 +157,16 @@ class ProphetModel:
             if target in self.models:
                 data = {
                     'model': self.models[target],
-                    'metrics': self.metrics.get(target, {})
+                    'metrics': self.metrics.get(target, {}),
+                    'fingerprint': self.fingerprints.get(target)
                 }
-                with open(self._get_model_path(target), 'wb') as f:
+                # Write then rename: a killed training job never leaves a partial pickle
+                path = self._get_model_path(target)
+                tmp_path = path.with_suffix('.tmp')
+                with open(tmp_path, 'wb') as f:
                     pickle.dump(data, f)
-                    logger.info(f"[Prophet] Saved model: {target}")
+                tmp_path.replace(path)
+                logger.info(f"[Prophet] Saved model: {target}")
         except Exception as e:
             logger.error(f"[Prophet] Error saving model {target}: {e}")
     
@@ -160,28 +176,28 @@ class ProphetModel:
         Prophet requires 'ds' (datetime) and 'y' (value) columns
         """
         try:
-            data = []
-            for record in records:
-                value = getattr(record, target_column, None)
-                if value is not None and value > 0:
-                    data.append({
-                        'ds': record.timestamp,
-                        'y': float(value)
-                    })
-            
-            if len(data) < 50:
-                logger.warning(f"[Prophet] Insufficient data for {target_column}: {len(data)} records")
+            ds, y = target_series(records, target_column)
+            if self.resample_interval and len(y) > 0:
+                ds, y = resample(ds, y, self.resample_interval, aggregation_for(target_column))
+            if memory_bounded():
+                # Memory-bounded training: float32 values, most recent rows that fit the budget
+                max_rows = rows_within_budget(ROW_BYTES, minimum=50)
+                if len(y) > max_rows:
+                    logger.info(f"[Prophet] Memory budget {MEMORY_BUDGET_MB} MB: "
+                                f"training {target_column} on the last {max_rows} of {len(y)} values")
+                    ds, y = ds[-max_rows:], y[-max_rows:]
+                y = np.asarray(y, dtype=np.float32)
+            df = pd.DataFrame({'ds': ds, 'y': y})
+            
+            if len(df) < 50:
+                logger.warning(f"[Prophet] Insufficient data for {target_column}: {len(df)} records")
                 return None
             
-            df = pd.DataFrame(data)
             df['ds'] = pd.to_datetime(df['ds'])
             df = df.sort_values('ds').reset_index(drop=True)
             
             # Remove outliers using IQR method
-            Q1 = df['y'].quantile(0.25)
-            Q3 = df['y'].quantile(0.75)
-            IQR = Q3 - Q1
-            df = df[(df['y'] >= Q1 - 1.5 * IQR) & (df['y'] <= Q3 + 1.5 * IQR)]
+            df = remove_outliers(df)
             
             logger.info(f"[Prophet] Prepared {len(df)} records for {target_column}")
             return df
@@ -190,10 +206,12 @@ class ProphetModel:
             logger.error(f"[Prophet] Error preparing data for {target_column}: {e}")
             return None
     
-    def train(self, records, target_column: str) -> dict:
+    def train(self, records, target_column: str, fingerprint: dict = None) -> dict:
         """
         Train Prophet model for a specific target variable
         Returns metrics dict with mae, rmse, r2, accuracy
+        
+        fingerprint: Optional training data fingerprint saved with the model
         """
         try:
             df = self.prepare_data(records, target_column)
@@ -234,8 +252,15 @@ class ProphetModel:
                 'rmse': round(float(rmse), 4),
                 'r2': round(float(r2), 4),
                 'accuracy': round(float(accuracy), 2),
-                'data_points': len(df)
+                'data_points': len(df),
+                'peak_rss_mb': peak_rss_mb()
             }
+            if memory_bounded():
+                self.metrics[target_column]['memory_budget_mb'] = MEMORY_BUDGET_MB
+                # Drop the training frames before the next target is loaded
+                del df, forecast, y_true, y_pred
+                release()
+            self.fingerprints[target_column] = fingerprint
             
             # Save model to disk
             self._save_model(target_column)
@@ -305,13 +330,16 @@ class ProphetModel:
                 'error': 'Failed to train any models'
             }
     
-    def train_selected(self, records, selected_targets: list) -> dict:
+    def train_selected(self, records, selected_targets: list, progress=None, fingerprints: dict = None) -> dict:
         """
         Train models for selected sensor data targets only
         
         Args:
             records: List of SensorData records from database
             selected_targets: List of targets to train (e.g., ['temperature', 'humidity'])
+            progress: Optional callback(event dict) called after each target with
+                'event' ('target_trained'), 'target', 'metrics', 'rows' and 'fraction' (0-1 of this run)
+            fingerprints: Optional {target: training data fingerprint} saved with the models
         
         Returns:
             dict with training results
@@ -339,7 +367,7 @@ class ProphetModel:
         
         for i, target in enumerate(targets_to_train, 1):
             print(f"\n[{i}/{len(targets_to_train)}] 🎯 Training: {target.upper()}")
-            result = self.train(records, target)
+            result = self.train(records, target, (fingerprints or {}).get(target))
             if result.get('success'):
                 models_trained.append(target)
                 all_metrics[target] = result['metrics']
@@ -350,6 +378,15 @@ class ProphetModel:
                 print(f"    📉 RMSE: {metrics.get('rmse', 0):.4f}")
             else:
                 print(f"    ❌ Thất bại: {result.get('error', 'Unknown error')}")
+            if progress:
+                progress({
+                    'event': 'target_trained',
+                    'target': target,
+                    'success': result.get('success', False),
+                    'metrics': result.get('metrics'),
+                    'rows': (result.get('metrics') or {}).get('data_points', 0),
+                    'fraction': i / len(targets_to_train)
+                })
         
         training_time = (datetime.now() - start_time).total_seconds()
         
@@ -428,13 +465,17 @@ class ProphetModel:
                 'error': 'Failed to train weather models'
             }
     
-    def train_weather_selected(self, weather_records, selected_targets: list) -> dict:
+    def train_weather_selected(self, weather_records, selected_targets: list, progress=None,
+                               fingerprints: dict = None) -> dict:
         """
         Train models for selected weather API targets
         
         Args:
             weather_records: List of WeatherForecasting records from database
             selected_targets: List of weather targets to train (e.g., ['wind_speed', 'rainfall'])
+            progress: Optional callback(event dict) called after each target with
+                'event' ('target_trained'), 'target', 'metrics', 'rows' and 'fraction' (0-1 of this run)
+            fingerprints: Optional {target: training data fingerprint} saved with the models
         
         Returns:
             dict with training results
@@ -457,7 +498,7 @@ class ProphetModel:
         
         for i, target in enumerate(targets_to_train, 1):
             print(f"\n[{i}/{len(targets_to_train)}] 🎯 Training: {target.upper()}")
-            result = self.train(weather_records, target)
+            result = self.train(weather_records, target, (fingerprints or {}).get(target))
             if result.get('success'):
                 models_trained.append(target)
                 all_metrics[target] = result['metrics']
@@ -468,6 +509,15 @@ class ProphetModel:
                 print(f"    📉 RMSE: {metrics.get('rmse', 0):.4f}")
             else:
                 print(f"    ❌ Thất bại: {result.get('error', 'Unknown error')}")
+            if progress:
+                progress({
+                    'event': 'target_trained',
+                    'target': target,
+                    'success': result.get('success', False),
+                    'metrics': result.get('metrics'),
+                    'rows': (result.get('metrics') or {}).get('data_points', 0),
+                    'fraction': i / len(targets_to_train)
+                })
         
         training_time = (datetime.now() - start_time).total_seconds()
         
@@ -0,0 +1,180 @@
+"""
+Time-Grid Resampling
+Turns irregular readings (Node-RED posts a sensor reading about every 60 s,
+the weather API every few minutes) into a regular series on a fixed grid
+before features are built, so one model step is one grid interval - an hour
+by default - and lookback / forecast horizons are in hours as the API says.
+"""
+
+import numpy as np
+
+# Grid interval in seconds (None disables resampling)
+RESAMPLE_INTERVAL = 3600
+
+# Empty bins between two filled ones are linearly interpolated up to this many;
+# longer gaps are left out of the series
+MAX_INTERPOLATION_GAP = 3
+
+# How readings inside one bin are combined (default: mean)
+FIELD_AGGREGATIONS = {
+    # Rain rate: short showers should still show up in the hourly value
+    'rainfall': 'max',
+}
+
+AGGREGATIONS = ('mean', 'sum', 'min', 'max', 'last')
+
+
+def aggregation_for(field: str) -> str:
+    """Aggregation used for a field"""
+    return FIELD_AGGREGATIONS.get(field, 'mean')
+
+
+def resample(timestamps, values, interval=RESAMPLE_INTERVAL, how='mean', max_gap=MAX_INTERPOLATION_GAP):
+    """
+    Aggregate readings onto a regular time grid
+
+    Args:
+        timestamps: datetime / datetime64 per reading (any order)
+        values: Reading values
+        interval: Grid interval in seconds; bins start at multiples of it
+        how: 'mean', 'sum', 'min', 'max' or 'last'
+        max_gap: Longest run of empty bins that is interpolated
+
+    Returns:
+        (bin start timestamps as datetime64[s], values), oldest first
+    """
+    if how not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {how}")
+
+    seconds = np.asarray(timestamps, dtype='datetime64[s]').astype(np.int64)
+    values = np.asarray(values, dtype=float)
+    if len(seconds) == 0:
+        return np.array([], dtype='datetime64[s]'), np.array([], dtype=float)
+
+    order = np.argsort(seconds, kind='stable')
+    seconds, values = seconds[order], values[order]
+
+    interval = int(interval)
+    bins = seconds // interval
+    # First reading of each non-empty bin
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+
+    if how == 'mean':
+        aggregated = np.add.reduceat(values, starts) / (ends - starts)
+    elif how == 'sum':
+        aggregated = np.add.reduceat(values, starts)
+    elif how == 'min':
+        aggregated = np.minimum.reduceat(values, starts)
+    elif how == 'max':
+        aggregated = np.maximum.reduceat(values, starts)
+    else:
+        aggregated = values[ends - 1]
+
+    # Place the bins on the full grid, then fill short gaps
+    positions = bins[starts] - bins[0]
+    grid = np.full(positions[-1] + 1, np.nan)
+    grid[positions] = aggregated
+    filled = np.zeros(len(grid), dtype=bool)
+    filled[positions] = True
+
+    if max_gap > 0 and len(positions) > 1:
+        empty = np.flatnonzero(~filled)
+        # Length of the gap each empty bin belongs to
+        gap_lengths = np.diff(positions) - 1
+        gap_of_bin = gap_lengths[np.searchsorted(positions, empty) - 1]
+        fill = empty[gap_of_bin <= max_gap]
+        grid[fill] = np.interp(fill, positions, aggregated)
+        filled[fill] = True
+
+    keep = np.flatnonzero(filled)
+    times = ((bins[0] + keep) * interval).astype('datetime64[s]')
+    return times, grid[keep]
+
+
+class StreamingResampler:
+    """
+    Incremental version of resample() for live readings (oldest first).
+
+    A bin is emitted once a reading from a later bin arrives, so the output
+    equals resample() over the same readings minus the still-open last bin.
+    """
+
+    def __init__(self, interval=RESAMPLE_INTERVAL, how='mean', max_gap=MAX_INTERPOLATION_GAP):
+        if how not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {how}")
+        self.interval = int(interval)
+        self.how = how
+        self.max_gap = max_gap
+        # Open bin: index and running aggregate
+        self.bin = None
+        self.total = 0.0
+        self.count = 0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.last = None
+        # Last emitted bin (for interpolation across gaps)
+        self.closed_bin = None
+        self.closed_value = None
+
+    def _value(self) -> float:
+        if self.how == 'mean':
+            return self.total / self.count
+        if self.how == 'sum':
+            return self.total
+        if self.how == 'min':
+            return self.minimum
+        if self.how == 'max':
+            return self.maximum
+        return self.last
+
+    def _close(self) -> list:
+        """Emit the open bin (plus interpolated bins of a short gap before it)"""
+        value = self._value()
+        emitted = []
+        if self.closed_bin is not None:
+            gap = self.bin - self.closed_bin - 1
+            if 0 < gap <= self.max_gap:
+                for k in range(1, gap + 1):
+                    fraction = k / (gap + 1)
+                    emitted.append((self.closed_bin + k,
+                                    self.closed_value + (value - self.closed_value) * fraction))
+        emitted.append((self.bin, value))
+        self.closed_bin = self.bin
+        self.closed_value = value
+        return emitted
+
+    def add(self, timestamp, value: float) -> list:
+        """
+        Add one reading; returns the bins it closed as
+        [(bin start datetime64[s], value), ...]
+        """
+        value = float(value)
+        index = int(np.datetime64(timestamp, 's').astype(np.int64)) // self.interval
+        emitted = []
+        if self.bin is not None and index != self.bin:
+            if index < self.bin:
+                # Out-of-order reading for an already closed bin - ignore it
+                return []
+            emitted = self._close()
+            self.bin = None
+
+        if self.bin is None:
+            self.bin = index
+            self.total, self.count = 0.0, 0
+            self.minimum, self.maximum = np.inf, -np.inf
+
+        self.total += value
+        self.count += 1
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.last = value
+
+        return [(np.datetime64(b * self.interval, 's'), v) for b, v in emitted]
+
+    def extend(self, timestamps, values) -> tuple:
+        """Add several readings; returns (bin timestamps, values) of the closed bins"""
+        closed = []
+        for timestamp, value in zip(timestamps, values):
+            closed.extend(self.add(timestamp, value))
+        return [t for t, _ in closed], [v for _, v in closed]
@@ -0,0 +1,168 @@
+"""
+Streaming Feature Engine
+Maintains the gradient boosting features of one target incrementally as
+readings arrive: a lag buffer, sliding-window Welford mean/variance and
+monotonic deques for min/max. Each update is O(1) in the window sizes and the
+current feature vector is available without touching the history.
+
+Features follow a FeatureSpec (models/feature_spec.py), so a vector produced
+here equals the row FeatureSpec.build() produces for the same window.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from models.feature_spec import FeatureSpec, VALUE, SPREAD, calendar_features, to_datetime64
+
+# Recompute the moments from the buffer this often to stop floating point drift
+RECOMPUTE_EVERY = 1024
+
+
+class RollingMoments:
+    """Mean and population variance over the last `size` values (sliding Welford)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.buffer = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def add(self, value: float):
+        if len(self.buffer) < self.size:
+            # Plain Welford while the window fills up
+            self.buffer.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.buffer)
+            self.m2 += delta * (value - self.mean)
+        else:
+            # Replace the oldest value in one step
+            old = self.buffer.popleft()
+            self.buffer.append(value)
+            old_mean = self.mean
+            self.mean += (value - old) / self.size
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+
+        self.updates += 1
+        if self.updates % RECOMPUTE_EVERY == 0:
+            values = np.fromiter(self.buffer, dtype=float)
+            self.mean = float(values.mean())
+            self.m2 = float(((values - self.mean) ** 2).sum())
+
+    @property
+    def std(self) -> float:
+        if not self.buffer:
+            return 0.0
+        return float(np.sqrt(max(self.m2, 0.0) / len(self.buffer)))
+
+
+class StreamingFeatureState:
+    """
+    Incremental feature state for one target
+
+    Args:
+        spec: FeatureSpec of the model the features are for
+        context_length: Values kept in the lag buffer (served as inference context)
+        history: Feature vectors kept for the most recent window ends
+    """
+
+    def __init__(self, spec: FeatureSpec, context_length: int = None, history: int = 1):
+        self.spec = spec
+        self.lookback = spec.lookback
+        self.values = deque(maxlen=max(self.lookback, context_length or self.lookback))
+        self.timestamps = deque(maxlen=self.values.maxlen)
+        self.count = 0
+
+        self.moments = {window: RollingMoments(min(window, self.lookback)) for window in spec.rolling_windows}
+        # (index, value) pairs; front is the window min / max
+        self.min_deque = deque()
+        self.max_deque = deque()
+
+        self.feature_history = deque(maxlen=max(1, history))
+        self.kinds = spec.column_kinds()
+
+    def update(self, value: float, timestamp=None):
+        """Add one reading (timestamp defaults to now; only used by calendar features)"""
+        value = float(value)
+        index = self.count
+        self.count += 1
+        self.values.append(value)
+        self.timestamps.append(to_datetime64(timestamp))
+
+        for moments in self.moments.values():
+            moments.add(value)
+
+        while self.min_deque and self.min_deque[-1][1] >= value:
+            self.min_deque.pop()
+        self.min_deque.append((index, value))
+        while self.max_deque and self.max_deque[-1][1] <= value:
+            self.max_deque.pop()
+        self.max_deque.append((index, value))
+        window_start = index - self.lookback + 1
+        while self.min_deque[0][0] < window_start:
+            self.min_deque.popleft()
+        while self.max_deque[0][0] < window_start:
+            self.max_deque.popleft()
+
+        if self.ready:
+            self.feature_history.append(self._current_features())
+
+    def extend(self, values, timestamps=None):
+        """Add several readings, oldest first"""
+        if timestamps is None:
+            for value in values:
+                self.update(value)
+        else:
+            for value, timestamp in zip(values, timestamps):
+                self.update(value, timestamp)
+
+    @property
+    def ready(self) -> bool:
+        """True once a full lookback window has been seen"""
+        return self.count >= self.lookback
+
+    def _current_features(self) -> np.ndarray:
+        values = self.values
+        last = len(values) - 1
+        row = [values[last - lag] for lag in range(self.lookback)]
+        for window in self.spec.rolling_windows:
+            moments = self.moments[window]
+            row.append(moments.mean)
+            row.append(moments.std if window <= self.lookback else 0.0)
+        row.append(self.min_deque[0][1])
+        row.append(self.max_deque[0][1])
+        for k in self.spec.diffs:
+            row.append(values[last] - values[last - k])
+        if self.spec.calendar:
+            row.extend(calendar_features([self.timestamps[-1]])[0])
+        return np.array(row, dtype=float)
+
+    def _scale(self, features: np.ndarray, scale: float, offset: float) -> np.ndarray:
+        # Affine scaling (e.g. MinMaxScaler) shifts values, only scales spreads, leaves calendar alone
+        scaled = features.copy()
+        value_columns = self.kinds == VALUE
+        spread_columns = self.kinds == SPREAD
+        scaled[..., value_columns] = features[..., value_columns] * scale + offset
+        scaled[..., spread_columns] = features[..., spread_columns] * scale
+        return scaled
+
+    def features(self, scale: float = 1.0, offset: float = 0.0):
+        """Current feature vector (None until ready), optionally mapped x -> x * scale + offset"""
+        if not self.feature_history:
+            return None
+        return self._scale(self.feature_history[-1], scale, offset)
+
+    def recent_features(self, scale: float = 1.0, offset: float = 0.0):
+        """Feature vectors of the most recent window ends, oldest first (None until ready)"""
+        if not self.feature_history:
+            return None
+        return self._scale(np.vstack(self.feature_history), scale, offset)
+
+    def window(self) -> np.ndarray:
+        """Buffered raw values, oldest first"""
+        return np.array(self.values, dtype=float)
+
+    def window_timestamps(self) -> np.ndarray:
+        """Timestamps of the buffered values (datetime64[s])"""
+        return np.array(self.timestamps, dtype='datetime64[s]')
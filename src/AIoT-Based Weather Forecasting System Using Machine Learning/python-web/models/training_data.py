@@ -0,0 +1,244 @@
+"""
+Columnar Training Data Loader
+Reads training data with one Core SELECT per table - only the timestamp and
+the requested columns, no ORM objects - and returns NumPy arrays. Sensor and
+weather data can be combined into one time-aligned dataset with an as-of join.
+"""
+
+import logging
+import zlib
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import desc, select
+
+from models.resampling import RESAMPLE_INTERVAL, aggregation_for, resample
+from models.sensor_data import SensorData
+from models.weather_forecasting import WeatherForecasting
+
+logger = logging.getLogger(__name__)
+
+SENSOR_COLUMNS = ['temperature', 'humidity', 'aqi', 'pressure', 'co2', 'dust']
+WEATHER_COLUMNS = ['wind_speed', 'rainfall', 'uv_index']
+
+# Weather rows are matched to a sensor reading if at most this many seconds
+# older (the weather API refreshes every 5 minutes; allow two missed updates)
+ASOF_TOLERANCE = 900
+
+SOURCES = {
+    'sensor': SensorData,
+    'weather': WeatherForecasting,
+}
+
+
+class TrainingData:
+    """
+    Columns of one table, oldest first
+
+    Attributes:
+        source: 'sensor' or 'weather'
+        timestamps: datetime64[s] array
+        columns: {name: float array} (NULL -> NaN); float32 columns (e.g. memory-mapped
+            snapshots) are kept as they are instead of being copied to float64
+    """
+
+    def __init__(self, source: str, timestamps, columns: dict):
+        self.source = source
+        self.timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+        self.columns = {name: _float_column(values) for name, values in columns.items()}
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def from_dicts(cls, source: str, rows: list, columns: list):
+        """Build from dictionaries with a 'timestamp' key (ISO string or datetime)"""
+        timestamps = np.array([
+            datetime.fromisoformat(row['timestamp']) if isinstance(row['timestamp'], str) else row['timestamp']
+            for row in rows
+        ], dtype='datetime64[s]')
+        order = np.argsort(timestamps, kind='stable')
+        data = {name: np.array([row.get(name) for row in rows], dtype=float)[order] for name in columns}
+        return cls(source, timestamps[order], data)
+
+    @property
+    def start(self):
+        """First timestamp as datetime (None if empty)"""
+        return self.timestamps[0].astype(datetime) if len(self) else None
+
+    @property
+    def end(self):
+        """Last timestamp as datetime (None if empty)"""
+        return self.timestamps[-1].astype(datetime) if len(self) else None
+
+    def rows_with(self, columns: list) -> int:
+        """Number of rows with a value in any of the columns"""
+        present = [np.isfinite(self.columns[name]) for name in columns if name in self.columns]
+        return int(np.logical_or.reduce(present).sum()) if present else 0
+
+    def series(self, column: str):
+        """(timestamps, values) of the valid (> 0) readings of one column"""
+        values = self.columns.get(column)
+        if values is None:
+            return self.timestamps[:0], np.array([], dtype=float)
+        valid = values > 0  # NaN compares False
+        return self.timestamps[valid], values[valid]
+
+
+def _float_column(values):
+    values = np.asarray(values)
+    return values if values.dtype.kind == 'f' else values.astype(float)
+
+
+def load_training_data(db, source: str, columns: list = None, limit: int = None,
+                       start: datetime = None, end: datetime = None, filter_column: str = None,
+                       dtype=float) -> TrainingData:
+    """
+    Load training columns from one table
+
+    Args:
+        db: SQLAlchemy session
+        source: 'sensor' or 'weather'
+        columns: Columns to load (default: all targets of the source)
+        limit: Keep the most recent N rows (index-backed ORDER BY timestamp DESC LIMIT N)
+        start / end: Optional time range (inclusive)
+        filter_column: Only rows where this column is > 0
+        dtype: Value dtype (np.float32 halves the columns for memory-bounded training)
+
+    Returns:
+        TrainingData, oldest first
+    """
+    model = SOURCES[source]
+    table = model.__table__
+    if columns is None:
+        columns = SENSOR_COLUMNS if source == 'sensor' else WEATHER_COLUMNS
+
+    stmt = select(table.c.timestamp, *(table.c[name] for name in columns))
+    if filter_column:
+        stmt = stmt.where(table.c[filter_column] > 0)
+    if start is not None:
+        stmt = stmt.where(table.c.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(table.c.timestamp <= end)
+    stmt = stmt.order_by(desc(table.c.timestamp))
+    if limit:
+        stmt = stmt.limit(limit)
+
+    rows = db.execute(stmt).all()
+    rows.reverse()
+
+    if rows:
+        fields = list(zip(*rows))
+        timestamps = np.array(fields[0], dtype='datetime64[s]')
+        data = {name: np.array(values, dtype=dtype) for name, values in zip(columns, fields[1:])}
+    else:
+        timestamps = np.array([], dtype='datetime64[s]')
+        data = {name: np.array([], dtype=dtype) for name in columns}
+
+    logger.info(f"Loaded {len(timestamps)} {source} rows ({', '.join(columns)})")
+    return TrainingData(source, timestamps, data)
+
+
+def asof_join(left: TrainingData, right: TrainingData, columns: list = None,
+              tolerance: float = ASOF_TOLERANCE) -> TrainingData:
+    """
+    Add columns of `right` to `left` by an as-of join on timestamps
+
+    Each left row gets, per column, the most recent right value at or before
+    its timestamp (never a later one) if it is at most `tolerance` seconds
+    older; otherwise NaN. Both sides must be sorted oldest first.
+
+    Returns:
+        TrainingData ('joint') on the left timestamps
+    """
+    left_seconds = left.timestamps.view(np.int64)
+    joined = dict(left.columns)
+
+    for name in columns or list(right.columns):
+        values = right.columns[name]
+        present = np.isfinite(values)
+        right_seconds = right.timestamps[present].view(np.int64)
+        right_values = values[present]
+
+        matched = np.full(len(left_seconds), np.nan, dtype=values.dtype)
+        index = np.searchsorted(right_seconds, left_seconds, side='right') - 1
+        valid = index >= 0
+        valid[valid] = left_seconds[valid] - right_seconds[index[valid]] <= tolerance
+        matched[valid] = right_values[index[valid]]
+        joined[name] = matched
+
+    return TrainingData('joint', left.timestamps, joined)
+
+
+def load_joint_training_data(db, limit: int = None, start: datetime = None, end: datetime = None,
+                             sensor_columns: list = None, weather_columns: list = None,
+                             tolerance: float = ASOF_TOLERANCE, dtype=float) -> TrainingData:
+    """
+    Sensor readings with the weather columns aligned to their timestamps
+
+    Loads the sensor window (most recent N rows or a time range), then the
+    weather rows covering that window in a single query, and joins them as-of.
+
+    Returns:
+        TrainingData ('joint') with sensor and weather columns, oldest first
+    """
+    sensor = load_training_data(db, 'sensor', sensor_columns, limit, start, end, filter_column='temperature', dtype=dtype)
+    if weather_columns is None:
+        weather_columns = WEATHER_COLUMNS
+    if len(sensor) == 0 or not weather_columns:
+        return TrainingData('joint', sensor.timestamps, sensor.columns)
+
+    weather = load_training_data(
+        db, 'weather', weather_columns,
+        start=(sensor.timestamps[0] - np.timedelta64(int(tolerance), 's')).astype(datetime),
+        end=sensor.end,
+        dtype=dtype
+    )
+    return asof_join(sensor, weather, weather_columns, tolerance)
+
+
+def target_series(records, target: str):
+    """
+    (timestamps as datetime64[s], values) of the valid (> 0) readings of a
+    target, from TrainingData or a list of ORM records
+    """
+    if isinstance(records, TrainingData):
+        return records.series(target)
+
+    timestamps, values = [], []
+    for record in records:
+        value = getattr(record, target, None)
+        if value is not None and value > 0:
+            timestamps.append(record.timestamp)
+            values.append(float(value))
+    return np.array(timestamps, dtype='datetime64[s]'), np.array(values, dtype=float)
+
+
+def data_fingerprint(records, target: str, interval=RESAMPLE_INTERVAL) -> dict:
+    """
+    Cheap fingerprint of the training window of one target
+
+    Row count and first / last timestamp of the valid readings plus a CRC32 of
+    the grid rollups the models train on (values rounded to 4 decimals), so two
+    loads of the same unchanged data give equal fingerprints.
+
+    Returns:
+        {'rows', 'start', 'end', 'checksum'} (JSON serializable)
+    """
+    timestamps, values = target_series(records, target)
+    if len(values) == 0:
+        return {'rows': 0, 'start': None, 'end': None, 'checksum': None}
+
+    if interval:
+        timestamps_grid, rollups = resample(timestamps, values, interval, aggregation_for(target))
+    else:
+        timestamps_grid, rollups = timestamps, values
+    checksum = zlib.crc32(np.ascontiguousarray(timestamps_grid, dtype='datetime64[s]').view(np.int64).tobytes())
+    checksum = zlib.crc32(np.round(rollups, 4).tobytes(), checksum)
+
+    return {
+        'rows': int(len(values)),
+        'start': str(timestamps.min()),
+        'end': str(timestamps.max()),
+        'checksum': f"{checksum:08x}"
+    }
@@ -0,0 +1,161 @@
+"""
+Training Executor
+Runs independent training jobs (e.g. one gradient boosting model per target
+and forecast step) on a process pool. Input arrays are placed in shared memory
+once and attached by every worker instead of being pickled per job; results
+come back in job order so merging them is deterministic.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Worker processes (ML_TRAINING_WORKERS in .env; 0 = one per CPU core, 1 = train in-process)
+TRAINING_WORKERS = int(os.getenv("ML_TRAINING_WORKERS", "0") or 0) or os.cpu_count() or 1
+
+# Below this many training rows (summed over jobs) the jobs run in-process:
+# starting workers (importing numpy / sklearn / lightgbm) takes seconds on a Pi
+PARALLEL_MIN_ROWS = 50000
+
+
+class SharedArrays:
+    """Copies {name: ndarray} into shared memory blocks for the lifetime of a with-block"""
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        self.blocks = []
+        self.specs = {}
+
+    def __enter__(self):
+        for name, array in self.arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+        return self
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def _attach(specs: dict):
+    """Worker side: map the shared blocks as read-only arrays"""
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        blocks.append(block)
+        arrays[name] = array
+    return blocks, arrays
+
+
+def _run_job(fn, job, specs: dict):
+    blocks, arrays = _attach(specs)
+    try:
+        return fn(job, arrays)
+    finally:
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+class TrainingExecutor:
+    """
+    Fan out fn(job, arrays) over a process pool
+
+    fn must be a module-level function (it is pickled by reference) and must
+    not keep references to the arrays in its result.
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = max(1, workers or TRAINING_WORKERS)
+
+    def threads_per_job(self, jobs: int, rows: int = None) -> int:
+        """Threads each job may use without oversubscribing the cores (None = library default)"""
+        if not self.use_pool(jobs, rows):
+            return None
+        processes = min(self.workers, jobs)
+        return max(1, (os.cpu_count() or 1) // processes)
+
+    def use_pool(self, jobs: int, rows: int = None) -> bool:
+        """Whether a run of this size goes to worker processes"""
+        if self.workers <= 1 or jobs <= 1:
+            return False
+        return rows is None or rows >= PARALLEL_MIN_ROWS
+
+    def run(self, fn, jobs: list, arrays: dict, rows: int = None, on_result=None, deadline: float = None) -> list:
+        """
+        Run every job; returns results in job order (an Exception instance in
+        place of the result for a job that raised)
+
+        Args:
+            rows: Total training rows of the jobs (small runs stay in-process)
+            on_result: Optional callback(index, result) as each job finishes
+                (completion order; called in the calling thread)
+            deadline: Optional time.monotonic() value; jobs not started by then
+                are skipped (TimeoutError result), running ones still finish
+        """
+        results = [None] * len(jobs)
+
+        if not self.use_pool(len(jobs), rows):
+            for index, job in enumerate(jobs):
+                if deadline is not None and time.monotonic() >= deadline:
+                    results[index] = TimeoutError("Deadline passed before the job started")
+                    continue
+                try:
+                    results[index] = fn(job, arrays)
+                except Exception as e:
+                    results[index] = e
+                if on_result:
+                    on_result(index, results[index])
+            return results
+
+        processes = min(self.workers, len(jobs))
+        logger.info(f"Training {len(jobs)} jobs on {processes} worker processes")
+        # spawn: forking a server with running threads (scheduler, publisher) is unsafe
+        with SharedArrays(arrays) as shared, ProcessPoolExecutor(
+            max_workers=processes, mp_context=get_context("spawn")
+        ) as pool:
+            futures = {pool.submit(_run_job, fn, job, shared.specs): index for index, job in enumerate(jobs)}
+            remaining = set(futures)
+            try:
+                while remaining:
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    try:
+                        completed = next(as_completed(remaining, timeout=timeout))
+                    except TimeoutError:
+                        # Queued jobs are dropped; the ones already running finish
+                        for future in remaining:
+                            if future.cancel():
+                                results[futures[future]] = TimeoutError("Deadline passed before the job started")
+                        remaining = {future for future in remaining if not future.cancelled()}
+                        deadline = None
+                        continue
+                    remaining.discard(completed)
+                    index = futures[completed]
+                    try:
+                        results[index] = completed.result()
+                    except Exception as e:
+                        results[index] = e
+                    if on_result:
+                        on_result(index, results[index])
+            except BaseException:
+                # Job cancelled (SystemExit from SIGTERM): start nothing new before
+                # the pool and the shared blocks are torn down
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+            return results
+
+# Global training executor instance
+training_executor = TrainingExecutor()
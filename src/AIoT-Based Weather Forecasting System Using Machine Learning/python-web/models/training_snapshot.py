@@ -0,0 +1,282 @@
+"""
+Columnar Training Snapshots
+Exports the sensor and weather tables to append-only column files - int64
+epoch seconds plus one float32 file per field - that training maps read-only
+instead of querying MySQL. A snapshot load is a set of memory maps (slicing
+by row count or time range copies nothing), so resident memory only grows by
+the pages training actually touches.
+
+Layout (models_storage/snapshots/<source>/):
+    timestamps.i64, <column>.f32    raw little-endian columns, oldest first
+    meta.json                       committed row count and export watermark
+
+Rows are appended in (timestamp, id) order; a row inserted later with an
+older timestamp than the watermark is only picked up by a rebuild. Deleting
+rows marks the snapshots for a rebuild on the next export (mark_for_rebuild).
+"""
+
+import json
+import logging
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import and_, or_, select
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # Windows: exports are only serialized within one process
+    HAS_FCNTL = False
+
+from models.training_data import (
+    ASOF_TOLERANCE, SENSOR_COLUMNS, SOURCES, WEATHER_COLUMNS, TrainingData, asof_join
+)
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SNAPSHOT_DIR = BASE_DIR / "models_storage" / "snapshots"
+
+# Rows per SELECT while exporting (bounds the memory of an export)
+EXPORT_BATCH = 20000
+
+TIMESTAMP_DTYPE = np.dtype('<i8')
+VALUE_DTYPE = np.dtype('<f4')
+
+# Present while the snapshots still hold deleted rows; the next export rebuilds
+REBUILD_MARKER = SNAPSHOT_DIR / "rebuild"
+
+# One export at a time: the lock within a process (nightly job and API), the
+# lock file across processes (training job workers catch up before loading)
+_export_lock = threading.Lock()
+EXPORT_LOCK_FILE = SNAPSHOT_DIR / "export.lock"
+
+
+class ColumnSnapshot:
+    """Append-only column files of one source ('sensor' or 'weather')"""
+
+    def __init__(self, source: str, directory: Path = None):
+        self.source = source
+        self.directory = Path(directory or SNAPSHOT_DIR) / source
+        self.columns = SENSOR_COLUMNS if source == 'sensor' else WEATHER_COLUMNS
+
+    def _path(self, name: str) -> Path:
+        if name == 'timestamps':
+            return self.directory / "timestamps.i64"
+        return self.directory / f"{name}.f32"
+
+    def meta(self) -> dict:
+        """Committed state ({'rows': 0} if never exported)"""
+        try:
+            with open(self.directory / "meta.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'rows': 0}
+
+    def _save_meta(self, meta: dict):
+        tmp = self.directory / "meta.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, default=str)
+        tmp.replace(self.directory / "meta.json")
+
+    def _truncate(self, rows: int):
+        """Drop bytes past the committed rows (an export interrupted mid-append)"""
+        for name, dtype in [('timestamps', TIMESTAMP_DTYPE)] + [(c, VALUE_DTYPE) for c in self.columns]:
+            path = self._path(name)
+            if path.exists() and path.stat().st_size != rows * dtype.itemsize:
+                with open(path, 'r+b') as f:
+                    f.truncate(rows * dtype.itemsize)
+
+    def export(self, db, rebuild: bool = False) -> dict:
+        """
+        Append the rows newer than the last export
+
+        Args:
+            db: SQLAlchemy session
+            rebuild: Start over from an empty snapshot (picks up deleted or
+                late-inserted rows)
+
+        Returns:
+            {'source', 'rows', 'appended', 'last_timestamp'}
+        """
+        if rebuild:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        meta = self.meta()
+        rows = meta.get('rows', 0)
+        self._truncate(rows)
+        last_timestamp = meta.get('last_timestamp')
+        last = datetime.fromisoformat(last_timestamp) if last_timestamp else None
+        # Timestamps have second precision: the id keeps rows of the same second
+        # apart (snapshots exported before it was stored resume after `last`)
+        last_id = meta.get('last_id')
+
+        table = SOURCES[self.source].__table__
+        appended = 0
+        files = {'timestamps': open(self._path('timestamps'), 'ab')}
+        files.update({name: open(self._path(name), 'ab') for name in self.columns})
+        try:
+            while True:
+                stmt = select(table.c.id, table.c.timestamp, *(table.c[name] for name in self.columns))
+                if last is not None and last_id is not None:
+                    stmt = stmt.where(or_(
+                        table.c.timestamp > last,
+                        and_(table.c.timestamp == last, table.c.id > last_id)
+                    ))
+                elif last is not None:
+                    stmt = stmt.where(table.c.timestamp > last)
+                batch = db.execute(stmt.order_by(table.c.timestamp, table.c.id).limit(EXPORT_BATCH)).all()
+                if not batch:
+                    break
+
+                fields = list(zip(*batch))
+                timestamps = np.array(fields[1], dtype='datetime64[s]').astype(TIMESTAMP_DTYPE)
+                files['timestamps'].write(timestamps.tobytes())
+                for name, values in zip(self.columns, fields[2:]):
+                    files[name].write(np.array(values, dtype=float).astype(VALUE_DTYPE).tobytes())
+
+                appended += len(batch)
+                last_id = fields[0][-1]
+                last = fields[1][-1]
+                if len(batch) < EXPORT_BATCH:
+                    break
+        finally:
+            for f in files.values():
+                f.close()
+
+        # Rows become visible to readers only once the meta file says so
+        meta = {
+            'source': self.source,
+            'columns': self.columns,
+            'rows': rows + appended,
+            'first_timestamp': meta.get('first_timestamp') or (self._first_timestamp().isoformat() if rows + appended else None),
+            'last_timestamp': last.isoformat() if last is not None else None,
+            'last_id': last_id,
+            'exported_at': datetime.now().isoformat()
+        }
+        self._save_meta(meta)
+        logger.info(f"Snapshot {self.source}: appended {appended} rows ({meta['rows']} total)")
+        return {'source': self.source, 'rows': meta['rows'], 'appended': appended, 'last_timestamp': meta['last_timestamp']}
+
+    def _first_timestamp(self):
+        first = np.fromfile(self._path('timestamps'), dtype=TIMESTAMP_DTYPE, count=1)
+        return first[0].astype('datetime64[s]').astype(datetime) if len(first) else None
+
+    def _map(self, name: str, dtype: np.dtype, rows: int):
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(name), dtype=dtype, mode='r', shape=(rows,))
+
+    def load(self, columns: list = None, limit: int = None,
+             start: datetime = None, end: datetime = None) -> TrainingData:
+        """
+        Memory-mapped TrainingData of the committed rows
+
+        Args:
+            columns: Columns to map (default: all of the source)
+            limit: Keep the most recent N rows (of the time range)
+            start / end: Optional time range (inclusive)
+        """
+        rows = self.meta().get('rows', 0)
+        timestamps = self._map('timestamps', TIMESTAMP_DTYPE, rows).view('datetime64[s]')
+
+        # Binary search on the mapped timestamps touches a few pages only
+        lo, hi = 0, rows
+        if start is not None:
+            lo = int(np.searchsorted(timestamps, np.datetime64(start, 's'), side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(timestamps, np.datetime64(end, 's'), side='right'))
+        if limit:
+            lo = max(lo, hi - limit)
+        lo = min(lo, hi)
+
+        data = {name: self._map(name, VALUE_DTYPE, rows)[lo:hi] for name in (columns or self.columns)}
+        logger.info(f"Mapped {hi - lo} {self.source} snapshot rows ({', '.join(data)})")
+        return TrainingData(self.source, timestamps[lo:hi], data)
+
+
+@contextmanager
+def _exclusive_export():
+    """Hold the export lock of this process and of the snapshot directory"""
+    with _export_lock:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        with open(EXPORT_LOCK_FILE, 'a') as lock_file:
+            if HAS_FCNTL:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if HAS_FCNTL:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def mark_for_rebuild():
+    """Rows were deleted: the next export starts over instead of appending"""
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    REBUILD_MARKER.touch()
+
+
+def rebuild_pending() -> bool:
+    return REBUILD_MARKER.exists()
+
+
+def export_snapshots(db, rebuild: bool = False) -> dict:
+    """Export both sources (rebuilding if marked); returns {source: export result}"""
+    with _exclusive_export():
+        # Consumed before exporting: a delete during the export marks again
+        if rebuild_pending():
+            REBUILD_MARKER.unlink()
+            rebuild = True
+        try:
+            return {source: ColumnSnapshot(source).export(db, rebuild) for source in SOURCES}
+        except Exception:
+            if rebuild:
+                mark_for_rebuild()
+            raise
+
+
+def snapshot_info() -> dict:
+    """Meta of both snapshots plus their size on disk"""
+    info = {}
+    for source in SOURCES:
+        snapshot = ColumnSnapshot(source)
+        meta = snapshot.meta()
+        size = sum(path.stat().st_size for path in snapshot.directory.glob('*')) if snapshot.directory.is_dir() else 0
+        info[source] = {**meta, 'size_mb': round(size / 1024 / 1024, 2), 'rebuild_pending': rebuild_pending()}
+    return info
+
+
+def has_snapshot() -> bool:
+    """Whether the sensor snapshot has rows"""
+    return ColumnSnapshot('sensor').meta().get('rows', 0) > 0
+
+
+def load_joint_snapshot(limit: int = None, start: datetime = None, end: datetime = None,
+                        sensor_columns: list = None, weather_columns: list = None,
+                        tolerance: float = ASOF_TOLERANCE) -> TrainingData:
+    """
+    Snapshot counterpart of load_joint_training_data(): sensor columns mapped
+    as-is, weather columns as-of joined onto the sensor timestamps
+
+    Unlike the MySQL loader, rows are not filtered on temperature > 0 first
+    (filtering would copy every column); invalid readings are dropped per
+    target by TrainingData.series().
+    """
+    sensor = ColumnSnapshot('sensor').load(sensor_columns, limit, start, end)
+    if weather_columns is None:
+        weather_columns = WEATHER_COLUMNS
+    if len(sensor) == 0 or not weather_columns:
+        return TrainingData('joint', sensor.timestamps, sensor.columns)
+
+    weather = ColumnSnapshot('weather').load(
+        weather_columns,
+        start=(sensor.timestamps[0] - np.timedelta64(int(tolerance), 's')).astype(datetime),
+        end=sensor.end
+    )
+    return asof_join(sensor, weather, weather_columns, tolerance)
@@ -0,0 +1,237 @@
+"""
+Realtime Publisher
+Single in-process publisher that pushes new readings, stats deltas and
+"forecast updated" events to every connected dashboard (SSE / WebSocket)
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# How often the publisher checks the database watermark (seconds)
+POLL_INTERVAL = 5
+# Events kept per subscriber before the oldest ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class RealtimePublisher:
+    """
+    Polls the database once per interval on behalf of all subscribers.
+
+    Each poll is a cheap MAX(timestamp) query on the indexed timestamp column;
+    the full reading and the stats are only fetched when the watermark moves
+    (or after reset_stats), so N open dashboards cost one DB read per new reading.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.subscribers = set()
+        self.running = False
+        self.task = None
+        self.loop = None
+
+        # Last event of each type, replayed to new subscribers
+        self.last_events = {}
+
+        # Watermarks
+        self.sensor_watermark = None
+        self.weather_watermark = None
+        self.forecast_version = None
+
+        # Record counts of the last published stats event
+        self.stats = None
+
+    # ===== Subscribers =====
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new subscriber and prime it with the latest known events"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        for event, data in self.last_events.items():
+            queue.put_nowait((event, data))
+        self.subscribers.add(queue)
+        logger.debug(f"Realtime subscriber added ({len(self.subscribers)} total)")
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber"""
+        self.subscribers.discard(queue)
+        logger.debug(f"Realtime subscriber removed ({len(self.subscribers)} total)")
+
+    def publish(self, event: str, data: dict):
+        """
+        Fan out an event to all subscribers.
+        Safe to call from other threads (e.g. the training scheduler).
+        """
+        if self.loop is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self._dispatch(event, data)
+        else:
+            self.loop.call_soon_threadsafe(self._dispatch, event, data)
+
+    def _dispatch(self, event: str, data: dict):
+        """Push an event into every subscriber queue (event loop thread only)"""
+        self.last_events[event] = data
+        for queue in list(self.subscribers):
+            if queue.full():
+                # Slow consumer - drop its oldest event rather than block everyone
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait((event, data))
+
+    # ===== Polling =====
+
+    def reset_stats(self):
+        """
+        Drop the published counts so the next poll recounts and republishes
+        (call after rows were deleted - deleting old rows does not move the
+        watermarks)
+        """
+        self.stats = None
+
+    def _poll_database(self) -> list:
+        """
+        Check watermarks and build the events to publish.
+        Runs in a worker thread (blocking DB calls).
+        """
+        from database import SessionLocal
+        from models.sensor_data import SensorData
+        from models.weather_forecasting import WeatherForecasting
+        from sqlalchemy import desc, func
+
+        events = []
+        db = SessionLocal()
+        try:
+            sensor_mark = db.query(func.max(SensorData.timestamp)).scalar()
+            weather_mark = db.query(func.max(WeatherForecasting.timestamp)).scalar()
+
+            if (self.stats is not None and sensor_mark == self.sensor_watermark
+                    and weather_mark == self.weather_watermark):
+                return events
+
+            # Latest valid reading combined with latest weather data (same as /api/realtime-data)
+            sensor_data = db.query(SensorData).filter(
+                SensorData.temperature > 0
+            ).order_by(desc(SensorData.timestamp)).first()
+            weather_data = db.query(WeatherForecasting).order_by(desc(WeatherForecasting.timestamp)).first()
+
+            if sensor_data:
+                reading = sensor_data.to_dict()
+                if weather_data:
+                    weather_dict = weather_data.to_dict()
+                    weather_dict.pop('timestamp', None)
+                    weather_dict.pop('created_at', None)
+                    reading.update(weather_dict)
+                events.append(('reading', reading))
+
+            # Stats: recounted whenever a watermark moves (deltas would miss rows
+            # sharing the watermark's second and never see deletions)
+            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            self.stats = {
+                'sensor_records': db.query(func.count(SensorData.id)).scalar() or 0,
+                'weather_records': db.query(func.count(WeatherForecasting.id)).scalar() or 0,
+                'records_today': db.query(func.count(SensorData.id)).filter(
+                    SensorData.timestamp >= today_start
+                ).scalar() or 0
+            }
+
+            total = self.stats['sensor_records'] + self.stats['weather_records']
+            events.append(('stats', {
+                'active_sensors': 5,
+                'total_records': total,
+                'sensor_records': self.stats['sensor_records'],
+                'weather_records': self.stats['weather_records'],
+                'records_today': self.stats['records_today'],
+                'last_update': sensor_mark.strftime("%H:%M:%S %d/%m/%Y") if sensor_mark else "N/A",
+                'system_status': "Hoạt động",
+                'database_size': f"{total * 0.001:.1f} MB"
+            }))
+
+            self.sensor_watermark = sensor_mark
+            self.weather_watermark = weather_mark
+        finally:
+            db.close()
+
+        return events
+
+    def _check_forecast_version(self):
+        """Detect retraining by watching the ML manager's training history"""
+        from ml_utils import ml_manager
+
+        version = ml_manager.get_model_version()
+        if version == self.forecast_version:
+            return None
+
+        first_check = self.forecast_version is None
+        self.forecast_version = version
+        if first_check:
+            return None
+        history = ml_manager.training_history
+        return {
+            'model_type': ml_manager.current_model_type,
+            'model_version': version,
+            'last_trained': history[-1].get('timestamp') if history else None,
+            'timestamp': datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        }
+
+    async def _run(self):
+        """Background polling loop"""
+        logger.info("🔄 Realtime publisher started")
+        while self.running:
+            try:
+                events = await self.loop.run_in_executor(None, self._poll_database)
+                for event, data in events:
+                    self._dispatch(event, data)
+
+                forecast_event = self._check_forecast_version()
+                if forecast_event:
+                    self._dispatch('forecast', forecast_event)
+            except Exception as e:
+                logger.error(f"Realtime publisher error: {e}")
+
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        """Start the publisher on the running event loop"""
+        if self.running:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.running = True
+        self.task = self.loop.create_task(self._run())
+
+    def stop(self):
+        """Stop the publisher"""
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        logger.info("Realtime publisher stopped")
+
+
+def format_sse(event: str, data: dict, event_id=None) -> str:
+    """Encode one Server-Sent Events message (event_id lets a reconnecting client resume)"""
+    message = f"id: {event_id}\n" if event_id is not None else ""
+    return message + f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+# Global publisher instance
+realtime_publisher = RealtimePublisher()
+
+
+def start_publisher():
+    """Start the realtime publisher (call from the app startup event)"""
+    realtime_publisher.start()
+
+
+def stop_publisher():
+    """Stop the realtime publisher"""
+    realtime_publisher.stop()
@@ -1,9 +1,11 @@
 """
 API Routes - RESTful API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, func, text
+from sqlalchemy import desc, and_, or_, func, text
 from typing import List, Optional
 from datetime import datetime, timedelta
 import random
@@ -14,12 +16,24 @@ import os
 import subprocess
 import json
 import math
+import asyncio
 from pathlib import Path
 
-from database import get_db
+from database import get_db, SessionLocal
 from models.sensor_data import SensorData
 from models.weather_forecasting import WeatherForecasting
+from models.dataset_cache import dataset_cache
+from models.training_snapshot import mark_for_rebuild, snapshot_info
+from models.backtesting import load_report
+from models.hyperparameter_search import (
+    DEFAULT_BUDGET_SECONDS, DEFAULT_TRIALS, SEARCH_SPACE, clear_best_params, load_best_params
+)
 from ml_utils import ml_trainer
+from training_jobs import training_jobs, MIN_TRAINING_ROWS, TRAINING_DATA_SOURCE
+from snapshot_exporter import snapshot_exporter, SNAPSHOT_HOUR
+from forecast_materializer import forecast_materializer
+from realtime_publisher import realtime_publisher, format_sse
+from context_provider import context_provider
 
 router = APIRouter(prefix="/api")
 logger = logging.getLogger(__name__)
@@ -89,6 +103,54 @@ def save_settings(settings):
 
 # ===== Sensor Data Endpoints =====
 
+def _epoch_ms(dt: datetime) -> int:
+    """Convert a (naive, server-local) datetime to an epoch-milliseconds cursor"""
+    return int(dt.timestamp() * 1000)
+
+
+def _from_epoch_ms(ms: int) -> datetime:
+    """Convert an epoch-milliseconds cursor back to a naive server-local datetime"""
+    return datetime.fromtimestamp(ms / 1000)
+
+
+def _after_cursor(model, since: int, since_id: Optional[int] = None):
+    """
+    Keyset filter for rows after a (timestamp, id) delta cursor.
+    Timestamps only have second precision, so the id breaks ties between rows
+    of the same second; without an id the comparison falls back to timestamp only.
+    """
+    cursor_time = _from_epoch_ms(since)
+    if since_id is None:
+        return model.timestamp > cursor_time
+    return or_(
+        model.timestamp > cursor_time,
+        and_(model.timestamp == cursor_time, model.id > since_id)
+    )
+
+
+def _delta_page(query, model, since: int, since_id: Optional[int], limit: int) -> dict:
+    """
+    One page of rows after the cursor, oldest first. The cursor moves to the
+    last row returned and `has_more` tells the client to ask again right away.
+    """
+    records = query.filter(
+        _after_cursor(model, since, since_id)
+    ).order_by(model.timestamp, model.id).limit(limit + 1).all()
+    
+    has_more = len(records) > limit
+    records = records[:limit]
+    
+    return {
+        "since": since,
+        "since_id": since_id,
+        "cursor": _epoch_ms(records[-1].timestamp) if records else since,
+        "cursor_id": records[-1].id if records else since_id,
+        "has_more": has_more,
+        "limit": limit,
+        "records": [record.to_dict() for record in records]
+    }
+
+
 @router.get("/sensor-data/latest")
 async def get_latest_sensor_data(db: Session = Depends(get_db)):
     """Get the latest sensor data record - Real data from database"""
@@ -114,6 +176,8 @@ async def get_sensor_data_history(
     offset: int = Query(0, ge=0),
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    since: Optional[int] = Query(None, ge=0, description="Only return records newer than this cursor (epoch ms)"),
+    since_id: Optional[int] = Query(None, ge=0, description="Id of the last record seen at the `since` timestamp"),
     db: Session = Depends(get_db)
 ):
     """
@@ -123,7 +187,13 @@ async def get_sensor_data_history(
     - **offset**: Number of records to skip
     - **start_date**: Filter from date (format: YYYY-MM-DD)
     - **end_date**: Filter to date (format: YYYY-MM-DD)
+    - **since**: Delta mode - only records after this cursor (epoch ms), oldest first, plus a new cursor
+    - **since_id**: Delta mode - `cursor_id` of the previous call, so rows of the same second are not lost
     """
+    if since is not None:
+        # Delta mode: skip the full COUNT(*) and only return rows after the cursor
+        return _delta_page(db.query(SensorData), SensorData, since, since_id, limit)
+    
     query = db.query(SensorData)
     
     # Apply date filters if provided
@@ -145,12 +215,21 @@ async def get_sensor_data_history(
     total = query.count()
     
     # Get paginated results
-    records = query.order_by(desc(SensorData.timestamp)).offset(offset).limit(limit).all()
+    records = query.order_by(desc(SensorData.timestamp), desc(SensorData.id)).offset(offset).limit(limit).all()
+    
+    # The first page of an open-ended query starts at the newest row, so it can
+    # seed a delta cursor for later `since` refreshes
+    cursor = cursor_id = None
+    if records and offset == 0 and not end_date:
+        cursor = _epoch_ms(records[0].timestamp)
+        cursor_id = records[0].id
     
     return {
         "total": total,
         "limit": limit,
         "offset": offset,
+        "cursor": cursor,
+        "cursor_id": cursor_id,
         "records": [record.to_dict() for record in records]
     }
 
@@ -224,9 +303,14 @@ async def get_latest_weather_data(db: Session = Depends(get_db)):
 async def get_weather_data_history(
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    since: Optional[int] = Query(None, ge=0, description="Only return records newer than this cursor (epoch ms)"),
+    since_id: Optional[int] = Query(None, ge=0, description="Id of the last record seen at the `since` timestamp"),
     db: Session = Depends(get_db)
 ):
-    """Get weather data history with pagination"""
+    """Get weather data history with pagination (or only newer rows when `since` is given)"""
+    if since is not None:
+        return _delta_page(db.query(WeatherForecasting), WeatherForecasting, since, since_id, limit)
+    
     query = db.query(WeatherForecasting)
     total = query.count()
     records = query.order_by(desc(WeatherForecasting.timestamp)).offset(offset).limit(limit).all()
@@ -259,31 +343,90 @@ async def get_realtime_data(db: Session = Depends(get_db)):
         if not sensor_data:
             raise HTTPException(status_code=404, detail="Không có dữ liệu cảm biến")
         
-        sensor_dict = sensor_data.to_dict()
-        
-        # Weather data is optional
-        if weather_data:
-            weather_dict = weather_data.to_dict()
-            # Remove timestamp from weather to avoid conflict
-            weather_dict.pop('timestamp', None)
-            weather_dict.pop('created_at', None)
-            combined = {**sensor_dict, **weather_dict}
-        else:
-            combined = sensor_dict
-        
-        return combined
+        return _combine_realtime(sensor_data, weather_data)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _combine_realtime(sensor_data: SensorData, weather_data: Optional[WeatherForecasting]) -> dict:
+    """Merge the latest sensor row with the latest weather row"""
+    sensor_dict = sensor_data.to_dict()
+    
+    # Weather data is optional
+    if weather_data:
+        weather_dict = weather_data.to_dict()
+        # Remove timestamp from weather to avoid conflict
+        weather_dict.pop('timestamp', None)
+        weather_dict.pop('created_at', None)
+        return {**sensor_dict, **weather_dict}
+    return sensor_dict
+
+
+# ===== Realtime Push Channel =====
+
+# Keep-alive comment interval so proxies don't close idle streams (seconds)
+STREAM_KEEPALIVE = 15
+
+
+@router.get("/stream")
+async def stream_events(request: Request):
+    """
+    Server-Sent Events stream of realtime updates
+    
+    Events:
+    - **reading**: latest combined sensor + weather reading (same shape as /api/realtime-data)
+    - **stats**: system stats (same shape as /api/system-stats)
+    - **forecast**: models were retrained, forecasts should be reloaded
+    """
+    queue = realtime_publisher.subscribe()
+    
+    async def event_generator():
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                    yield format_sse(event, data)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            realtime_publisher.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket):
+    """WebSocket variant of /api/stream - sends {"event": ..., "data": ...} messages"""
+    await websocket.accept()
+    queue = realtime_publisher.subscribe()
+    try:
+        while True:
+            event, data = await queue.get()
+            await websocket.send_json({"event": event, "data": data})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        realtime_publisher.unsubscribe(queue)
+
+
 # ===== Charts Data Endpoints =====
 
 @router.get("/charts-data")
 async def get_charts_data(
     time_range: str = Query("24h", regex="^(today|24h|7d|30d)$"),
     sensors: Optional[str] = Query(None),
+    since: Optional[int] = Query(None, ge=0, description="Only return points newer than this cursor (epoch ms)"),
+    since_id: Optional[int] = Query(None, ge=0, description="Id of the last sensor record seen at `since`"),
+    weather_since: Optional[int] = Query(None, ge=0, description="Weather table cursor (epoch ms), defaults to `since`"),
+    weather_since_id: Optional[int] = Query(None, ge=0, description="Id of the last weather record seen at `weather_since`"),
     db: Session = Depends(get_db)
 ):
     """
@@ -291,6 +434,13 @@ async def get_charts_data(
     
     - **time_range**: Time range for data (today, 24h, 7d, or 30d)
     - **sensors**: Comma-separated list of sensors (e.g., "temperature,humidity,co2,wind_speed,rainfall,uv_index")
+    - **since**: Delta mode - sensor cursor (epoch ms) returned by the previous call. Only newer
+      points are returned, together with new cursors and the current `window_start`
+      so the client can drop points that fell out of the time range. Use `since=0` for
+      the initial full load.
+    - **since_id**, **weather_since**, **weather_since_id**: the other cursor fields of the
+      previous call (`cursor_id`, `weather_cursor`, `weather_cursor_id`). Each table keeps
+      its own (timestamp, id) cursor since the two are written independently.
     """
     # Calculate time range
     if time_range == "today":
@@ -302,6 +452,8 @@ async def get_charts_data(
         hours = hours_map.get(time_range, 24)
         cutoff_time = datetime.now() - timedelta(hours=hours)
     
+    window_start = cutoff_time
+    
     # Default sensors if not specified
     if not sensors:
         sensor_list = ["temperature", "humidity", "pressure", "co2", "dust", "wind_speed", "rainfall", "uv_index"]
@@ -312,16 +464,27 @@ async def get_charts_data(
     sensor_data_fields = ["temperature", "humidity", "pressure", "co2", "dust", "aqi"]
     weather_data_fields = ["wind_speed", "rainfall", "uv_index"]
     
+    # In delta mode each table starts after its own cursor, clipped to the time range
+    sensor_time_filter = SensorData.timestamp >= cutoff_time
+    weather_time_filter = WeatherForecasting.timestamp >= cutoff_time
+    if since is not None:
+        if weather_since is None:
+            weather_since = since
+        if _from_epoch_ms(since) >= cutoff_time:
+            sensor_time_filter = _after_cursor(SensorData, since, since_id)
+        if _from_epoch_ms(weather_since) >= cutoff_time:
+            weather_time_filter = _after_cursor(WeatherForecasting, weather_since, weather_since_id)
+    
     # Query sensor data from database (only valid records with temp > 0)
     sensor_records = db.query(SensorData).filter(
-        SensorData.timestamp >= cutoff_time,
+        sensor_time_filter,
         SensorData.temperature > 0
-    ).order_by(SensorData.timestamp).all()
+    ).order_by(SensorData.timestamp, SensorData.id).all()
     
     # Query weather data from database
     weather_records = db.query(WeatherForecasting).filter(
-        WeatherForecasting.timestamp >= cutoff_time
-    ).order_by(WeatherForecasting.timestamp).all()
+        weather_time_filter
+    ).order_by(WeatherForecasting.timestamp, WeatherForecasting.id).all()
     
     # Format data for charts
     data = {}
@@ -333,10 +496,13 @@ async def get_charts_data(
             for record in sensor_records:
                 value = getattr(record, sensor, None)
                 if value is not None and value > 0:  # Only include valid values
-                    data[sensor].append({
+                    point = {
                         "time": record.timestamp.strftime("%d/%m/%Y %H:%M:%S"),
                         "value": round(float(value), 1)
-                    })
+                    }
+                    if since is not None:
+                        point["ts"] = _epoch_ms(record.timestamp)
+                    data[sensor].append(point)
     
     # Process weather data
     for sensor in sensor_list:
@@ -345,10 +511,28 @@ async def get_charts_data(
             for record in weather_records:
                 value = getattr(record, sensor, None)
                 if value is not None:  # Include 0 values for weather data
-                    data[sensor].append({
+                    point = {
                         "time": record.timestamp.strftime("%d/%m/%Y %H:%M:%S"),
                         "value": round(float(value), 1)
-                    })
+                    }
+                    if since is not None:
+                        point["ts"] = _epoch_ms(record.timestamp)
+                    data[sensor].append(point)
+    
+    if since is not None:
+        # An empty delta is the normal steady state, not an error
+        last_sensor = sensor_records[-1] if sensor_records else None
+        last_weather = weather_records[-1] if weather_records else None
+        return {
+            "time_range": time_range,
+            "since": since,
+            "cursor": _epoch_ms(last_sensor.timestamp) if last_sensor else since,
+            "cursor_id": last_sensor.id if last_sensor else since_id,
+            "weather_cursor": _epoch_ms(last_weather.timestamp) if last_weather else weather_since,
+            "weather_cursor_id": last_weather.id if last_weather else weather_since_id,
+            "window_start": _epoch_ms(window_start),
+            "data": data
+        }
     
     # If no data found
     if not sensor_records and not weather_records:
@@ -362,6 +546,11 @@ async def get_charts_data(
 @router.get("/system-stats")
 async def get_system_stats(db: Session = Depends(get_db)):
     """Get system statistics"""
+    return _collect_system_stats(db)
+
+
+def _collect_system_stats(db: Session) -> dict:
+    """Record counts and last update time for the dashboard"""
     # Count records
     total_sensor_records = db.query(SensorData).count()
     total_weather_records = db.query(WeatherForecasting).count()
@@ -393,6 +582,8 @@ async def train_ml_model(
     model_type: str = Query("prophet", regex="^(prophet|lightgbm)$"),
     data_points: int = Query(5000, ge=100, le=50000),
     targets: str = Query(None, description="Comma-separated list of targets to train"),
+    incremental: bool = Query(False, description="Continue the saved LightGBM models with new data"),
+    force: bool = Query(False, description="Retrain even if the training data is unchanged"),
     db: Session = Depends(get_db)
 ):
     """
@@ -401,10 +592,18 @@ async def train_ml_model(
     - **model_type**: Type of model (prophet, lightgbm)
     - **data_points**: Number of historical data points to use
     - **targets**: Comma-separated list of targets to train (e.g., "temperature,humidity,aqi")
+    - **incremental**: LightGBM only - warm-start the saved boosters with the data
+      newer than their last training instead of rebuilding them (targets whose
+      model is missing, too old or warm-started too often are rebuilt anyway)
+    - **force**: Retrain targets whose saved model was trained on the same data
+      (by default they are skipped)
     
     Available targets:
     - Sensor data: temperature, humidity, pressure, aqi, co2, dust (6 targets)
     - Weather API: wind_speed, rainfall, uv_index (3 targets)
+    
+    Training is queued as a job and runs in a worker process; the response
+    carries the job id to poll at GET /api/ml/jobs/{job_id}.
     """
     try:
         # Parse targets - if not provided, train all
@@ -431,49 +630,20 @@ async def train_ml_model(
         logger.info(f"Final sensor targets: {selected_sensor_targets}")
         logger.info(f"Final weather targets: {selected_weather_targets}")
         
-        # Get sensor training data - order by ascending time (oldest first) for proper time series
-        records = db.query(SensorData).filter(
-            SensorData.temperature > 0
-        ).order_by(SensorData.timestamp).limit(data_points).all()
-        
-        if len(records) < 100:
+        if not _has_training_data(db):
             raise HTTPException(status_code=400, detail="Không đủ dữ liệu sensor để huấn luyện (tối thiểu 100 bản ghi)")
         
-        # Get weather API data for wind, rainfall, uv_index if weather targets selected
-        weather_records = []
-        if selected_weather_targets:
-            weather_records = db.query(WeatherForecasting).filter(
-                WeatherForecasting.wind_speed >= 0
-            ).order_by(WeatherForecasting.timestamp).limit(data_points).all()
-        
-        logger.info(f"Training {model_type} model with {len(records)} sensor records and {len(weather_records)} weather records...")
-        logger.info(f"Sensor targets: {selected_sensor_targets}, Weather targets: {selected_weather_targets}")
-        
-        # Train model using MLManager with selected targets
-        train_result = ml_trainer.train_selected_targets(
-            records, 
-            model_type, 
-            selected_sensor_targets,
-            weather_records,
-            selected_weather_targets
-        )
+        # Training runs in a worker process; the client polls GET /api/ml/jobs/{job_id}
+        job = training_jobs.submit(model_type, selected_sensor_targets, selected_weather_targets, data_points,
+                                   incremental=incremental, force=force)
         
-        # Format response for frontend
-        if train_result.get('success'):
-            return {
-                'success': True,
-                'model_type': train_result.get('model_type', model_type),
-                'models_trained': train_result.get('models_trained', []),
-                'all_metrics': train_result.get('metrics', {}),
-                'overall_accuracy': train_result.get('overall_accuracy', 0),
-                'data_points_used': train_result.get('data_points', len(records)),
-                'sensor_records': len(records),
-                'weather_records': len(weather_records),
-                'training_time': f"{train_result.get('training_time', 0):.2f}s",
-                'timestamp': datetime.now().isoformat()
-            }
-        else:
-            raise HTTPException(status_code=400, detail=train_result.get('error', 'Training failed'))
+        return {
+            'success': True,
+            'job_id': job['id'],
+            'status': job['status'],
+            'message': f"Đã đưa yêu cầu huấn luyện {model_type} vào hàng đợi",
+            'timestamp': datetime.now().isoformat()
+        }
         
     except HTTPException:
         raise
@@ -484,11 +654,103 @@ async def train_ml_model(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _has_training_data(db: Session) -> bool:
+    """Cheap pre-check that a training job would find enough sensor rows"""
+    rows = db.query(SensorData.id).filter(SensorData.temperature > 0).limit(MIN_TRAINING_ROWS).count()
+    return rows >= MIN_TRAINING_ROWS
+
+
+@router.get("/ml/jobs")
+async def list_training_jobs(limit: int = Query(20, ge=1, le=100)):
+    """Queued, running and recently finished training jobs (most recent first)"""
+    jobs = training_jobs.list_jobs(limit)
+    return {
+        "jobs": jobs,
+        "total": len(jobs)
+    }
+
+
+@router.get("/ml/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    """Status, stage, progress (0-1), ETA and - once finished - result of a training job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy job {job_id}")
+    return job
+
+
+@router.get("/ml/jobs/{job_id}/events")
+async def stream_training_job(
+    job_id: str,
+    request: Request,
+    after: int = Query(0, ge=0, description="Only events with a higher seq (default: full history)")
+):
+    """
+    Server-Sent Events stream of a training job's progress
+    
+    The buffered history is sent first, then live events until the job finishes.
+    Reconnecting clients resume after their Last-Event-ID.
+    
+    Events:
+    - **stage**: loading data / training / reloading models
+    - **progress**: a step model or target finished (target, step, rows, rows_processed,
+      rows_per_second, elapsed_seconds, eta_seconds, metrics)
+    - **status**: cancel requested or the job finished
+    - **done**: final job state (without events); the stream then closes
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+    
+    queue = training_jobs.subscribe(job_id, after)
+    if queue is None:
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy job {job_id}")
+    
+    async def event_generator():
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data, data.get('seq'))
+                if event == 'done':
+                    break
+        finally:
+            training_jobs.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/ml/jobs/{job_id}/cancel")
+async def cancel_training_job(job_id: str):
+    """Cancel a queued job or stop a running one"""
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy job {job_id}")
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": job['status'],
+        "message": job['message']
+    }
+
+
 @router.get("/ml/model-info")
 async def get_model_info():
     """Get current ML model information"""
-    info = ml_trainer.get_model_info()
-    
+    return _format_model_info(ml_trainer.get_model_info())
+
+
+def _format_model_info(info: dict) -> dict:
+    """Shape ml_trainer.get_model_info() for the API"""
     return {
         "current_model_type": info.get('current_model_type', 'prophet'),
         "models_available": info.get('models_available', []),
@@ -511,6 +773,178 @@ async def get_training_history(limit: int = Query(10, ge=1, le=100)):
     }
 
 
+@router.get("/ml/forecast-cache")
+async def get_forecast_cache_stats():
+    """Forecast cache hit ratio and size"""
+    return ml_trainer.get_forecast_cache_stats()
+
+
+@router.get("/ml/snapshots")
+async def get_training_snapshots():
+    """Columnar training snapshots: rows, export watermark and size per source"""
+    return {
+        "snapshots": await run_in_threadpool(snapshot_info),
+        "training_source": TRAINING_DATA_SOURCE,
+        "export_hour": SNAPSHOT_HOUR
+    }
+
+
+@router.post("/ml/snapshots/export")
+async def export_training_snapshots(rebuild: bool = Query(False, description="Re-export everything from scratch")):
+    """Append new rows to the training snapshots now (rebuild: start over)"""
+    try:
+        result = await run_in_threadpool(snapshot_exporter.export, rebuild)
+    except Exception as e:
+        logger.error(f"Snapshot export error: {e}")
+        raise HTTPException(status_code=500, detail=f"Lỗi khi xuất snapshot: {e}")
+    return {
+        "success": True,
+        "message": "Đã cập nhật snapshot dữ liệu huấn luyện",
+        "snapshots": result
+    }
+
+
+@router.get("/ml/dataset-cache")
+async def get_dataset_cache_info():
+    """On-disk training dataset cache: entries, size and hit counters"""
+    return await run_in_threadpool(dataset_cache.info)
+
+
+@router.delete("/ml/dataset-cache")
+async def clear_dataset_cache():
+    """Remove every cached training series / feature matrix"""
+    removed = await run_in_threadpool(dataset_cache.clear)
+    return {
+        "success": True,
+        "removed": removed,
+        "message": f"Đã xóa {removed} mục cache dữ liệu huấn luyện"
+    }
+
+
+@router.post("/ml/hpo")
+async def start_hyperparameter_search(
+    targets: str = Query(None, description="Comma-separated list of targets to tune (default: sensor targets)"),
+    method: str = Query("halving", regex="^(random|halving)$"),
+    trials: int = Query(DEFAULT_TRIALS, ge=2, le=81),
+    budget_seconds: int = Query(DEFAULT_BUDGET_SECONDS, ge=30, le=21600),
+    data_points: int = Query(5000, ge=100, le=50000),
+    db: Session = Depends(get_db)
+):
+    """
+    Search the LightGBM hyperparameters (num_leaves, learning_rate, lookback,
+    rounds) with rolling-origin cross-validation
+    
+    - **method**: random (every config with its own rounds) or halving
+      (successive halving on the number of rounds)
+    - **trials**: Configurations sampled per target (the defaults included)
+    - **budget_seconds**: Wall-clock budget shared by all targets
+    
+    Runs as a job (GET /api/ml/jobs/{job_id}); the best config of each target is
+    saved and used by every later LightGBM training, scheduled runs included.
+    """
+    sensor_targets = ['temperature', 'humidity', 'aqi', 'pressure', 'co2', 'dust']
+    weather_targets = ['wind_speed', 'rainfall', 'uv_index']
+    selected = [t.strip() for t in targets.split(',')] if targets else sensor_targets
+    selected = [t for t in selected if t in sensor_targets + weather_targets]
+    if not selected:
+        raise HTTPException(status_code=400, detail="Không có target hợp lệ được chọn")
+    if not _has_training_data(db):
+        raise HTTPException(status_code=400, detail="Không đủ dữ liệu sensor để huấn luyện (tối thiểu 100 bản ghi)")
+    
+    job = training_jobs.submit(
+        'lightgbm',
+        [t for t in selected if t in sensor_targets],
+        [t for t in selected if t in weather_targets],
+        data_points,
+        kind='hpo',
+        search={'method': method, 'trials': trials, 'budget_seconds': budget_seconds}
+    )
+    return {
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'message': "Đã đưa yêu cầu tìm kiếm siêu tham số vào hàng đợi",
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+@router.get("/ml/hpo")
+async def get_hyperparameter_search_results():
+    """Best searched config per target and the search space"""
+    return {
+        "best_params": await run_in_threadpool(load_best_params),
+        "search_space": SEARCH_SPACE
+    }
+
+
+@router.delete("/ml/hpo")
+async def reset_hyperparameter_search_results(target: str = Query(None, description="Target to reset (default: all)")):
+    """Forget searched configs; the next training of those targets uses the defaults"""
+    removed = await run_in_threadpool(clear_best_params, target)
+    return {
+        "success": True,
+        "removed": removed,
+        "message": f"Đã xóa cấu hình siêu tham số của {removed} target"
+    }
+
+
+@router.post("/ml/backtest")
+async def start_backtest(
+    targets: str = Query(None, description="Comma-separated list of targets (default: sensor targets)"),
+    model_types: str = Query("lightgbm,prophet", description="Comma-separated model types to compare"),
+    horizon: int = Query(168, ge=1, le=168),
+    origins: int = Query(24, ge=1, le=200),
+    stride: int = Query(24, ge=1, le=168),
+    folds: int = Query(3, ge=1, le=20),
+    data_points: int = Query(20000, ge=100, le=100000),
+    db: Session = Depends(get_db)
+):
+    """
+    Rolling-origin backtest: replay forecasts of every horizon 1..horizon hours
+    from many origins over history and score them against the measurements
+    
+    - **origins** / **stride**: Number of forecast origins and hours between them
+    - **folds**: Groups of origins sharing one model trained on the data before them
+    
+    Runs as a job (GET /api/ml/jobs/{job_id}); the report (MAE / RMSE per horizon,
+    target and model type, wall time per origin) is kept at GET /api/ml/backtest.
+    """
+    sensor_targets = ['temperature', 'humidity', 'aqi', 'pressure', 'co2', 'dust']
+    weather_targets = ['wind_speed', 'rainfall', 'uv_index']
+    selected = [t.strip() for t in targets.split(',')] if targets else sensor_targets
+    selected = [t for t in selected if t in sensor_targets + weather_targets]
+    types = [m.strip() for m in model_types.split(',') if m.strip() in ('lightgbm', 'prophet')]
+    if not selected or not types:
+        raise HTTPException(status_code=400, detail="Không có target hoặc loại model hợp lệ được chọn")
+    if not _has_training_data(db):
+        raise HTTPException(status_code=400, detail="Không đủ dữ liệu sensor để huấn luyện (tối thiểu 100 bản ghi)")
+    
+    job = training_jobs.submit(
+        ','.join(types),
+        [t for t in selected if t in sensor_targets],
+        [t for t in selected if t in weather_targets],
+        data_points,
+        kind='backtest',
+        backtest={'model_types': types, 'horizon': horizon, 'origins': origins, 'stride': stride, 'folds': folds}
+    )
+    return {
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'message': "Đã đưa yêu cầu backtest vào hàng đợi",
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+@router.get("/ml/backtest")
+async def get_backtest_report():
+    """Latest backtest report"""
+    report = await run_in_threadpool(load_report)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Chưa có kết quả backtest")
+    return report
+
+
 @router.get("/ml/compare-models")
 async def compare_models():
     """Compare performance of all trained models"""
@@ -544,6 +978,7 @@ def load_auto_train_settings():
         "model_type": "prophet",
         "data_points": 10000,
         "targets": ["temperature", "humidity"],  # Default targets (sensor + API)
+        "incremental": True,  # LightGBM: warm-start from the saved models
         "last_auto_train": None,
         "training_history": []  # Store training history
     }
@@ -598,6 +1033,8 @@ async def update_auto_train_settings(request_body: dict = None):
             settings["model_type"] = request_body["model_type"]
         if "data_points" in request_body:
             settings["data_points"] = max(1000, min(100000, int(request_body["data_points"])))
+        if "incremental" in request_body:
+            settings["incremental"] = bool(request_body["incremental"])
         if "targets" in request_body and isinstance(request_body["targets"], list):
             # Validate targets - support both sensor and API targets
             valid_targets = ["temperature", "humidity", "pressure", "aqi", "co2", "dust",
@@ -620,84 +1057,65 @@ async def update_auto_train_settings(request_body: dict = None):
 
 @router.post("/ml/auto-train/run")
 async def run_auto_train(db: Session = Depends(get_db)):
-    """Manually trigger auto-training now"""
+    """Manually trigger auto-training now (queued as a training job)"""
     settings = load_auto_train_settings()
     model_type = settings.get("model_type", "prophet")
     data_points = settings.get("data_points", 10000)
     targets = settings.get("targets", ["temperature", "humidity"])
+    incremental = settings.get("incremental", True)
     
     try:
-        # Get training data
-        records = db.query(SensorData).filter(
-            SensorData.temperature > 0
-        ).order_by(SensorData.timestamp).limit(data_points).all()
-        
-        if len(records) < 100:
-            raise HTTPException(status_code=400, detail="Không đủ dữ liệu để huấn luyện")
-        
         # Separate selected targets into sensor and weather targets
         sensor_targets = [t for t in targets if t in ["temperature", "humidity", "pressure", "aqi", "co2", "dust"]]
         weather_targets = [t for t in targets if t in ["wind_speed", "rainfall", "uv_index"]]
         
+        if not _has_training_data(db):
+            raise HTTPException(status_code=400, detail="Không đủ dữ liệu để huấn luyện")
+        
         # Use default sensor targets if none specified
         if not sensor_targets:
             sensor_targets = ["temperature", "humidity"]
         
-        # Get weather records if needed
-        weather_records = []
-        if weather_targets:
-            weather_records = db.query(WeatherForecasting).filter(
-                WeatherForecasting.wind_speed >= 0
-            ).order_by(WeatherForecasting.timestamp).limit(data_points).all()
-        
         logger.info(f"Auto-training: model={model_type}, sensor_targets={sensor_targets}, api_targets={weather_targets}")
         
-        # Train model with selected targets
-        result = ml_trainer.train_selected_targets(
-            records, 
-            model_type, 
-            sensor_targets,
-            weather_records,
-            weather_targets
-        )
-        
-        if result.get('success'):
-            # Update last auto train time and history
+        def record_auto_train(job: dict):
+            """Add the finished job to the auto-train history"""
+            if job['status'] != 'succeeded':
+                return
+            result = job['result']
+            current = load_auto_train_settings()
             now = datetime.now()
-            settings["last_auto_train"] = now.strftime("%d/%m/%Y %H:%M")
-            accuracy = result.get("overall_accuracy", 0)
-            
-            # Add to history
-            if "training_history" not in settings:
-                settings["training_history"] = []
-            
-            history_entry = {
+            current["last_auto_train"] = now.strftime("%d/%m/%Y %H:%M")
+            current.setdefault("training_history", [])
+            current["training_history"].insert(0, {
                 "timestamp": now.isoformat(),
                 "model_type": model_type,
                 "data_points": data_points,
                 "targets": targets,
-                "accuracy": accuracy / 100,  # Store as decimal
-                "training_time": result.get("training_time", 0),
-                "status": "success",
-                "message": "Auto training completed successfully"
-            }
-            
-            settings["training_history"].insert(0, history_entry)
-            settings["training_history"] = settings["training_history"][:50]  # Keep last 50
-            
-            save_auto_train_settings(settings)
-            
-            return {
-                "success": True,
-                "message": f"Auto-training hoàn tất với model {model_type}",
-                "accuracy": accuracy / 100,
+                "accuracy": result.get("overall_accuracy", 0) / 100,  # Store as decimal
                 "training_time": result.get("training_time", 0),
-                "targets": targets,
-                "sensor_targets": sensor_targets,
-                "api_targets": weather_targets
-            }
-        else:
-            raise HTTPException(status_code=500, detail=result.get("error", "Training failed"))
+                "status": "skipped" if result.get("skipped") else "success",
+                "message": "Training data unchanged, models kept" if result.get("skipped")
+                           else "Auto training completed successfully"
+            })
+            current["training_history"] = current["training_history"][:50]  # Keep last 50
+            save_auto_train_settings(current)
+        
+        # Train model with selected targets in a worker process
+        job = training_jobs.submit(
+            model_type, sensor_targets, weather_targets, data_points,
+            kind="auto", on_complete=record_auto_train, incremental=incremental
+        )
+        
+        return {
+            "success": True,
+            "message": f"Đã đưa Auto-training model {model_type} vào hàng đợi",
+            "job_id": job['id'],
+            "status": job['status'],
+            "targets": targets,
+            "sensor_targets": sensor_targets,
+            "api_targets": weather_targets
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -730,6 +1148,15 @@ async def predict_weather(
     - **hours_ahead**: Number of hours to predict (1-168, default: 24)
     """
     try:
+        # Materialized forecast (refreshed hourly and after training) - no model run here
+        snapshot = forecast_materializer.get_forecast(hours_ahead)
+        if snapshot:
+            response = _build_forecast_response(
+                snapshot['latest_data'], snapshot['predictions'], hours_ahead, ml_trainer.get_model_info()
+            )
+            response['issuedAt'] = snapshot['issued_at']
+            return response
+        
         # Get latest valid data for context
         latest = db.query(SensorData).filter(
             SensorData.temperature > 0
@@ -738,85 +1165,8 @@ async def predict_weather(
         if not latest:
             raise HTTPException(status_code=404, detail="Không có dữ liệu để dự báo")
         
-        latest_data = {
-            'temperature': latest.temperature,
-            'humidity': latest.humidity,
-            'pressure': latest.pressure,
-            'co2': latest.co2 or 0,
-            'dust': latest.dust or 0,
-            'aqi': latest.aqi or 0
-        }
-        
-        # Get predictions from trained models (use cached)
-        ml_result = ml_trainer.predict(hours_ahead, latest_data)
-        
-        if not ml_result.get('success'):
-            # Return basic predictions if models not trained yet
-            predictions = _generate_basic_predictions(latest_data, hours_ahead)
-        else:
-            predictions = ml_result.get('predictions', [])
-        
-        # Calculate statistics
-        temps = [p.get('temperature', 0) for p in predictions if isinstance(p.get('temperature'), (int, float))]
-        humidity = [p.get('humidity', 0) for p in predictions if isinstance(p.get('humidity'), (int, float))]
-        rain_count = sum(1 for p in predictions if p.get('willRain', False))
-        
-        avg_temp = round(sum(temps) / len(temps), 1) if temps else latest.temperature
-        avg_humidity = round(sum(humidity) / len(humidity), 1) if humidity else latest.humidity
-        rain_probability = round((rain_count / len(predictions) * 100) if predictions else 0, 1)
-        
-        # Generate summary based on conditions
-        if rain_probability > 60:
-            summary = f"⛈️ Có khả năng mưa trong {hours_ahead} giờ tới"
-            detail = f"Xác suất mưa: {rain_probability}% | Nhiệt độ trung bình: {avg_temp}°C"
-        elif rain_probability > 30:
-            summary = f"🌧️ Khả năng mưa rải rác trong {hours_ahead} giờ tới"
-            detail = f"Xác suất mưa: {rain_probability}% | Nhiệt độ trung bình: {avg_temp}°C"
-        else:
-            summary = f"☀️ Thời tiết ổn định trong {hours_ahead} giờ tới"
-            detail = f"Trời quang đãng | Nhiệt độ trung bình: {avg_temp}°C"
-        
-        # Get model info
-        model_info = ml_trainer.get_model_info()
-        models_trained = model_info.get('models_available', [])
-        
-        # Format response
-        return {
-            'success': True,
-            'summary': summary,
-            'detail': detail,
-            'rainProbability': rain_probability if rain_probability > 0 else 0,
-            'averageTemperature': avg_temp,
-            'averageHumidity': avg_humidity,
-            'forecasts': [
-                {
-                    'timestamp': p.get('timestamp', '--'),
-                    'time': p.get('timestamp', '--').split(' ')[1] if ' ' in p.get('timestamp', '') else '--',
-                    'temperature': p.get('temperature', '--'),
-                    'humidity': p.get('humidity', '--'),
-                    'pressure': p.get('pressure', 1013),
-                    'wind_speed': p.get('wind_speed', 0),
-                    'rainfall': p.get('rainfall', 0),
-                    'uv_index': p.get('uv_index', 0),
-                    'willRain': p.get('willRain', False),
-                    'confidence': p.get('confidence', 0),
-                    'weatherIcon': '⛈️' if p.get('willRain') else ('🌧️' if p.get('humidity', 0) > 70 else '☀️')
-                }
-                for p in predictions
-            ],
-            'modelInfo': {
-                'name': f"{model_info.get('current_model_type', 'prophet').title()} (Multi-Sensor)",
-                'currentModelType': model_info.get('current_model_type', 'prophet'),
-                'status': 'Hoạt động' if models_trained else 'Cần huấn luyện',
-                'modelsTrained': models_trained,
-                'lastTrained': model_info.get('last_trained', 'Chưa huấn luyện'),
-                'accuracy': model_info.get('last_accuracy', 0),
-                'dataRows': model_info.get('last_data_points', 0),
-                'trainingCount': model_info.get('training_count', 0),
-                'supportedModelTypes': model_info.get('supported_model_types', ['prophet', 'lightgbm'])
-            },
-            'timestamp': datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        }
+        predictions = _predict_from_latest(latest, hours_ahead)
+        return _build_forecast_response(_latest_context(latest), predictions, hours_ahead, ml_trainer.get_model_info())
         
     except HTTPException:
         raise
@@ -827,6 +1177,94 @@ async def predict_weather(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _latest_context(latest: SensorData) -> dict:
+    """Latest reading as the context dict the ML models take"""
+    return {
+        'temperature': latest.temperature,
+        'humidity': latest.humidity,
+        'pressure': latest.pressure,
+        'co2': latest.co2 or 0,
+        'dust': latest.dust or 0,
+        'aqi': latest.aqi or 0
+    }
+
+
+def _predict_from_latest(latest: SensorData, hours_ahead: int) -> list:
+    """Run the ML models with the latest reading as context (basic fallback if untrained)"""
+    latest_data = _latest_context(latest)
+    
+    # Get predictions from trained models (use cached)
+    ml_result = ml_trainer.predict(hours_ahead, latest_data, context_watermark=latest.timestamp)
+    
+    if not ml_result.get('success'):
+        # Return basic predictions if models not trained yet
+        return _generate_basic_predictions(latest_data, hours_ahead)
+    return ml_result.get('predictions', [])
+
+
+def _build_forecast_response(latest_data: dict, predictions: list, hours_ahead: int, model_info: dict) -> dict:
+    """Format predictions as the /api/ml/predict response"""
+    # Calculate statistics
+    temps = [p.get('temperature', 0) for p in predictions if isinstance(p.get('temperature'), (int, float))]
+    humidity = [p.get('humidity', 0) for p in predictions if isinstance(p.get('humidity'), (int, float))]
+    rain_count = sum(1 for p in predictions if p.get('willRain', False))
+    
+    avg_temp = round(sum(temps) / len(temps), 1) if temps else latest_data.get('temperature')
+    avg_humidity = round(sum(humidity) / len(humidity), 1) if humidity else latest_data.get('humidity')
+    rain_probability = round((rain_count / len(predictions) * 100) if predictions else 0, 1)
+    
+    # Generate summary based on conditions
+    if rain_probability > 60:
+        summary = f"⛈️ Có khả năng mưa trong {hours_ahead} giờ tới"
+        detail = f"Xác suất mưa: {rain_probability}% | Nhiệt độ trung bình: {avg_temp}°C"
+    elif rain_probability > 30:
+        summary = f"🌧️ Khả năng mưa rải rác trong {hours_ahead} giờ tới"
+        detail = f"Xác suất mưa: {rain_probability}% | Nhiệt độ trung bình: {avg_temp}°C"
+    else:
+        summary = f"☀️ Thời tiết ổn định trong {hours_ahead} giờ tới"
+        detail = f"Trời quang đãng | Nhiệt độ trung bình: {avg_temp}°C"
+    
+    models_trained = model_info.get('models_available', [])
+    
+    # Format response
+    return {
+        'success': True,
+        'summary': summary,
+        'detail': detail,
+        'rainProbability': rain_probability if rain_probability > 0 else 0,
+        'averageTemperature': avg_temp,
+        'averageHumidity': avg_humidity,
+        'forecasts': [
+            {
+                'timestamp': p.get('timestamp', '--'),
+                'time': p.get('timestamp', '--').split(' ')[1] if ' ' in p.get('timestamp', '') else '--',
+                'temperature': p.get('temperature', '--'),
+                'humidity': p.get('humidity', '--'),
+                'pressure': p.get('pressure', 1013),
+                'wind_speed': p.get('wind_speed', 0),
+                'rainfall': p.get('rainfall', 0),
+                'uv_index': p.get('uv_index', 0),
+                'willRain': p.get('willRain', False),
+                'confidence': p.get('confidence', 0),
+                'weatherIcon': '⛈️' if p.get('willRain') else ('🌧️' if p.get('humidity', 0) > 70 else '☀️')
+            }
+            for p in predictions
+        ],
+        'modelInfo': {
+            'name': f"{model_info.get('current_model_type', 'prophet').title()} (Multi-Sensor)",
+            'currentModelType': model_info.get('current_model_type', 'prophet'),
+            'status': 'Hoạt động' if models_trained else 'Cần huấn luyện',
+            'modelsTrained': models_trained,
+            'lastTrained': model_info.get('last_trained', 'Chưa huấn luyện'),
+            'accuracy': model_info.get('last_accuracy', 0),
+            'dataRows': model_info.get('last_data_points', 0),
+            'trainingCount': model_info.get('training_count', 0),
+            'supportedModelTypes': model_info.get('supported_model_types', ['prophet', 'lightgbm'])
+        },
+        'timestamp': datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    }
+
+
 def _generate_basic_predictions(latest_data: dict, hours_ahead: int) -> list:
     """Generate basic predictions as fallback when ML models aren't available"""
     predictions = []
@@ -865,8 +1303,108 @@ def _generate_basic_predictions(latest_data: dict, hours_ahead: int) -> list:
     return predictions
 
 
+# ===== Dashboard Bundle =====
+
+@router.get("/dashboard")
+async def get_dashboard(
+    forecast_hours: int = Query(168, ge=24, le=168),
+    hourly_hours: int = Query(24, ge=1, le=24),
+    db: Session = Depends(get_db)
+):
+    """
+    Everything the home page needs in one round trip
+    
+    - **forecast_hours**: Hours for the daily forecast (default: 168)
+    - **hourly_hours**: Hours for the hourly forecast, sliced from the same run (default: 24)
+    
+    The latest reading is read once and shared by the realtime and forecast
+    sections; stats and the forecast run concurrently. A failed section is
+    null and its message is listed in `errors`.
+    """
+    errors = {}
+    
+    sensor_data = db.query(SensorData).filter(
+        SensorData.temperature > 0
+    ).order_by(desc(SensorData.timestamp)).first()
+    weather_data = db.query(WeatherForecasting).order_by(desc(WeatherForecasting.timestamp)).first()
+    
+    def load_stats():
+        session = SessionLocal()
+        try:
+            return _collect_system_stats(session)
+        finally:
+            session.close()
+    
+    def load_predictions():
+        snapshot = forecast_materializer.get_forecast(forecast_hours)
+        if snapshot:
+            return snapshot['latest_data'], snapshot['predictions'], snapshot['issued_at']
+        if not sensor_data:
+            raise HTTPException(status_code=404, detail="Không có dữ liệu để dự báo")
+        return _latest_context(sensor_data), _predict_from_latest(sensor_data, forecast_hours), None
+    
+    stats, forecast_input = await asyncio.gather(
+        run_in_threadpool(load_stats),
+        run_in_threadpool(load_predictions),
+        return_exceptions=True
+    )
+    
+    def section_error(name: str, error: Exception) -> None:
+        message = error.detail if isinstance(error, HTTPException) else str(error)
+        logger.error(f"Dashboard section '{name}' failed: {message}")
+        errors[name] = message
+    
+    realtime = None
+    if sensor_data:
+        realtime = _combine_realtime(sensor_data, weather_data)
+    else:
+        errors['realtime'] = "Không có dữ liệu cảm biến"
+    
+    if isinstance(stats, Exception):
+        section_error('stats', stats)
+        stats = None
+    
+    model_info = None
+    try:
+        model_info = ml_trainer.get_model_info()
+    except Exception as e:
+        section_error('model_info', e)
+    
+    forecast = forecast_hourly = None
+    if isinstance(forecast_input, Exception):
+        section_error('forecast', forecast_input)
+    else:
+        try:
+            latest_data, predictions, issued_at = forecast_input
+            forecast = _build_forecast_response(latest_data, predictions, forecast_hours, model_info or {})
+            forecast_hourly = _build_forecast_response(
+                latest_data, predictions[:hourly_hours], hourly_hours, model_info or {}
+            )
+            if issued_at:
+                forecast['issuedAt'] = forecast_hourly['issuedAt'] = issued_at
+        except Exception as e:
+            section_error('forecast', e)
+    
+    return {
+        'realtime': realtime,
+        'stats': stats,
+        'forecast': forecast,
+        'forecast_hourly': forecast_hourly,
+        'model_info': _format_model_info(model_info) if model_info is not None else None,
+        'errors': errors,
+        'timestamp': datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    }
+
+
 # ===== Database Management Endpoints =====
 
+def _after_delete():
+    """Drop what was derived from the deleted rows (realtime stats, inference context, training snapshots)"""
+    realtime_publisher.reset_stats()
+    context_provider.invalidate()
+    mark_for_rebuild()
+
+
 @router.delete("/database/clear")
 async def clear_database(
     table: str = Query(..., regex="^(sensor_data|weather_forecasting|all)$"),
@@ -890,6 +1428,7 @@ async def clear_database(
             db.query(WeatherForecasting).delete()
         
         db.commit()
+        _after_delete()
         
         return {
             "success": True,
@@ -1214,6 +1753,9 @@ async def clear_cache():
                     os.remove(file_path)
                     logger.info(f"Cleared log: {filename}")
         
+        # Cached training matrices are rebuilt on the next training run
+        dataset_cache.clear()
+        
         return {
             "success": True,
             "message": "Cache and logs cleared successfully"
@@ -1316,6 +1858,7 @@ async def delete_old_data(days: int = Query(7, ge=1, le=365), db: Session = Depe
         ).delete()
         
         db.commit()
+        _after_delete()
         
         return {
             "success": True,
@@ -1406,6 +1949,7 @@ async def delete_data_in_id_range(
         ).delete(synchronize_session='fetch')
         
         db.commit()
+        _after_delete()
         
         logger.info(f"Deleted {deleted_count} records from ID {start_id} to ID {end_id}")
         
@@ -1443,6 +1987,7 @@ async def delete_data_in_range(
         ).delete()
         
         db.commit()
+        _after_delete()
         
         logger.info(f"Deleted {deleted_count} records from {start_date} to {end_date}")
         
@@ -1549,7 +2094,10 @@ async def get_env_config():
             "APP_PORT": os.getenv("APP_PORT", "8000"),
             "APP_DEBUG": os.getenv("APP_DEBUG", "True"),
             "SECRET_KEY": os.getenv("SECRET_KEY", ""),
-            "CORS_ORIGINS": os.getenv("CORS_ORIGINS", "")
+            "CORS_ORIGINS": os.getenv("CORS_ORIGINS", ""),
+            "ML_TRAINING_WORKERS": os.getenv("ML_TRAINING_WORKERS", "0"),
+            "ML_FORECAST_STRATEGY": os.getenv("ML_FORECAST_STRATEGY", "direct"),
+            "ML_GLOBAL_MODEL": os.getenv("ML_GLOBAL_MODEL", "false")
         }
         
         return {
@@ -1587,6 +2135,9 @@ SECRET_KEY={config.get('SECRET_KEY', 'your-secret-key-here-change-in-production'
 
 # CORS Origins (comma-separated)
 CORS_ORIGINS={config.get('CORS_ORIGINS', 'http://localhost:8000,http://127.0.0.1:8000')}
+
+# ML training worker processes (0 = one per CPU core, 1 = no process pool)
+ML_TRAINING_WORKERS={config.get('ML_TRAINING_WORKERS', os.getenv('ML_TRAINING_WORKERS', '0'))}
 """
         
         # Write to .env file
@@ -0,0 +1,99 @@
+"""
+Snapshot Exporter
+Appends the day's sensor and weather rows to the columnar training snapshots
+(models/training_snapshot.py) once a night, before the auto-training hour, so
+training jobs read memory-mapped files instead of querying MySQL
+"""
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Hour of the nightly export (ML_SNAPSHOT_HOUR in .env; auto-training defaults to 02:00)
+SNAPSHOT_HOUR = int(os.getenv("ML_SNAPSHOT_HOUR", "1") or 1)
+
+# Seconds between schedule checks
+CHECK_INTERVAL = 600
+
+
+class SnapshotExporter:
+    def __init__(self):
+        self.running = False
+        self.thread = None
+        self.wakeup = threading.Event()
+        self.last_export = None
+
+    def export(self, rebuild: bool = False) -> dict:
+        """Export both snapshots now"""
+        from database import SessionLocal
+        from models.training_snapshot import export_snapshots
+
+        db = SessionLocal()
+        try:
+            result = export_snapshots(db, rebuild)
+        finally:
+            db.close()
+        self.last_export = datetime.now()
+        appended = ', '.join(f"{source} +{r['appended']}" for source, r in result.items())
+        print(f"🗂️  Snapshot dữ liệu huấn luyện: {appended}")
+        return result
+
+    def _due(self) -> bool:
+        """Once a day, at or after SNAPSHOT_HOUR"""
+        from models.training_snapshot import ColumnSnapshot
+
+        now = datetime.now()
+        if now.hour < SNAPSHOT_HOUR:
+            return False
+        last = self.last_export
+        if last is None:
+            exported_at = ColumnSnapshot('sensor').meta().get('exported_at')
+            last = datetime.fromisoformat(exported_at) if exported_at else None
+        return last is None or last.date() < now.date()
+
+    def exporter_loop(self):
+        """Check the schedule every CHECK_INTERVAL seconds"""
+        logger.info("🔄 Snapshot Exporter started")
+
+        while self.running:
+            try:
+                if self._due():
+                    self.export()
+            except Exception as e:
+                logger.error(f"Snapshot export error: {e}")
+            self.wakeup.wait(CHECK_INTERVAL)
+            self.wakeup.clear()
+
+    def start(self):
+        """Start the exporter in background"""
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self.exporter_loop, daemon=True)
+        self.thread.start()
+        logger.info("Snapshot Exporter started in background")
+
+    def stop(self):
+        """Stop the exporter"""
+        self.running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("Snapshot Exporter stopped")
+
+
+# Global exporter instance
+snapshot_exporter = SnapshotExporter()
+
+
+def start_snapshot_exporter():
+    """Start the snapshot exporter"""
+    snapshot_exporter.start()
+
+
+def stop_snapshot_exporter():
+    """Stop the snapshot exporter"""
+    snapshot_exporter.stop()
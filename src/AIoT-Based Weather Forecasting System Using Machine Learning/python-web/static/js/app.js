@@ -5,6 +5,7 @@ const AppState = {
     mysqlConnected: true,
     lastDataTime: new Date(),
     updateInProgress: false, // Prevent concurrent updates
+    streamConnected: false, // Realtime push channel (SSE) is open
     lastUpdateData: {}, // Cache for smooth transitions
 };
 
@@ -228,8 +229,26 @@ function initMySQLStatus() {
     if (!statusBadge) return;
 
     updateMySQLStatus();
-    // Check status every 10 seconds
-    setInterval(updateMySQLStatus, 10000);
+    // Stats pushed over the stream prove the database is reachable
+    subscribeStream('stats', () => setMySQLStatus(true));
+    // Check status every 10 seconds (only while the push channel is down)
+    setInterval(() => {
+        if (!AppState.streamConnected) updateMySQLStatus();
+    }, 10000);
+}
+
+function setMySQLStatus(connected) {
+    const statusBadge = document.getElementById('mysqlStatus');
+    AppState.mysqlConnected = connected;
+    if (!statusBadge) return;
+
+    if (connected) {
+        statusBadge.className = 'status-badge connected';
+        statusBadge.innerHTML = '<span class="status-dot"></span> MySQL: Connected';
+    } else {
+        statusBadge.className = 'status-badge error';
+        statusBadge.innerHTML = '<span class="status-dot"></span> MySQL: Error';
+    }
 }
 
 async function updateMySQLStatus() {
@@ -239,19 +258,47 @@ async function updateMySQLStatus() {
     try {
         // Check real MySQL connection via API
         const response = await fetch('/api/system-stats');
-        AppState.mysqlConnected = response.ok;
-
-        if (AppState.mysqlConnected) {
-            statusBadge.className = 'status-badge connected';
-            statusBadge.innerHTML = '<span class="status-dot"></span> MySQL: Connected';
-        } else {
-            throw new Error('Connection failed');
-        }
+        setMySQLStatus(response.ok);
     } catch (error) {
-        AppState.mysqlConnected = false;
-        statusBadge.className = 'status-badge error';
-        statusBadge.innerHTML = '<span class="status-dot"></span> MySQL: Error';
+        setMySQLStatus(false);
+    }
+}
+
+// ===== Realtime Push Channel (SSE) =====
+// One EventSource per page, shared by all page scripts. Pages keep their
+// polling loops as a fallback and skip them while AppState.streamConnected.
+let eventStream = null;
+const streamHandlers = {};
+
+function subscribeStream(event, handler) {
+    if (typeof EventSource === 'undefined') return false;
+
+    if (!eventStream) {
+        eventStream = new EventSource('/api/stream');
+        eventStream.onopen = () => {
+            AppState.streamConnected = true;
+        };
+        eventStream.onerror = () => {
+            // EventSource reconnects by itself, polling covers the gap
+            AppState.streamConnected = false;
+        };
     }
+
+    if (!streamHandlers[event]) {
+        streamHandlers[event] = [];
+        eventStream.addEventListener(event, (e) => {
+            let data;
+            try {
+                data = JSON.parse(e.data);
+            } catch (error) {
+                console.error('Invalid stream message:', error);
+                return;
+            }
+            streamHandlers[event].forEach(h => h(data));
+        });
+    }
+    streamHandlers[event].push(handler);
+    return true;
 }
 
 // ===== Highlight Active Navigation =====
@@ -391,6 +438,22 @@ async function fetchChartsData(timeRange = '24h', sensors = ['temperature', 'hum
     }
 }
 
+// Delta fetch: only points after the per-table cursors (epoch ms + id), plus new cursors and window start
+async function fetchChartsDelta(timeRange = '24h', sensors = ['temperature', 'humidity'], cursor = { since: 0 }) {
+    try {
+        const params = new URLSearchParams({ time_range: timeRange, sensors: sensors.join(',') });
+        Object.entries(cursor).forEach(([key, value]) => {
+            if (value !== null && value !== undefined) params.append(key, value);
+        });
+        const response = await fetch(`/api/charts-data?${params}`);
+        if (!response.ok) throw new Error('API Error');
+        return await response.json();
+    } catch (error) {
+        console.error('Error fetching charts delta:', error);
+        throw error;
+    }
+}
+
 async function fetchForecastData() {
     try {
         // Get predictions
@@ -467,6 +530,7 @@ async function fetchMySQLTable(filters = {}) {
 }
 
 // ML Training Functions
+// Queues a training job; returns { job_id, status } - poll getTrainingJob(job_id) for progress
 async function trainMLModel(modelType = 'prophet', dataPoints = 1000) {
     try {
         const response = await fetch(`/api/ml/train?model_type=${modelType}&data_points=${dataPoints}`, {
@@ -480,6 +544,17 @@ async function trainMLModel(modelType = 'prophet', dataPoints = 1000) {
     }
 }
 
+async function getTrainingJob(jobId) {
+    try {
+        const response = await fetch(`/api/ml/jobs/${jobId}`);
+        if (!response.ok) throw new Error('API Error');
+        return await response.json();
+    } catch (error) {
+        console.error('Error fetching training job:', error);
+        throw error;
+    }
+}
+
 async function getMLModelInfo() {
     try {
         const response = await fetch('/api/ml/model-info');
@@ -817,10 +892,13 @@ window.AppUtils = {
     hideLoading,
     fetchRealtimeData,
     fetchChartsData,
+    fetchChartsDelta,
+    subscribeStream,
     fetchForecastData,
     fetchMySQLTable,
     fetchSystemStats,
     trainMLModel,
+    getTrainingJob,
     getMLModelInfo,
     clearDatabase,
     backupDatabase,
@@ -4,14 +4,25 @@ let currentTimeRange = '24h';
 let currentSensors = ['temperature', 'humidity', 'pressure'];
 let chartUpdateInterval = null;
 
+// Delta-fetch state: series already on the client, the server cursors (one
+// per table) and the range/sensor selection they belong to
+let chartSeries = {};
+let chartCursor = { since: 0 };
+let chartSeriesKey = null;
+
 // Initialize page
 document.addEventListener('DOMContentLoaded', () => {
     loadChartsPage();
     setupEventListeners();
     
-    // Auto-refresh every 10 seconds (reduced to prevent UI jank)
-    chartUpdateInterval = setInterval(() => {
+    // New readings are pushed by the server - fetch the delta right away
+    AppUtils.subscribeStream('reading', () => {
         loadChartsPage();
+    });
+    
+    // Fallback auto-refresh every 10 seconds while the push channel is down
+    chartUpdateInterval = setInterval(() => {
+        if (!AppState.streamConnected) loadChartsPage();
     }, 10000);
 });
 
@@ -96,13 +107,26 @@ async function loadChartsPage() {
     const loading = AppUtils.showLoading(document.querySelector('.content'), true);
     
     try {
-        // Fetch charts data from API - Real-time from SQL
-        const data = await AppUtils.fetchChartsData(currentTimeRange, currentSensors);
+        // Changing the range or sensors invalidates what we have - start over
+        const seriesKey = `${currentTimeRange}|${currentSensors.join(',')}`;
+        if (seriesKey !== chartSeriesKey) {
+            chartSeries = {};
+            chartCursor = { since: 0 };
+            chartSeriesKey = seriesKey;
+        }
+        
+        // Only fetch points newer than the cursor - Real-time from SQL
+        const delta = await AppUtils.fetchChartsDelta(currentTimeRange, currentSensors, chartCursor);
+        const changed = mergeChartDelta(delta);
         
-        if (!data || Object.keys(data).length === 0) {
+        const data = chartSeries;
+        if (!data || Object.values(data).every(points => points.length === 0)) {
             throw new Error('Không có dữ liệu');
         }
         
+        // Nothing new since the last refresh - keep the current drawing
+        if (!changed) return;
+        
         // Draw main charts
         drawMainCharts(data);
         
@@ -123,6 +147,41 @@ async function loadChartsPage() {
     }
 }
 
+// Merge a delta response into chartSeries, returns true if anything changed
+function mergeChartDelta(delta) {
+    let changed = false;
+    
+    Object.keys(delta.data || {}).forEach(sensor => {
+        if (!chartSeries[sensor]) chartSeries[sensor] = [];
+        if (delta.data[sensor].length > 0) {
+            chartSeries[sensor].push(...delta.data[sensor]);
+            changed = true;
+        }
+    });
+    
+    // Drop points that slid out of the time window
+    Object.keys(chartSeries).forEach(sensor => {
+        const points = chartSeries[sensor];
+        let firstInWindow = 0;
+        while (firstInWindow < points.length && points[firstInWindow].ts < delta.window_start) {
+            firstInWindow++;
+        }
+        if (firstInWindow > 0) {
+            chartSeries[sensor] = points.slice(firstInWindow);
+            changed = true;
+        }
+    });
+    
+    // Sensor and weather rows arrive independently, so each keeps its own cursor
+    chartCursor = {
+        since: delta.cursor ?? chartCursor.since,
+        since_id: delta.cursor_id ?? chartCursor.since_id,
+        weather_since: delta.weather_cursor ?? chartCursor.weather_since,
+        weather_since_id: delta.weather_cursor_id ?? chartCursor.weather_since_id
+    };
+    return changed;
+}
+
 // Draw main charts
 function drawMainCharts(data) {
     const colors = {
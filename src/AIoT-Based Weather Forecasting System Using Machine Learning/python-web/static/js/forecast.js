@@ -21,9 +21,16 @@ document.addEventListener('DOMContentLoaded', () => {
     
     loadForecastData();
     
-    // Auto-refresh every 30 seconds
+    // Reload as soon as the server reports retrained models
+    if (AppUtils.subscribeStream) {
+        AppUtils.subscribeStream('forecast', () => {
+            loadForecastData();
+        });
+    }
+    
+    // Auto-refresh every 30 seconds while the push channel is down
     forecastUpdateInterval = setInterval(() => {
-        loadForecastData();
+        if (typeof AppState === 'undefined' || !AppState.streamConnected) loadForecastData();
     }, 30000);
     
     // Listen for language change to update table
@@ -324,6 +324,7 @@ const translations = {
             prophetRecommend: 'Prophet (Khuyến nghị)',
             lightgbmBoost: 'LightGBM (Boosting)',
             dataAmount: 'Số lượng dữ liệu',
+            incremental: 'Huấn luyện tăng dần (LightGBM)',
             selectSensors: 'Chọn biến để huấn luyện',
             targetVar: 'Biến dự báo',
             targetAll: 'Tất cả (nhiệt độ, độ ẩm, AQI, áp suất)',
@@ -908,6 +909,7 @@ const translations = {
             prophetRecommend: 'Prophet (Recommended)',
             lightgbmBoost: 'LightGBM (Boosting)',
             dataAmount: 'Data Amount',
+            incremental: 'Incremental training (LightGBM)',
             selectSensors: 'Select variables to train',
             targetVar: 'Target Variable',
             targetAll: 'All (temperature, humidity, AQI, pressure)',
@@ -2,12 +2,12 @@
 
 let realtimeUpdateInterval = null;
 let isHovering = false;
+// Last /api/dashboard bundle, kept to re-render forecasts (e.g. on language change)
+let dashboardData = null;
 
 // Initialize page
 document.addEventListener('DOMContentLoaded', () => {
-    loadRealtimeData();
-    displayForecast7Day();
-    displayForecastHourly();
+    loadDashboard();
 
     // Pause updates when hovering over content
     const content = document.querySelector('.content');
@@ -20,18 +20,28 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // Auto-refresh every 5 seconds (reduced from 3s to prevent jank)
+    // Push channel: the server sends new readings, stats and forecast updates
+    AppUtils.subscribeStream('reading', (data) => {
+        if (!isHovering && !document.hidden) renderRealtimeData(data);
+    });
+    AppUtils.subscribeStream('stats', (stats) => {
+        if (!document.hidden) renderSystemStats(stats);
+    });
+    AppUtils.subscribeStream('forecast', () => {
+        loadDashboard();
+    });
+
+    // Fallback polling every 5 seconds while the push channel is down
     realtimeUpdateInterval = setInterval(() => {
-        if (!isHovering && !document.hidden) {
+        if (!isHovering && !document.hidden && !AppState.streamConnected) {
             loadRealtimeData();
         }
     }, 5000);
     
-    // Update forecasts less frequently (every 30 seconds)
+    // Update forecasts less frequently (every 30 seconds) while the push channel is down
     setInterval(() => {
-        if (!isHovering && !document.hidden) {
-            displayForecast7Day();
-            displayForecastHourly();
+        if (!isHovering && !document.hidden && !AppState.streamConnected) {
+            loadDashboard();
         }
     }, 30000);
     
@@ -48,11 +58,33 @@ document.addEventListener('DOMContentLoaded', () => {
     // Listen for language change event to refresh forecast displays
     window.addEventListener('languageChanged', () => {
         console.log('Language changed - refreshing forecasts');
-        displayForecast7Day();
-        displayForecastHourly();
+        displayForecast7Day(dashboardData && dashboardData.forecast);
+        displayForecastHourly(dashboardData && dashboardData.forecast_hourly);
     });
 });
 
+// Load the whole home page in one request; sections missing from the bundle are fetched separately
+async function loadDashboard() {
+    try {
+        const response = await fetch('/api/dashboard');
+        if (!response.ok) throw new Error('Không thể kết nối API');
+        dashboardData = await response.json();
+    } catch (error) {
+        console.warn('Failed to load dashboard bundle:', error.message);
+        dashboardData = null;
+    }
+
+    const bundle = dashboardData || {};
+    if (bundle.realtime && bundle.stats) {
+        renderRealtimeData(bundle.realtime);
+        renderSystemStats(bundle.stats);
+    } else {
+        loadRealtimeData();
+    }
+    displayForecast7Day(bundle.forecast);
+    displayForecastHourly(bundle.forecast_hourly);
+}
+
 // Load real-time data from SQL
 async function loadRealtimeData() {
     // Prevent concurrent updates
@@ -69,53 +101,12 @@ async function loadRealtimeData() {
         
         if (!data) throw new Error('Không có dữ liệu');
 
-        // Update hero section with smooth transitions
-        const heroTemp = document.getElementById('currentTemp');
-        const heroHumidity = document.getElementById('heroHumidity');
-        const heroWind = document.getElementById('heroWind');
-        const heroPressure = document.getElementById('heroPressure');
-        
-        if (heroTemp) heroTemp.textContent = `${data.temperature}°C`;
-        if (document.getElementById('weatherDesc')) document.getElementById('weatherDesc').textContent = 'Thời tiết hiện tại';
-        if (heroHumidity) heroHumidity.textContent = `${data.humidity}%`;
-        if (heroWind) heroWind.textContent = `${data.wind_speed}km/h`;
-        if (heroPressure) heroPressure.textContent = `${data.pressure}hPa`;
-        if (document.getElementById('lastUpdate')) document.getElementById('lastUpdate').textContent = `Cập nhật lúc ${data.timestamp}`;
-
-        // Update IoT data cards with fade effect
-        const tempCard = document.getElementById('tempValue');
-        const humidityCard = document.getElementById('humidityValue');
-        const pressureCard = document.getElementById('pressureValue');
-        const co2Card = document.getElementById('co2Value');
-        const dustCard = document.getElementById('dustValue');
-        
-        if (tempCard) tempCard.innerHTML = `${data.temperature}<span class="card-unit">°C</span>`;
-        if (humidityCard) humidityCard.innerHTML = `${data.humidity}<span class="card-unit">%</span>`;
-        if (pressureCard) pressureCard.innerHTML = `${data.pressure}<span class="card-unit">hPa</span>`;
-        if (co2Card) co2Card.innerHTML = `${data.co2}<span class="card-unit">ppm</span>`;
-        if (dustCard) dustCard.innerHTML = `${data.dust}<span class="card-unit">µg/m³</span>`;
-
-        // Update timestamps
-        const timestamp = `Cập nhật: ${data.timestamp}`;
-        document.getElementById('tempTime').textContent = timestamp;
-        document.getElementById('humidityTime').textContent = timestamp;
-        document.getElementById('pressureTime').textContent = timestamp;
-        document.getElementById('co2Time').textContent = timestamp;
-        document.getElementById('dustTime').textContent = timestamp;
-
-        // Update weather API data
-        document.getElementById('windSpeedValue').innerHTML = `${data.wind_speed}<span class="card-unit">km/h</span>`;
-        document.getElementById('rainfallValue').innerHTML = `${data.rainfall}<span class="card-unit">mm</span>`;
-        document.getElementById('uvValue').textContent = data.uv_index;
-        document.getElementById('uvLevel').textContent = AppUtils.getUVLevel(data.uv_index);
+        renderRealtimeData(data);
 
         // Update system status via API
         const statsResponse = await fetch('/api/system-stats');
         if (statsResponse.ok) {
-            const stats = await statsResponse.json();
-            document.getElementById('lastDataTime').textContent = stats.last_update;
-            document.getElementById('recordsToday').textContent = stats.records_today;
-            document.getElementById('activeSensors').textContent = stats.active_sensors;
+            renderSystemStats(await statsResponse.json());
         }
 
     } catch (error) {
@@ -130,8 +121,58 @@ async function loadRealtimeData() {
     }
 }
 
+// Render a combined sensor + weather reading (from /api/realtime-data or the push channel)
+function renderRealtimeData(data) {
+    // Update hero section with smooth transitions
+    const heroTemp = document.getElementById('currentTemp');
+    const heroHumidity = document.getElementById('heroHumidity');
+    const heroWind = document.getElementById('heroWind');
+    const heroPressure = document.getElementById('heroPressure');
+    
+    if (heroTemp) heroTemp.textContent = `${data.temperature}°C`;
+    if (document.getElementById('weatherDesc')) document.getElementById('weatherDesc').textContent = 'Thời tiết hiện tại';
+    if (heroHumidity) heroHumidity.textContent = `${data.humidity}%`;
+    if (heroWind) heroWind.textContent = `${data.wind_speed}km/h`;
+    if (heroPressure) heroPressure.textContent = `${data.pressure}hPa`;
+    if (document.getElementById('lastUpdate')) document.getElementById('lastUpdate').textContent = `Cập nhật lúc ${data.timestamp}`;
+
+    // Update IoT data cards with fade effect
+    const tempCard = document.getElementById('tempValue');
+    const humidityCard = document.getElementById('humidityValue');
+    const pressureCard = document.getElementById('pressureValue');
+    const co2Card = document.getElementById('co2Value');
+    const dustCard = document.getElementById('dustValue');
+    
+    if (tempCard) tempCard.innerHTML = `${data.temperature}<span class="card-unit">°C</span>`;
+    if (humidityCard) humidityCard.innerHTML = `${data.humidity}<span class="card-unit">%</span>`;
+    if (pressureCard) pressureCard.innerHTML = `${data.pressure}<span class="card-unit">hPa</span>`;
+    if (co2Card) co2Card.innerHTML = `${data.co2}<span class="card-unit">ppm</span>`;
+    if (dustCard) dustCard.innerHTML = `${data.dust}<span class="card-unit">µg/m³</span>`;
+
+    // Update timestamps
+    const timestamp = `Cập nhật: ${data.timestamp}`;
+    document.getElementById('tempTime').textContent = timestamp;
+    document.getElementById('humidityTime').textContent = timestamp;
+    document.getElementById('pressureTime').textContent = timestamp;
+    document.getElementById('co2Time').textContent = timestamp;
+    document.getElementById('dustTime').textContent = timestamp;
+
+    // Update weather API data
+    document.getElementById('windSpeedValue').innerHTML = `${data.wind_speed}<span class="card-unit">km/h</span>`;
+    document.getElementById('rainfallValue').innerHTML = `${data.rainfall}<span class="card-unit">mm</span>`;
+    document.getElementById('uvValue').textContent = data.uv_index;
+    document.getElementById('uvLevel').textContent = AppUtils.getUVLevel(data.uv_index);
+}
+
+// Render system status (from /api/system-stats or the push channel)
+function renderSystemStats(stats) {
+    document.getElementById('lastDataTime').textContent = stats.last_update;
+    document.getElementById('recordsToday').textContent = stats.records_today;
+    document.getElementById('activeSensors').textContent = stats.active_sensors;
+}
+
 // Display 7-day forecast from ML Model - Improved version
-async function displayForecast7Day() {
+async function displayForecast7Day(prefetched = null) {
     const grid = document.getElementById('forecast7DayGrid');
     if (!grid) return;
     
@@ -141,9 +182,12 @@ async function displayForecast7Day() {
     grid.innerHTML = `<div class="loading-text" style="grid-column: 1/-1; text-align: center; padding: 20px;">🔄 ${t('index.loadingForecastML')}</div>`;
     
     try {
-        const response = await fetch('/api/ml/predict?hours_ahead=168');
-        if (!response.ok) throw new Error('Failed to fetch forecast');
-        const data = await response.json();
+        let data = prefetched;
+        if (!data) {
+            const response = await fetch('/api/ml/predict?hours_ahead=168');
+            if (!response.ok) throw new Error('Failed to fetch forecast');
+            data = await response.json();
+        }
 
         if (!data.forecasts || data.forecasts.length === 0) {
             throw new Error('No forecast data - Model chưa được train');
@@ -287,7 +331,7 @@ async function displayForecast7Day() {
 }
 
 // Display hourly forecast from ML Model (24 hours) - Using same logic as forecast page
-async function displayForecastHourly() {
+async function displayForecastHourly(prefetched = null) {
     const grid = document.getElementById('forecastHourlyGrid');
     if (!grid) return;
     
@@ -297,9 +341,12 @@ async function displayForecastHourly() {
     grid.innerHTML = `<div class="loading-text" style="grid-column: 1/-1; text-align: center; padding: 20px;">🔄 ${t('index.loadingForecast')}</div>`;
     
     try {
-        const response = await fetch('/api/ml/predict?hours_ahead=24');
-        if (!response.ok) throw new Error('Failed to fetch forecast');
-        const data = await response.json();
+        let data = prefetched;
+        if (!data) {
+            const response = await fetch('/api/ml/predict?hours_ahead=24');
+            if (!response.ok) throw new Error('Failed to fetch forecast');
+            data = await response.json();
+        }
 
         if (!data.forecasts || data.forecasts.length === 0) {
             throw new Error('No forecast data');
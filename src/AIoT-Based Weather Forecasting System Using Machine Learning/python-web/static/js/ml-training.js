@@ -1,6 +1,7 @@
 // ===== ML Training Page JavaScript =====
 
 let trainingInProgress = false;
+let currentTrainingJobId = null;
 
 // Initialize page
 document.addEventListener('DOMContentLoaded', () => {
@@ -244,6 +245,8 @@ async function startTraining(event) {
     const progressLog = document.getElementById('progressLog');
     const startButton = document.querySelector('button[onclick="startTraining(event)"]');
     
+    const stopButton = document.getElementById('stopTrainingBtn');
+    
     if (startButton) {
         startButton.disabled = true;
         startButton.textContent = '⏳ Đang huấn luyện...';
@@ -259,40 +262,50 @@ async function startTraining(event) {
         addProgressLog(`Model: ${modelNames[modelType]}, Data points: ${dataPoints}`, 'info');
         const targetDisplayNames = selectedTargets.map(t => targetNames[t] || t);
         addProgressLog(`Biến huấn luyện: ${targetDisplayNames.join(', ')}`, 'info');
-        addProgressLog('Đang trích xuất dữ liệu từ cơ sở dữ liệu...', 'info');
-        
-        // Progress simulation
-        let progress = 0;
-        const progressInterval = setInterval(() => {
-            progress += Math.random() * 10;
-            if (progress > 85) progress = 85;
-            
-            if (progressBar) progressBar.style.width = `${progress}%`;
-            if (progressText) progressText.textContent = `${Math.round(progress)}%`;
-        }, 200);
         
         // Build API URL with targets
         const targetsParam = selectedTargets.join(',');
         const apiUrl = `/api/ml/train?model_type=${modelType}&data_points=${dataPoints}&targets=${encodeURIComponent(targetsParam)}`;
         
-        // Call training API with selected targets
+        // Submit the training job (it runs in a worker process on the server)
         const response = await fetch(apiUrl, { method: 'POST' });
         if (!response.ok) {
             const errorData = await response.json();
             throw new Error(errorData.detail || 'Training failed');
         }
-        const result = await response.json();
+        const submitted = await response.json();
+        currentTrainingJobId = submitted.job_id;
+        if (stopButton) stopButton.style.display = '';
+        addProgressLog(`Job ${submitted.job_id} đã vào hàng đợi`, 'info');
+        
+        // Follow the job's progress stream until it finishes
+        const job = await waitForTrainingJob(submitted.job_id, (update) => {
+            const percent = Math.round((update.progress || 0) * 100);
+            if (progressBar) progressBar.style.width = `${percent}%`;
+            if (progressText) progressText.textContent = formatJobProgress(update);
+        });
         
-        clearInterval(progressInterval);
+        if (job.status === 'cancelled') {
+            AppUtils.showToast('Đã hủy huấn luyện', 'warning');
+            if (progressText) progressText.textContent = 'Đã hủy';
+            return;
+        }
+        if (job.status !== 'succeeded') {
+            throw new Error(job.error || 'Training failed');
+        }
+        const result = job.result;
         
         // Complete progress
         if (progressBar) progressBar.style.width = '100%';
         if (progressText) progressText.textContent = '100% - Hoàn thành!';
         
-        // Log results
-        addProgressLog('✓ Hoàn thành huấn luyện!', 'success');
+        // Log results (the job log already ended with the completion line)
         addProgressLog(`📊 Model: ${modelNames[result.model_type || modelType]}`, 'success');
         
+        if (result.skipped_targets && result.skipped_targets.length > 0) {
+            addProgressLog(`⏭️ Dữ liệu không đổi, giữ model cũ: ${result.skipped_targets.join(', ')}`, 'info');
+        }
+        
         if (result.models_trained && result.models_trained.length > 0) {
             addProgressLog(`📈 Biến dự báo: ${result.models_trained.join(', ')}`, 'success');
             
@@ -309,7 +322,7 @@ async function startTraining(event) {
             addProgressLog(`🎯 Độ chính xác tổng thể: ${result.overall_accuracy.toFixed(2)}%`, 'success');
         }
         
-        addProgressLog(`⏱️ Thời gian: ${result.training_time}`, 'info');
+        addProgressLog(`⏱️ Thời gian: ${(result.training_time || 0).toFixed(2)}s`, 'info');
         addProgressLog(`📝 Dữ liệu sử dụng: ${result.data_points_used} bản ghi`, 'info');
         if (result.sensor_records) {
             addProgressLog(`   → Sensor data: ${result.sensor_records} records`, 'info');
@@ -335,6 +348,8 @@ async function startTraining(event) {
         if (progressText) progressText.textContent = 'Lỗi!';
     } finally {
         trainingInProgress = false;
+        currentTrainingJobId = null;
+        if (stopButton) stopButton.style.display = 'none';
         
         if (startButton) {
             startButton.disabled = false;
@@ -343,6 +358,64 @@ async function startTraining(event) {
     }
 }
 
+// Follow a training job over its progress stream (SSE) until it has finished.
+// onUpdate(event) gets every stage/progress/status event, each event message is
+// added to the progress log; resolves with the final job state.
+function waitForTrainingJob(jobId, onUpdate) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/ml/jobs/${jobId}/events`);
+        
+        const handleEvent = (e) => {
+            const event = JSON.parse(e.data);
+            const type = event.message.startsWith('✓') ? 'success' : (event.message.startsWith('✗') ? 'error' : 'info');
+            addProgressLog(event.message, type);
+            if (onUpdate) onUpdate(event);
+        };
+        ['stage', 'progress', 'status'].forEach(name => source.addEventListener(name, handleEvent));
+        
+        source.addEventListener('done', (e) => {
+            source.close();
+            resolve(JSON.parse(e.data));
+        });
+        
+        // The browser reconnects on its own (resuming after the last event id);
+        // a closed source means the job is unknown or the server is gone
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED) {
+                reject(new Error('Mất kết nối với tiến trình huấn luyện'));
+            }
+        };
+    });
+}
+
+// Progress text of a training job event: percent, stage message, throughput and ETA
+function formatJobProgress(job) {
+    const percent = Math.round((job.progress || 0) * 100);
+    let text = `${percent}% - ${job.message || ''}`;
+    if (job.rows_per_second) {
+        text += ` · ${Math.round(job.rows_per_second).toLocaleString()} mẫu/s`;
+    }
+    if (job.eta_seconds != null) {
+        const eta = Math.round(job.eta_seconds);
+        text += ` (còn ~${eta >= 60 ? Math.floor(eta / 60) + ' phút ' : ''}${eta % 60} giây)`;
+    }
+    return text;
+}
+
+// Cancel the running training job
+async function cancelTraining() {
+    if (!currentTrainingJobId) return;
+    try {
+        const response = await fetch(`/api/ml/jobs/${currentTrainingJobId}/cancel`, { method: 'POST' });
+        if (!response.ok) throw new Error('Không thể hủy huấn luyện');
+        const result = await response.json();
+        AppUtils.showToast(result.message, 'info');
+    } catch (error) {
+        console.error('Cancel error:', error);
+        AppUtils.showToast('Lỗi: ' + error.message, 'error');
+    }
+}
+
 // Add progress log
 function addProgressLog(message, type = 'info') {
     const progressLog = document.getElementById('progressLog');
@@ -554,6 +627,7 @@ async function loadAutoTrainSettings() {
         const hourSelect = document.getElementById('autoTrainHour');
         const modelSelect = document.getElementById('autoTrainModel');
         const dataPointsInput = document.getElementById('autoTrainDataPoints');
+        const incrementalCheckbox = document.getElementById('autoTrainIncremental');
         const statusIndicator = document.getElementById('autoTrainIndicator');
         const nextTrainTime = document.getElementById('nextTrainTime');
         const lastAutoTrainTime = document.getElementById('lastAutoTrainTime');
@@ -564,6 +638,7 @@ async function loadAutoTrainSettings() {
         if (hourSelect) hourSelect.value = settings.hour || 2;
         if (modelSelect) modelSelect.value = settings.model_type || 'prophet';
         if (dataPointsInput) dataPointsInput.value = settings.data_points || 10000;
+        if (incrementalCheckbox) incrementalCheckbox.checked = settings.incremental !== false;
         
         // Update button state
         if (enabledBtn) {
@@ -699,6 +774,7 @@ async function toggleAutoTrain() {
             hour: parseInt(document.getElementById('autoTrainHour')?.value || 2),
             model_type: document.getElementById('autoTrainModel')?.value || 'prophet',
             data_points: parseInt(document.getElementById('autoTrainDataPoints')?.value || 10000),
+            incremental: document.getElementById('autoTrainIncremental')?.checked ?? true,
             targets: getAutoTrainTargets()
         };
         
@@ -747,6 +823,7 @@ async function saveAutoTrainSettings() {
             hour: parseInt(document.getElementById('autoTrainHour')?.value || 2),
             model_type: document.getElementById('autoTrainModel')?.value || 'prophet',
             data_points: parseInt(document.getElementById('autoTrainDataPoints')?.value || 10000),
+            incremental: document.getElementById('autoTrainIncremental')?.checked ?? true,
             targets: getAutoTrainTargets()
         };
         
@@ -807,18 +884,30 @@ async function runAutoTrainNow() {
         const result = await response.json();
         
         if (result.success) {
-            AppUtils.showToast('✓ ' + result.message, 'success');
+            AppUtils.showToast('✓ ' + result.message, 'info');
+            
+            // Follow the queued job until it has finished
+            const progressBar = document.getElementById('trainingProgress');
+            const progressText = document.getElementById('trainingProgressText');
+            const job = await waitForTrainingJob(result.job_id, (update) => {
+                if (progressBar) progressBar.style.width = `${Math.round((update.progress || 0) * 100)}%`;
+                if (progressText) progressText.textContent = formatJobProgress(update);
+            });
+            if (job.status !== 'succeeded') {
+                throw new Error(job.error || job.message || 'Training failed');
+            }
+            AppUtils.showToast(`✓ Auto-training hoàn tất với model ${job.model_type}`, 'success');
             
             // Log to progress if available
             if (typeof addProgressLog === 'function') {
                 addProgressLog(`✓ Auto-Training hoàn tất!`, 'success');
                 
-                if (result.accuracy) {
-                    addProgressLog(`📈 Độ chính xác: ${(result.accuracy * 100).toFixed(2)}%`, 'info');
+                if (job.result.overall_accuracy) {
+                    addProgressLog(`📈 Độ chính xác: ${job.result.overall_accuracy.toFixed(2)}%`, 'info');
                 }
                 
-                if (result.training_time) {
-                    addProgressLog(`⏱️ Thời gian: ${result.training_time.toFixed(1)}s`, 'info');
+                if (job.result.training_time) {
+                    addProgressLog(`⏱️ Thời gian: ${job.result.training_time.toFixed(1)}s`, 'info');
                 }
                 
                 // Show sensor targets
@@ -875,7 +964,9 @@ async function loadAutoTrainHistory() {
             const modelName = record.model_type === 'prophet' ? 'Prophet' : 'LightGBM';
             const statusBadge = record.status === 'success' 
                 ? '<span class="status-badge success">✓ Thành công</span>'
-                : '<span class="status-badge error">✗ Thất bại</span>';
+                : record.status === 'skipped'
+                    ? '<span class="status-badge success">⏭ Dữ liệu không đổi</span>'
+                    : '<span class="status-badge error">✗ Thất bại</span>';
             
             // Separate sensor and API targets
             const targets = record.targets || [];
@@ -7,15 +7,23 @@ let totalRecords = 0;
 let mysqlRefreshInterval = null;
 let currentTimeFilter = 'all';
 let currentNodeFilter = 'all';
+let tableCursor = null; // Newest record cursor (epoch ms) of the first page
+let tableCursorId = null; // ...and its id, for records sharing that second
 
 // ===== Initialization =====
 document.addEventListener('DOMContentLoaded', () => {
     initializeMySQLPage();
     loadTableData();
     
-    // Auto-refresh every 15 seconds
+    // New readings are pushed by the server
+    AppUtils.subscribeStream('reading', () => {
+        refreshTableIfChanged();
+    });
+
+    // Fallback auto-refresh every 15 seconds while the push channel is down
+    // (only reloads when new records arrived)
     mysqlRefreshInterval = setInterval(() => {
-        loadTableData();
+        if (!AppState.streamConnected) refreshTableIfChanged();
     }, 15000);
 });
 
@@ -100,6 +108,26 @@ function getFilterLabel(filter) {
 }
 
 // ===== Data Loading =====
+async function refreshTableIfChanged() {
+    // Only the first page can be checked cheaply with the delta cursor
+    if (currentPage !== 0 || tableCursor === null) {
+        loadTableData();
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/sensor-data/history?since=${tableCursor}&since_id=${tableCursorId}&limit=1`);
+        if (!response.ok) throw new Error('API Error');
+        const delta = await response.json();
+
+        if (delta.records.length > 0) {
+            loadTableData();
+        }
+    } catch (error) {
+        console.error('Error checking for new records:', error);
+    }
+}
+
 async function loadTableData() {
     if (window.AppState?.updateInProgress) return;
     if (window.AppState) window.AppState.updateInProgress = true;
@@ -129,6 +157,10 @@ async function loadTableData() {
         totalRecords = data.totalRecords;
         updatePagination();
 
+        // Remember the newest record so the next refresh can ask for a delta
+        tableCursor = currentPage === 0 ? data.cursor : null;
+        tableCursorId = currentPage === 0 ? data.cursorId : null;
+
         // Ẩn thông báo load thành công để tránh giật
         // AppUtils.showToast('Đã tải dữ liệu thành công', 'success');
     } catch (error) {
@@ -172,7 +204,9 @@ async function fetchMySQLTableData(filters) {
             })),
             totalRecords: stats.sensor_records || data.total || 0,
             storageSize: stats.database_size || '0 MB',
-            latestRecord: stats.last_update || '--'
+            latestRecord: stats.last_update || '--',
+            cursor: data.cursor ?? null,
+            cursorId: data.cursor_id ?? null
         };
     } catch (error) {
         console.error('Error fetching data:', error);
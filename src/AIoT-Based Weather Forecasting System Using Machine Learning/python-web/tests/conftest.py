@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules are imported the way main.py imports them (python-web is the root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,91 @@
+"""
+Streaming features must equal the batch features the models were trained on:
+StreamingFeatureState vectors vs FeatureSpec.build() over a random walk
+"""
+
+import numpy as np
+import pytest
+
+from models import streaming_features
+from models.feature_spec import FeatureSpec, FIXED, regular_timestamps
+from models.streaming_features import StreamingFeatureState
+
+SPECS = {
+    'default': FeatureSpec(),
+    'no_calendar': FeatureSpec(calendar=False),
+    'no_diffs': FeatureSpec(diffs=()),
+    'legacy': FeatureSpec.legacy(),
+    'window_over_lookback': FeatureSpec(lookback=12, rolling_windows=(3, 24), diffs=(1, 6)),
+}
+
+
+def random_walk(n: int, seed: int = 0):
+    """Readings around a large offset (worst case for Welford drift), 5 minutes apart"""
+    rng = np.random.default_rng(seed)
+    series = 1000.0 + np.cumsum(rng.normal(0.0, 0.5, n))
+    timestamps = regular_timestamps('2024-03-01T12:00:00', n, 300)
+    return series, timestamps
+
+
+def stream(spec: FeatureSpec, series, timestamps) -> np.ndarray:
+    state = StreamingFeatureState(spec, history=len(series))
+    state.extend(series, timestamps)
+    return state.recent_features()
+
+
+@pytest.mark.parametrize('name', sorted(SPECS))
+def test_streaming_matches_batch(name):
+    spec = SPECS[name]
+    # Long enough to pass the periodic moment recompute twice
+    series, timestamps = random_walk(2 * streaming_features.RECOMPUTE_EVERY + 300)
+
+    streamed = stream(spec, series, timestamps)
+    batch = spec.build(series, timestamps)
+
+    assert streamed.shape == batch.shape == (len(series) - spec.lookback + 1, len(spec.columns()))
+    np.testing.assert_allclose(streamed, batch, rtol=1e-9, atol=1e-9)
+
+
+def test_recompute_keeps_parity(monkeypatch):
+    # Recompute every few updates so it hits partially filled and full windows
+    monkeypatch.setattr(streaming_features, 'RECOMPUTE_EVERY', 7)
+    spec = SPECS['default']
+    series, timestamps = random_walk(500, seed=1)
+
+    np.testing.assert_allclose(stream(spec, series, timestamps), spec.build(series, timestamps),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_current_vector_matches_build_row():
+    spec = SPECS['default']
+    series, timestamps = random_walk(100, seed=2)
+    state = StreamingFeatureState(spec, context_length=48)
+    state.extend(series, timestamps)
+
+    np.testing.assert_allclose(state.features(), spec.build_row(state.window(), timestamps[-1]),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_scaled_features_match_scaled_series():
+    spec = SPECS['default']
+    series, timestamps = random_walk(200, seed=3)
+    scale, offset = 0.01, -9.5
+
+    state = StreamingFeatureState(spec)
+    state.extend(series, timestamps)
+    expected = spec.build(series * scale + offset, timestamps)[-1]
+
+    np.testing.assert_allclose(state.features(scale, offset), expected, rtol=1e-9, atol=1e-9)
+    # Calendar columns are not affected by the scaler
+    calendar = spec.column_kinds() == FIXED
+    np.testing.assert_array_equal(state.features(scale, offset)[calendar], state.features()[calendar])
+
+
+def test_not_ready_before_full_window():
+    spec = SPECS['default']
+    series, timestamps = random_walk(spec.lookback - 1, seed=4)
+    state = StreamingFeatureState(spec)
+    state.extend(series, timestamps)
+
+    assert not state.ready
+    assert state.features() is None
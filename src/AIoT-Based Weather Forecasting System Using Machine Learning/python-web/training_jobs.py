@@ -0,0 +1,768 @@
+"""
+Training Jobs
+Runs model training in a worker process instead of the request handler, so the
+web server keeps serving while a model trains. Jobs are queued and trained one
+at a time, report stage / progress / ETA, can be cancelled, and the serving
+process hot-loads the models of a finished job.
+
+Every job keeps a buffer of structured progress events (stage changes, each
+fitted step model / target with rows, throughput and metrics) that is streamed
+to SSE subscribers; a late subscriber first gets the buffered history.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Start method of the worker process (spawn: forking a server with running threads is unsafe)
+JOB_START_METHOD = "spawn"
+
+# Finished jobs kept for GET /api/ml/jobs
+MAX_FINISHED_JOBS = 50
+
+# Progress events buffered per job (replayed to late stream subscribers)
+MAX_JOB_EVENTS = 2000
+
+# Sensor rows a training job needs at least
+MIN_TRAINING_ROWS = 100
+
+# Where jobs read training data (ML_TRAINING_SOURCE in .env): 'snapshot' (memory-mapped
+# nightly export, caught up when a job starts; see snapshot_exporter.py), 'mysql', or
+# 'auto' = snapshot once one exists
+TRAINING_DATA_SOURCE = os.getenv("ML_TRAINING_SOURCE", "auto")
+
+# Approximate bytes per loaded row while a MySQL result is materialized (row tuples
+# plus columns); caps data_points under a memory budget (ML_MEMORY_BUDGET_MB)
+LOAD_ROW_BYTES = 512
+
+# Share of the job progress bar per stage: loading data, training, hot-loading the models
+LOAD_PROGRESS = 0.05
+TRAIN_PROGRESS = 0.9
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+def _describe(event: dict) -> str:
+    """Log line for a training progress event"""
+    target = event.get('target', '')
+    if event.get('event') == 'target_prepared':
+        return f"Đã chuẩn bị dữ liệu {target} ({event.get('samples', 0)} mẫu)"
+    if event.get('event') == 'step_trained':
+        step = f"bước {event.get('step')}h" if event.get('step') else "mọi bước"
+        return f"Đã huấn luyện {target} ({step}, {event.get('rows', 0)} mẫu)"
+    if event.get('event') == 'target_trained':
+        if not event.get('success'):
+            return f"✗ {target}: thất bại"
+        metrics = event.get('metrics') or {}
+        return f"✓ {target}: R²={metrics.get('r2', 0):.4f}, MAE={metrics.get('mae', 0):.4f}"
+    if event.get('event') == 'trial_done':
+        config = event.get('config') or {}
+        settings = ', '.join(f"{key}={value}" for key, value in config.items())
+        if event.get('score') is None:
+            return f"✗ {target}: thử nghiệm {settings} không hoàn thành"
+        return f"Thử nghiệm {target} ({settings}): MAE={event['score']:.4f}"
+    if event.get('event') == 'search_done':
+        best = event.get('best')
+        if not best:
+            return f"✗ {target}: không tìm được cấu hình"
+        return f"✓ {target}: cấu hình tốt nhất {best['params']} (MAE={best['score']:.4f})"
+    if event.get('event') == 'fold_done':
+        if not event.get('success'):
+            return f"✗ Backtest {event.get('model_type')} / {target}: lỗi"
+        return f"Đã backtest {event.get('model_type')} / {target} ({event.get('origins', 0)} mốc dự báo)"
+    return event.get('event', '')
+
+
+def _load_records(spec: dict):
+    """
+    Worker process: most recent sensor rows of a job, weather columns aligned to
+    the sensor timestamps. Returns (TrainingData, 'snapshot' | 'mysql').
+    """
+    import numpy as np
+    from database import SessionLocal
+    from models.memory_budget import memory_bounded, rows_within_budget
+    from models.training_data import load_joint_training_data
+    from models.training_snapshot import export_snapshots, has_snapshot, load_joint_snapshot
+
+    weather_targets = spec['weather_targets']
+    source = spec.get('data_source', 'auto')
+    if source == 'auto':
+        source = 'snapshot' if has_snapshot() else 'mysql'
+
+    # Memory-bounded training: float32 columns, at most the rows that fit the budget
+    limit = spec['data_points']
+    dtype = float
+    if memory_bounded():
+        limit = min(limit, rows_within_budget(LOAD_ROW_BYTES, MIN_TRAINING_ROWS))
+        dtype = np.float32
+
+    db = SessionLocal()
+    try:
+        if source == 'snapshot':
+            # Append the rows since the nightly export (rebuild after deletes) so the
+            # job trains on today's readings; the snapshot alone would stop at 01:00
+            try:
+                export_snapshots(db)
+            except Exception as e:
+                logger.error(f"Snapshot catch-up failed: {e}")
+                if spec.get('data_source', 'auto') == 'auto':
+                    source = 'mysql'
+
+        if source == 'snapshot':
+            return load_joint_snapshot(limit=limit, weather_columns=weather_targets), source
+        return load_joint_training_data(db, limit=limit, weather_columns=weather_targets, dtype=dtype), source
+    finally:
+        db.close()
+
+
+def _train_in_worker(spec: dict, messages):
+    """
+    Worker process: load the training data, train and save the models.
+    Reports {'type': 'stage' | 'progress' | 'result', ...} messages.
+    """
+    def send(kind: str, **data):
+        messages.put({'type': kind, **data})
+
+    try:
+        send('stage', stage='loading_data', message='Đang trích xuất dữ liệu từ cơ sở dữ liệu...')
+
+        from models.memory_budget import peak_rss_mb
+        from ml_utils import ml_trainer
+
+        sensor_targets = spec['sensor_targets']
+        weather_targets = spec['weather_targets']
+
+        records, source = _load_records(spec)
+
+        if len(records) < MIN_TRAINING_ROWS:
+            send('result', success=False,
+                 error=f"Không đủ dữ liệu sensor để huấn luyện (tối thiểu {MIN_TRAINING_ROWS} bản ghi)")
+            return
+
+        weather_records = records if weather_targets else []
+        weather_count = records.rows_with(weather_targets)
+
+        send('stage', stage='training',
+             message=f"Đang huấn luyện {spec['model_type']} với {len(records)} bản ghi sensor, {weather_count} bản ghi weather"
+                     f" (nguồn: {'snapshot' if source == 'snapshot' else 'MySQL'})...")
+
+        result = ml_trainer.train_selected_targets(
+            records,
+            spec['model_type'],
+            sensor_targets,
+            weather_records,
+            weather_targets,
+            progress=lambda event: send('progress', event=event),
+            incremental=spec.get('incremental', False),
+            force=spec.get('force', False)
+        )
+
+        if not result.get('success'):
+            send('result', success=False, error=result.get('error', 'Training failed'))
+            return
+
+        send('result', success=True, result={
+            'model_type': result.get('model_type', spec['model_type']),
+            'models_trained': result.get('models_trained', []),
+            'all_metrics': result.get('metrics', {}),
+            'overall_accuracy': result.get('overall_accuracy', 0),
+            'data_points_used': result.get('data_points', len(records)),
+            'sensor_records': len(records),
+            'weather_records': weather_count,
+            'data_source': source,
+            'training_time': result.get('training_time', 0),
+            'skipped': result.get('skipped', False),
+            'skipped_targets': result.get('skipped_targets', []),
+            'peak_rss_mb': peak_rss_mb(),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        traceback.print_exc()
+        send('result', success=False, error=str(e))
+
+
+def _search_in_worker(spec: dict, messages):
+    """
+    Worker process: hyperparameter search of the LightGBM targets of a job;
+    the best config of each target is saved for later training runs
+    """
+    def send(kind: str, **data):
+        messages.put({'type': kind, **data})
+
+    try:
+        send('stage', stage='loading_data', message='Đang trích xuất dữ liệu từ cơ sở dữ liệu...')
+
+        from models.hyperparameter_search import save_best_params, search_target
+        from models.lightgbm_model import lightgbm_model
+        from models.memory_budget import peak_rss_mb
+
+        search = spec['search']
+        targets = spec['sensor_targets'] + spec['weather_targets']
+        records, source = _load_records(spec)
+        if len(records) < MIN_TRAINING_ROWS:
+            send('result', success=False,
+                 error=f"Không đủ dữ liệu sensor để tìm siêu tham số (tối thiểu {MIN_TRAINING_ROWS} bản ghi)")
+            return
+
+        send('stage', stage='training',
+             message=f"Đang tìm siêu tham số ({search['method']}, {search['trials']} cấu hình, "
+                     f"tối đa {search['budget_seconds']}s) cho {', '.join(targets)}...")
+
+        started = datetime.now()
+        # The wall-clock budget is shared by the targets in order
+        deadline = started.timestamp() + search['budget_seconds']
+        results = {}
+        for i, target in enumerate(targets):
+            timestamps, series, _ = lightgbm_model.prepare_series(records, target)
+            remaining = deadline - datetime.now().timestamp()
+            if series is None or remaining <= 0:
+                results[target] = {'best': None, 'error': 'Insufficient data' if series is None else 'Budget exhausted'}
+                continue
+
+            def on_progress(event, i=i):
+                send('progress', event={**event, 'fraction': (i + event['fraction']) / len(targets)})
+
+            try:
+                result = search_target(target, series, timestamps, search['method'], search['trials'],
+                                       remaining, progress=on_progress, strategy=lightgbm_model.strategy)
+            except ValueError as e:
+                results[target] = {'best': None, 'error': str(e)}
+                continue
+            if result['best'] is not None:
+                save_best_params(target, {
+                    **result['best'],
+                    'method': result['method'],
+                    'strategy': result['strategy'],
+                    'trials': len(result['trials']),
+                    'data_points': len(series),
+                    'searched_at': datetime.now().isoformat()
+                })
+            results[target] = result
+            send('progress', event={'event': 'search_done', 'target': target, 'best': result['best'],
+                                    'fraction': (i + 1) / len(targets)})
+
+        tuned = [target for target, result in results.items() if result.get('best')]
+        if not tuned:
+            errors = '; '.join(f"{t}: {r.get('error')}" for t, r in results.items() if r.get('error'))
+            send('result', success=False, error=f"Không tìm được cấu hình nào ({errors or 'không có thử nghiệm hoàn thành'})")
+            return
+
+        send('result', success=True, result={
+            'model_type': 'lightgbm',
+            'models_trained': [],
+            'tuned_targets': tuned,
+            'search': results,
+            'sensor_records': len(records),
+            'data_source': source,
+            'training_time': round((datetime.now() - started).total_seconds(), 2),
+            'peak_rss_mb': peak_rss_mb(),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        traceback.print_exc()
+        send('result', success=False, error=str(e))
+
+
+def _backtest_in_worker(spec: dict, messages):
+    """Worker process: rolling-origin backtest of the job's targets; the report is saved as the latest"""
+    def send(kind: str, **data):
+        messages.put({'type': kind, **data})
+
+    try:
+        send('stage', stage='loading_data', message='Đang trích xuất dữ liệu từ cơ sở dữ liệu...')
+
+        from models.backtesting import run_backtest, save_report
+        from models.memory_budget import peak_rss_mb
+
+        backtest = spec['backtest']
+        targets = spec['sensor_targets'] + spec['weather_targets']
+        records, source = _load_records(spec)
+        if len(records) < MIN_TRAINING_ROWS:
+            send('result', success=False,
+                 error=f"Không đủ dữ liệu sensor để backtest (tối thiểu {MIN_TRAINING_ROWS} bản ghi)")
+            return
+
+        send('stage', stage='training',
+             message=f"Đang backtest {', '.join(backtest['model_types'])} trên {', '.join(targets)} "
+                     f"({backtest['origins']} mốc, {backtest['horizon']} bước)...")
+
+        report = run_backtest(
+            records, targets, backtest['model_types'], backtest['horizon'], backtest['origins'],
+            backtest['stride'], backtest['folds'], progress=lambda event: send('progress', event=event)
+        )
+        if not report['targets']:
+            send('result', success=False, error=f"Không backtest được target nào ({report['skipped']})")
+            return
+        report.update({'sensor_records': len(records), 'data_source': source, 'peak_rss_mb': peak_rss_mb()})
+        save_report(report)
+
+        send('result', success=True, result={
+            'model_type': ','.join(backtest['model_types']),
+            'models_trained': [],
+            'backtest': report,
+            'training_time': report['elapsed_seconds'],
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        traceback.print_exc()
+        send('result', success=False, error=str(e))
+
+
+def _stop_on_sigterm(signum, frame):
+    # Unwinds the job: with-blocks exit, so the pool is shut down and its
+    # shared memory unlinked (SystemExit is not caught as a job error)
+    raise SystemExit("Training job cancelled")
+
+
+def _run_worker(worker, spec: dict, messages):
+    """
+    Worker process entry: leads its own process group, so cancelling a job
+    signals the training pool processes it starts as well (see _signal_job)
+    """
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    worker(spec, messages)
+
+
+def _signal_job(process, kill: bool = False):
+    """SIGTERM (or SIGKILL) the worker's process group; the worker alone where there are no groups"""
+    sig = getattr(signal, 'SIGKILL', signal.SIGTERM) if kill else signal.SIGTERM
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, sig)
+            return
+        except ProcessLookupError:
+            # The worker has not made its group yet (or it is gone already)
+            pass
+    if process.is_alive():
+        process.kill() if kill else process.terminate()
+
+
+class TrainingJobManager:
+    def __init__(self):
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.pending = queue.Queue()
+        # Worker process of the running job
+        self.process = None
+        # Per job: completion hook, finished event and stream subscribers (not part of the job dict)
+        self.hooks = {}
+        self.finished = {}
+        self.subscribers = {}
+
+    def submit(self, model_type: str, sensor_targets: list, weather_targets: list,
+               data_points: int, kind: str = "manual", on_complete=None, incremental: bool = False,
+               force: bool = False, search: dict = None, backtest: dict = None) -> dict:
+        """
+        Queue a training job
+
+        Args:
+            model_type: prophet or lightgbm
+            sensor_targets / weather_targets: Targets to train
+            data_points: Most recent sensor rows to train on
+            kind: 'manual', 'auto' (auto-train run), 'scheduled', 'hpo' or 'backtest'
+            on_complete: Optional callback(job dict) once the job has finished
+            incremental: Warm-start the stored models with new data (LightGBM)
+            force: Retrain even if the training data is unchanged since the last run
+            search: Run a hyperparameter search instead of training (LightGBM):
+                {'method', 'trials', 'budget_seconds'}
+            backtest: Run a rolling-origin backtest instead of training:
+                {'model_types', 'horizon', 'origins', 'stride', 'folds'}
+
+        Returns:
+            Job dict
+        """
+        now = datetime.now()
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'kind': kind,
+            'model_type': model_type,
+            'sensor_targets': list(sensor_targets),
+            'weather_targets': list(weather_targets),
+            'data_points': data_points,
+            'incremental': bool(incremental),
+            'force': bool(force),
+            'data_source': TRAINING_DATA_SOURCE,
+            'search': dict(search) if search else None,
+            'backtest': dict(backtest) if backtest else None,
+            'status': QUEUED,
+            'stage': 'queued',
+            'message': 'Đang chờ trong hàng đợi...',
+            'progress': 0.0,
+            'created_at': now.isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None,
+            'rows_processed': 0,
+            'cancel_requested': False,
+            'targets_saved': [],
+            'event_seq': 0,
+            'events': deque(maxlen=MAX_JOB_EVENTS)
+        }
+        with self.lock:
+            self.jobs[job['id']] = job
+            self.finished[job['id']] = threading.Event()
+            if on_complete:
+                self.hooks[job['id']] = on_complete
+            self._prune()
+
+        self.pending.put(job['id'])
+        self.start()
+        logger.info(f"Training job {job['id']} queued: {model_type}, {data_points} rows, "
+                    f"targets={job['sensor_targets'] + job['weather_targets']}")
+        return self.get(job['id'])
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS (lock held)"""
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+            self.hooks.pop(job_id, None)
+            self.finished.pop(job_id, None)
+            self.subscribers.pop(job_id, None)
+
+    def _timing(self, job: dict):
+        """(elapsed seconds, ETA seconds) of a job; None where not known yet"""
+        if not job['started_at']:
+            return None, None
+        end = datetime.fromisoformat(job['finished_at']) if job['finished_at'] else datetime.now()
+        elapsed = (end - datetime.fromisoformat(job['started_at'])).total_seconds()
+        eta = None
+        if job['status'] == RUNNING and job['progress'] > LOAD_PROGRESS:
+            # Linear extrapolation of the time per unit of progress so far
+            eta = elapsed / job['progress'] * (1 - job['progress'])
+        return elapsed, eta
+
+    def _view(self, job: dict, events: bool = True) -> dict:
+        """Job as returned by the API: elapsed time and ETA added (lock held)"""
+        view = {key: value for key, value in job.items() if key not in ('cancel_requested', 'event_seq', 'events')}
+        if events:
+            view['events'] = list(job['events'])
+        elapsed, eta = self._timing(job)
+        view['elapsed_seconds'] = round(elapsed, 1) if elapsed is not None else None
+        view['eta_seconds'] = round(eta, 1) if eta is not None else None
+        return view
+
+    def get(self, job_id: str):
+        """Job dict, or None for an unknown id"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return self._view(job) if job else None
+
+    def list_jobs(self, limit: int = 20) -> list:
+        """Most recent jobs first"""
+        with self.lock:
+            return [self._view(job, events=False) for job in reversed(self.jobs.values())][:limit]
+
+    def cancel(self, job_id: str):
+        """
+        Cancel a queued job, or stop the worker process of the running one.
+        Returns the job dict (None for an unknown id).
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] == QUEUED:
+                self._finish(job, CANCELLED, message='Đã hủy')
+            elif job['status'] == RUNNING and not job['cancel_requested']:
+                job['cancel_requested'] = True
+                self._emit(job, 'status', 'Đang dừng huấn luyện...')
+                if self.process is not None and self.process.is_alive():
+                    _signal_job(self.process)
+                logger.info(f"Training job {job_id}: cancel requested")
+        self._complete(job_id)
+        return self.get(job_id)
+
+    def wait(self, job_id: str, timeout: float = None):
+        """Block until a job has finished; returns the job dict"""
+        with self.lock:
+            finished = self.finished.get(job_id)
+        if finished is not None:
+            finished.wait(timeout)
+        return self.get(job_id)
+
+    def subscribe(self, job_id: str, after: int = 0):
+        """
+        Stream a job's events (call from the event loop)
+
+        Returns an asyncio.Queue of (sse event name, data) primed with the
+        buffered events newer than `after`; it ends with ('done', job dict).
+        None for an unknown job.
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            for event in job['events']:
+                if event['seq'] > after:
+                    events.put_nowait((event['type'], event))
+            if job['status'] in FINISHED_STATES:
+                events.put_nowait(('done', self._view(job, events=False)))
+            else:
+                self.subscribers.setdefault(job_id, set()).add((loop, events))
+        return events
+
+    def unsubscribe(self, job_id: str, events):
+        with self.lock:
+            subscribers = self.subscribers.get(job_id)
+            if subscribers:
+                subscribers.difference_update({sub for sub in subscribers if sub[1] is events})
+
+    def _publish(self, job_id: str, name: str, data: dict):
+        """Hand an event to the stream subscribers of a job (lock held)"""
+        for loop, events in self.subscribers.get(job_id, ()):
+            try:
+                loop.call_soon_threadsafe(events.put_nowait, (name, data))
+            except RuntimeError:
+                # Subscriber's event loop is closed
+                pass
+
+    def _emit(self, job: dict, kind: str, message: str, **fields):
+        """
+        Record a structured event, make its message the current one and
+        stream it (lock held)
+
+        Args:
+            kind: 'stage', 'progress' or 'status' (also the SSE event name)
+            fields: Event details (target, step, rows, metrics, ...)
+        """
+        job['message'] = message
+        job['event_seq'] += 1
+        elapsed, eta = self._timing(job)
+        event = {
+            'seq': job['event_seq'],
+            'type': kind,
+            'time': datetime.now().isoformat(),
+            'stage': job['stage'],
+            'message': message,
+            'progress': round(job['progress'], 4),
+            'elapsed_seconds': round(elapsed, 2) if elapsed is not None else None,
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'rows_processed': job['rows_processed'],
+            'rows_per_second': round(job['rows_processed'] / elapsed, 1) if elapsed else None,
+            **fields
+        }
+        job['events'].append(event)
+        self._publish(job['id'], kind, event)
+
+    def _finish(self, job: dict, status: str, message: str, error: str = None):
+        """Mark a job finished (lock held); the hook runs later in _complete()"""
+        job['status'] = status
+        job['stage'] = status
+        job['error'] = error
+        job['finished_at'] = datetime.now().isoformat()
+        if status == SUCCEEDED:
+            job['progress'] = 1.0
+        self._emit(job, 'status', message, status=status, error=error)
+        logger.info(f"Training job {job['id']} {status}" + (f": {error}" if error else ""))
+
+    def _complete(self, job_id: str):
+        """Run the completion hook of a finished job and wake up waiters"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] not in FINISHED_STATES:
+                return
+            hook = self.hooks.pop(job_id, None)
+            finished = self.finished.get(job_id)
+            view = self._view(job)
+            # Close the streams of the job
+            self._publish(job_id, 'done', self._view(job, events=False))
+            self.subscribers.pop(job_id, None)
+        if hook:
+            try:
+                hook(view)
+            except Exception as e:
+                logger.error(f"Training job {job_id} completion hook failed: {e}")
+        if finished is not None:
+            finished.set()
+
+    def _handle(self, job: dict, message: dict):
+        """Apply one worker message to the job (lock held)"""
+        if message['type'] == 'stage':
+            job['stage'] = message['stage']
+            job['progress'] = max(job['progress'], LOAD_PROGRESS if message['stage'] == 'training' else 0.0)
+            self._emit(job, 'stage', message['message'])
+        elif message['type'] == 'progress':
+            event = message['event']
+            job['progress'] = max(job['progress'], LOAD_PROGRESS + TRAIN_PROGRESS * event.get('fraction', 0))
+            job['rows_processed'] += event.get('rows', 0)
+            if event.get('event') == 'target_trained' and event.get('success'):
+                job['targets_saved'].append(event.get('target'))
+            self._emit(job, 'progress', _describe(event), **{
+                key: value for key, value in event.items() if key != 'fraction'
+            })
+
+    def _run(self, job_id: str):
+        """Train one job in a worker process and hot-load its models"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] != QUEUED:
+                return
+            job['status'] = RUNNING
+            job['stage'] = 'starting'
+            job['started_at'] = datetime.now().isoformat()
+            self._emit(job, 'stage', 'Đang khởi động tiến trình huấn luyện...')
+            spec = {key: job[key] for key in ('model_type', 'sensor_targets', 'weather_targets', 'data_points', 'incremental', 'force', 'data_source', 'search', 'backtest')}
+
+            context = multiprocessing.get_context(JOB_START_METHOD)
+            messages = context.Queue()
+            # Not a daemon: the trainer may start its own process pool
+            if job['search']:
+                worker = _search_in_worker
+            elif job['backtest']:
+                worker = _backtest_in_worker
+            else:
+                worker = _train_in_worker
+            self.process = context.Process(target=_run_worker, args=(worker, spec, messages), name=f"training-{job_id}")
+            self.process.start()
+        process = self.process
+
+        outcome = None
+        while outcome is None:
+            try:
+                message = messages.get(timeout=0.5)
+            except queue.Empty:
+                if not process.is_alive():
+                    # The worker may have exited right after its last message
+                    try:
+                        message = messages.get(timeout=0.5)
+                    except queue.Empty:
+                        break
+                else:
+                    continue
+            if message['type'] == 'result':
+                outcome = message
+            else:
+                with self.lock:
+                    self._handle(job, message)
+
+        process.join(timeout=10)
+        if process.is_alive():
+            _signal_job(process, kill=True)
+            process.join()
+        if job['cancel_requested']:
+            # Pool processes that outlived the worker must not keep training
+            _signal_job(process, kill=True)
+        with self.lock:
+            self.process = None
+
+        if outcome is not None and outcome.get('success'):
+            # Searches and backtests save no models
+            if not (job['search'] or job['backtest']):
+                with self.lock:
+                    job['stage'] = 'reloading'
+                    self._emit(job, 'stage', 'Đang nạp model mới...')
+                self._reload_models(job['model_type'])
+            with self.lock:
+                job['result'] = outcome['result']
+                if job['search']:
+                    self._finish(job, SUCCEEDED, message='✓ Hoàn thành tìm kiếm siêu tham số!')
+                elif job['backtest']:
+                    self._finish(job, SUCCEEDED, message='✓ Hoàn thành backtest!')
+                elif outcome['result'].get('skipped'):
+                    self._finish(job, SUCCEEDED, message='✓ Dữ liệu không thay đổi - giữ nguyên model hiện tại')
+                else:
+                    self._finish(job, SUCCEEDED, message='✓ Hoàn thành huấn luyện!')
+        else:
+            if job['targets_saved']:
+                # Some targets were saved before the job stopped - serve what is on disk
+                self._reload_models(job['model_type'])
+            with self.lock:
+                if job['cancel_requested']:
+                    self._finish(job, CANCELLED, message='Đã hủy huấn luyện')
+                elif outcome is not None:
+                    self._finish(job, FAILED, message=f"✗ Lỗi: {outcome.get('error')}", error=outcome.get('error'))
+                else:
+                    error = f"Tiến trình huấn luyện kết thúc bất thường (exit code {process.exitcode})"
+                    self._finish(job, FAILED, message=f"✗ Lỗi: {error}", error=error)
+        self._complete(job_id)
+
+    def _reload_models(self, model_type: str):
+        try:
+            from ml_utils import ml_manager
+            ml_manager.reload_models(model_type)
+        except Exception as e:
+            logger.error(f"Could not reload models after training: {e}")
+
+    def worker_loop(self):
+        """Run queued jobs one at a time"""
+        logger.info("🔄 Training job worker started")
+
+        while self.running:
+            try:
+                job_id = self.pending.get(timeout=1)
+            except queue.Empty:
+                continue
+            if job_id is None:
+                continue
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Training job {job_id} error: {e}")
+                with self.lock:
+                    job = self.jobs.get(job_id)
+                    if job is not None and job['status'] not in FINISHED_STATES:
+                        self._finish(job, FAILED, message=f"✗ Lỗi: {e}", error=str(e))
+                self._complete(job_id)
+
+    def start(self):
+        """Start the job worker in background"""
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.thread = threading.Thread(target=self.worker_loop, daemon=True)
+            self.thread.start()
+        logger.info("Training job worker started in background")
+
+    def stop(self):
+        """Stop the job worker (a running training process is terminated)"""
+        self.running = False
+        with self.lock:
+            if self.process is not None and self.process.is_alive():
+                for job in self.jobs.values():
+                    if job['status'] == RUNNING:
+                        job['cancel_requested'] = True
+                _signal_job(self.process)
+        self.pending.put(None)
+        if self.thread:
+            self.thread.join(timeout=15)
+        logger.info("Training job worker stopped")
+
+
+# Global training job manager instance
+training_jobs = TrainingJobManager()
+
+
+def start_training_jobs():
+    """Start the training job worker"""
+    training_jobs.start()
+
+
+def stop_training_jobs():
+    """Stop the training job worker"""
+    training_jobs.stop()